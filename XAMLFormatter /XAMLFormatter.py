@@ -1,39 +1,139 @@
 import tkinter as tk
 from tkinter import scrolledtext, messagebox, ttk, filedialog
-from xml.dom import minidom
-import re
-import asyncio
+import os
+import queue
 import threading
 
+from xamlformatter.highlighting import IncrementalHighlighter
+from xamlformatter.history import EditHistory
+from xamlformatter.jobs import JobScheduler, format_text_job, validate_text_job
+from xamlformatter.profiling import Profile, StagedProgress
+from xamlformatter.resources import find_project_root, project_index
+
+# Wraps a Text widget's Tcl command so every insert/delete, typed or programmatic, is
+# reported with the range it touched. Errors from the real command propagate unchanged
+# and read-only subcommands never leave Tcl; neither do edits to a disabled widget, which
+# Tk ignores.
+TEXT_PROXY_PROC = """
+proc xamlformatter_text_proxy {command callback args} {
+    set operation [lindex $args 0]
+    if {$operation ni {insert delete replace} || [$command cget -state] eq "disabled"} {
+        return [uplevel 1 [list $command {*}$args]]
+    }
+    set start [$command index [lindex $args 1]]
+    if {[$command compare $start == end]} {
+        set start [$command index "end - 1 chars"]
+    }
+    if {$operation eq "insert"} {
+        set text ""
+        foreach {chars tags} [lrange $args 2 end] {
+            append text $chars
+        }
+        set result [uplevel 1 [list $command {*}$args]]
+        $callback insert $start [$command index "$start + [string length $text] chars"] $text
+        return $result
+    }
+    if {[llength $args] > 2} {
+        set end [$command index [lindex $args 2]]
+    } else {
+        set end [$command index "$start + 1 chars"]
+    }
+    if {[$command compare $end == end]} {
+        set end [$command index "end - 1 chars"]
+    }
+    set deleted [$command get $start $end]
+    set result [uplevel 1 [list $command {*}$args]]
+    if {$deleted ne ""} {
+        $callback delete $start $end $deleted
+    }
+    if {$operation eq "replace"} {
+        set text ""
+        foreach {chars tags} [lrange $args 3 end] {
+            append text $chars
+        }
+        $callback insert $start [$command index "$start + [string length $text] chars"] $text
+    }
+    return $result
+}
+"""
+
+# Files from this size up open in large-file mode: no word wrap, highlighting only near the
+# visible lines and no background validation.
+LARGE_FILE_BYTES = 2 * 1024 * 1024
+LOAD_CHUNK_CHARS = 256 * 1024
+SAVE_CHUNK_LINES = 2000
+# A format run that changes more places than this replaces the span they cover in one go:
+# past a point, thousands of small Tk edits cost more than one large one.
+MAX_FORMAT_EDITS = 2000
+
 class XAMLFormatterApp:
     def __init__(self, root):
         self.root = root
         self.root.title("XAML Formatter and Validator for WinUI3")
         self.root.geometry("800x700")
 
+        # Formatting and validation run in worker processes; results come back on this thread.
+        self.scheduler = JobScheduler(self.root)
+        self.history = EditHistory()
+        self.profile = Profile()
+        self.highlight_profile = Profile()
+        self.resource_scope = None  # Resources from the open file's project, once indexed.
+        self.edit_generation = 0  # Bumped by every edit, so results for older text can be recognized.
+        self.validate_delay = 600  # Milliseconds of quiet after an edit before validating in the background.
+        self._validate_id = None
+        self.large_file = False
+        self.saving = False  # The editor is read-only while a save copies the buffer out.
+
         self.setup_ui()
         self.setup_menu()
 
-        self.undo_stack = []
-        self.redo_stack = []
-
     def setup_ui(self):
         self.textbox = scrolledtext.ScrolledText(self.root, wrap=tk.WORD, font=("Courier New", 12))
         self.textbox.pack(padx=10, pady=10, expand=True, fill=tk.BOTH)
-        self.textbox.bind("<KeyRelease>", self.on_text_change)
         self.textbox.bind("<Control-z>", self.undo)
         self.textbox.bind("<Control-y>", self.redo)
 
         self.output_textbox = scrolledtext.ScrolledText(self.root, wrap=tk.WORD, height=10, font=("Courier New", 10))
         self.output_textbox.pack(padx=10, pady=10, expand=True, fill=tk.BOTH)
+        self.output_textbox.tag_configure("tag_error_link", foreground="blue", underline=True)
+        self.output_textbox.tag_bind("tag_error_link", "<Button-1>", self.jump_to_error)
+        self.output_textbox.tag_bind("tag_error_link", "<Enter>", lambda event: self.output_textbox.config(cursor="hand2"))
+        self.output_textbox.tag_bind("tag_error_link", "<Leave>", lambda event: self.output_textbox.config(cursor=""))
+        self.error_lines = {}  # Output pane line -> Diagnostic shown on it.
 
         self.progress_bar = ttk.Progressbar(self.root, orient="horizontal", length=400, mode="determinate")
         self.progress_bar.pack(pady=10)
 
-        self.format_button = tk.Button(self.root, text="Format and Validate", command=self.start_format_and_validate)
-        self.format_button.pack(pady=10)
+        button_frame = tk.Frame(self.root)
+        button_frame.pack(pady=10)
+        self.format_button = tk.Button(button_frame, text="Format and Validate", command=self.start_format_and_validate)
+        self.format_button.pack(side=tk.LEFT, padx=5)
+        self.format_selection_button = tk.Button(button_frame, text="Format Selection", command=self.start_format_selection)
+        self.format_selection_button.pack(side=tk.LEFT, padx=5)
+
+        self.progress = StagedProgress(self.set_progress)
+        self.progress_value = 0
 
         self.setup_tags()
+        self.highlighter = IncrementalHighlighter(self.textbox, profile=self.highlight_profile)
+        self.install_edit_hook()
+
+    def install_edit_hook(self):
+        widget_command = str(self.textbox)
+        inner_command = f"{widget_command}_inner"
+        self.textbox.tk.eval(TEXT_PROXY_PROC)
+        self.textbox.tk.call("rename", widget_command, inner_command)
+        self.textbox.tk.call("interp", "alias", "", widget_command, "", "xamlformatter_text_proxy",
+                             inner_command, self.textbox.register(self.on_text_edit))
+
+    def on_text_edit(self, operation, start, end, text):
+        self.edit_generation += 1
+        self.schedule_validation()
+        self.history.record(operation, start, end, text)
+        if operation == "insert":
+            self.highlighter.invalidate(start, end)
+        else:
+            self.highlighter.invalidate(start, start)
 
     def setup_menu(self):
         menubar = tk.Menu(self.root)
@@ -41,402 +141,296 @@ class XAMLFormatterApp:
         file_menu.add_command(label="Open", command=self.open_file)
         file_menu.add_command(label="Save", command=self.save_file)
         file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.root.quit)
+        file_menu.add_command(label="Exit", command=self.close)
         menubar.add_cascade(label="File", menu=file_menu)
         self.root.config(menu=menubar)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+
+    def close(self):
+        self.scheduler.shutdown()
+        self.root.destroy()
 
     def setup_tags(self):
         self.textbox.tag_configure("tag_element", foreground="blue")
         self.textbox.tag_configure("tag_attribute", foreground="red")
         self.textbox.tag_configure("tag_value", foreground="green")
+        self.textbox.tag_configure("tag_comment", foreground="gray")
         self.textbox.tag_configure("tag_error", background="yellow", foreground="red")
 
-    def on_text_change(self, event=None):
-        content = self.textbox.get("1.0", tk.END)
-        self.undo_stack.append(content)
-        self.redo_stack.clear()
-        self.apply_syntax_highlighting_async()
-
-    def start_format_and_validate(self):
-        threading.Thread(target=lambda: asyncio.run(self.format_and_validate_xaml())).start()
-
-    async def format_and_validate_xaml(self):
-        self.progress_bar["value"] = 0
+    def start_format_and_validate(self, selection=None):
+        # Replaces a format run still in progress; pending background validation is dropped,
+        # since the result includes the formatted text's diagnostics. With selection, a pair
+        # of (line, column) positions, only the element enclosing it is formatted.
+        self.cancel_validation()
+        # Error lines still being added for the previous run would land in the cleared pane.
+        self.scheduler.cancel("highlight")
+        self.progress_bar["value"] = self.progress_value = 0
         self.output_textbox.delete("1.0", tk.END)
-        xaml_input = self.textbox.get("1.0", tk.END)
-
-        try:
-            self.update_progress("Parsing XAML...", 20)
-            formatted_xaml, errors = await self.format_xaml_text(xaml_input)
+        self.error_lines.clear()
+        self.profile.clear()
+        self.output_textbox.insert(tk.INSERT, "Formatting and validating XAML...\n" if selection is None else
+                                   "Formatting the selected element and validating XAML...\n")
+        generation = self.edit_generation
+        self.scheduler.submit("format", format_text_job, self.textbox.get("1.0", "end-1c"), resource_scope=self.resource_scope,
+                              selection=selection, max_edits=MAX_FORMAT_EDITS,
+                              on_done=lambda result: self.apply_format_result(result, generation),
+                              on_progress=self.progress, on_error=self.show_job_error)
+
+    def start_format_selection(self):
+        # The element enclosing the selection, or the insertion cursor when nothing is selected.
+        ranges = self.textbox.tag_ranges(tk.SEL)
+        indices = ranges if ranges else (tk.INSERT, tk.INSERT)
+        selection = tuple(tuple(map(int, self.textbox.index(index).split("."))) for index in indices)
+        self.start_format_and_validate(selection)
+
+    def apply_format_result(self, result, generation):
+        edits, errors, profile = result
+        self.profile.merge(profile)
+        if self.saving:
+            self.update_progress("File is being saved; run Format and Validate again.", 0)
+            return
+        if generation != self.edit_generation:
+            # The edits' positions are for the text the run started from; applying them now
+            # would garble what was typed since.
+            self.update_progress("Text changed while formatting; run Format and Validate again.", 0)
+            return
+
+        with self.profile.stage("apply"):
+            self.apply_format_edits(edits)
+        self.cancel_validation()
+
+        def finish():
+            self.show_profile()
+            self.update_progress("Operation Complete", 100)
 
-            self.update_progress("Formatting XAML...", 40)
-            self.textbox.delete("1.0", tk.END)
-            self.textbox.insert(tk.INSERT, formatted_xaml)
-            await self.apply_syntax_highlighting()
-
-            self.update_progress("Validating XAML...", 60)
-            if errors:
-                self.output_textbox.insert(tk.INSERT, "Errors found in XAML:\n")
-                for error in errors:
-                    self.output_textbox.insert(tk.INSERT, f"- {error}\n")
-                await self.highlight_errors(formatted_xaml, errors)
+        self.show_errors(errors, finish)
+
+    def apply_format_edits(self, edits):
+        # Only the changed places are touched, so the cursor, the view, and the highlighting
+        # elsewhere stay as they were. Positions refer to the text before any of the edits,
+        # so the last is applied first; one undo reverts them all.
+        with self.history.compound():
+            for start_line, start_column, end_line, end_column, text in reversed(edits):
+                start = f"{start_line}.{start_column}"
+                self.textbox.delete(start, f"{end_line}.{end_column}")
+                if text:
+                    self.textbox.insert(start, text)
+
+    def schedule_validation(self):
+        if self.large_file:
+            return  # Copying megabytes to a worker on every pause in typing costs more than it helps.
+        if self._validate_id is not None:
+            self.root.after_cancel(self._validate_id)
+        self._validate_id = self.root.after(self.validate_delay, self.start_validation)
+
+    def cancel_validation(self):
+        if self._validate_id is not None:
+            self.root.after_cancel(self._validate_id)
+            self._validate_id = None
+        self.scheduler.cancel("validate")
+
+    def start_validation(self):
+        # Background check after typing pauses; a newer one replaces it mid-run.
+        self._validate_id = None
+        if self.scheduler.is_running("format"):
+            return
+        generation = self.edit_generation
+        self.scheduler.submit("validate", validate_text_job, self.textbox.get("1.0", "end-1c"), resource_scope=self.resource_scope,
+                              on_done=lambda result: self.apply_validation_result(result, generation))
+
+    def apply_validation_result(self, result, generation):
+        if generation != self.edit_generation:
+            return  # Positions would be off; the validation scheduled by the newer edit will report.
+        self.output_textbox.delete("1.0", tk.END)
+        self.error_lines.clear()
+        self.show_errors(result[0], success="Success: XAML validated successfully!")
+
+    def show_errors(self, errors, done=None, success="Success: XAML formatted and validated successfully!"):
+        # Error lines and highlights go in a couple of hundred at a time, so a file with
+        # thousands of diagnostics does not block the event loop.
+        self.textbox.tag_remove("tag_error", "1.0", tk.END)
+        if not errors:
+            self.output_textbox.insert(tk.INSERT, f"{success}\n")
+            if done is not None:
+                done()
+            return
+        self.output_textbox.insert(tk.INSERT, "Errors found in XAML:\n")
+        self.scheduler.apply_in_batches("highlight", errors, self.show_error_batch, done=done)
+
+    def show_error_batch(self, errors):
+        for error in errors:
+            if error.located:
+                line = int(self.output_textbox.index(tk.INSERT).split(".")[0])
+                self.error_lines[line] = error
+                self.output_textbox.insert(tk.INSERT, f"- {error}\n", "tag_error_link")
+                self.textbox.tag_add("tag_error", error.start_index(), error.end_index())
             else:
-                self.output_textbox.insert(tk.INSERT, "Success: XAML formatted and validated successfully!\n")
+                self.output_textbox.insert(tk.INSERT, f"- {error}\n")
 
-            self.update_progress("Operation Complete", 100)
-        except Exception as e:
-            self.output_textbox.insert(tk.INSERT, f"An error occurred: {str(e)}\n")
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
-            self.update_progress("Operation Failed", 100)
+    def show_job_error(self, error):
+        self.output_textbox.insert(tk.INSERT, f"An error occurred: {str(error)}\n")
+        messagebox.showerror("Error", f"An error occurred: {str(error)}")
+        self.update_progress("Operation Failed", 100)
 
     def update_progress(self, message, value):
         self.output_textbox.insert(tk.INSERT, f"{message}\n")
         self.progress_bar["value"] = value
         self.root.update_idletasks()
 
-    async def format_xaml_text(self, xaml):
-        def format_task():
-            errors = []
-            try:
-                parsed_xml = minidom.parseString(xaml)
-                formatted_xml = self.pretty_print(parsed_xml)
-                errors = self.validate_xaml(parsed_xml)
-                return formatted_xml, errors
-            except Exception as e:
-                errors.append(f"Syntax error: {str(e)}")
-                return xaml, errors
-
-        return await asyncio.to_thread(format_task)
-
-    def pretty_print(self, xml_node, indent="  "):
-        def remove_whitespace_nodes(node, unlink=True):
-            remove_list = []
-            for child in node.childNodes:
-                if child.nodeType == minidom.Node.TEXT_NODE and not child.data.strip():
-                    remove_list.append(child)
-                elif child.hasChildNodes():
-                    remove_whitespace_nodes(child, unlink)
-            for node in remove_list:
-                node.parentNode.removeChild(node)
-                if unlink:
-                    node.unlink()
-
-        remove_whitespace_nodes(xml_node)
-        return self.format_node(xml_node, indent, 0)
-
-    def format_node(self, node, indent, level):
-        output = []
-        if node.nodeType == minidom.Node.ELEMENT_NODE:
-            output.append(f"{indent * level}<{node.tagName}")
-            for attr_name, attr_value in node.attributes.items():
-                output.append(f' {attr_name}="{attr_value}"')
-            if node.childNodes:
-                output.append(">\n")
-                for child in node.childNodes:
-                    output.append(self.format_node(child, indent, level + 1))
-                output.append(f"{indent * level}</{node.tagName}>\n")
-            else:
-                output.append(" />\n")
-        elif node.nodeType == minidom.Node.TEXT_NODE:
-            text = node.data.strip()
-            if text:
-                output.append(f"{indent * level}{text}\n")
-        return ''.join(output)
-
-    def apply_syntax_highlighting_async(self):
-        threading.Thread(target=lambda: asyncio.run(self.apply_syntax_highlighting())).start()
-
-    async def apply_syntax_highlighting(self):
-        content = self.textbox.get("1.0", tk.END)
-        
-        self.textbox.tag_remove("tag_element", "1.0", tk.END)
-        self.textbox.tag_remove("tag_attribute", "1.0", tk.END)
-        self.textbox.tag_remove("tag_value", "1.0", tk.END)
-        
-        def highlight_task():
-            element_pattern = re.compile(r'<[^>]+>')
-            attribute_pattern = re.compile(r'\b\w+="[^"]*"')
-            value_pattern = re.compile(r'"[^"]*"')
-
-            for pattern, tag in [
-                (element_pattern, "tag_element"),
-                (attribute_pattern, "tag_attribute"),
-                (value_pattern, "tag_value")
-            ]:
-                for match in pattern.finditer(content):
-                    start, end = match.span()
-                    self.textbox.tag_add(tag, f"1.0+{start}c", f"1.0+{end}c")
-
-        await asyncio.to_thread(highlight_task)
-
-    def validate_xaml(self, xml_node):
-        errors = []
-        validation_functions = [
-            self.check_for_missing_tags,
-            self.check_for_unknown_elements,
-            self.check_for_invalid_attributes,
-            self.check_for_binding_errors,
-            self.check_for_resource_errors,
-            self.check_for_style_template_errors,
-            self.check_for_namespace_errors,
-            self.check_for_control_errors,
-            self.check_for_event_handler_errors,
-            self.check_for_template_binding_errors,
-            self.check_for_visual_tree_errors,
-            self.check_for_datatemplate_errors,
-            self.check_for_converter_errors,
-            self.check_for_style_conflicts,
-            self.check_for_animation_storyboard_errors,
-            self.check_for_markup_extension_errors,
-            self.check_for_control_template_part_errors
-        ]
-        for func in validation_functions:
-            errors.extend(func(xml_node))
-        return errors
-
-    def check_for_missing_tags(self, xml_node):
-        errors = []
-        for node in xml_node.getElementsByTagName("*"):
-            if not node.hasChildNodes() and not node.hasAttributes():
-                errors.append(f"Element <{node.tagName}> is empty and might be missing child elements or attributes.")
-        return errors
-
-    def check_for_unknown_elements(self, xml_node):
-        errors = []
-        known_elements = {
-            'Page', 'ResourceDictionary', 'Grid', 'StackPanel', 'Canvas', 'TextBlock', 'Button',
-            'TabView', 'TabViewItem', 'ComboBox', 'FontIcon', 'DataTemplate', 'ItemsControl',
-            'Border', 'ToolTip', 'ToolTipService', 'Flyout', 'ProgressRing', 'controls:DataGrid',
-            'controls:DataGridTextColumn', 'controls:DockPanel', 'SolidColorBrush'
-        }  # Extend this list with more known elements as needed.
-        for node in xml_node.getElementsByTagName("*"):
-            if node.tagName not in known_elements:
-                errors.append(f"Unknown element: <{node.tagName}>")
-        return errors
-
-    def check_for_invalid_attributes(self, xml_node):
-        errors = []
-        known_attributes = {
-            'Grid': {'Row', 'Column', 'RowDefinitions', 'ColumnDefinitions', 'Background', 'Opacity', 'Visibility'},
-            'TextBlock': {'Text', 'FontSize', 'Foreground', 'HorizontalAlignment', 'VerticalAlignment', 'Margin', 'Grid.Row', 'Grid.Column', 'Grid.ColumnSpan', 'Visibility', 'Style'},
-            'Button': {'Content', 'Click', 'Command', 'Style', 'Margin', 'Padding', 'Height', 'Width', 'IsEnabled', 'ToolTipService.ToolTip', 'HorizontalAlignment', 'FontSize'},
-            'ComboBox': {'ItemsSource', 'SelectedItem', 'IsEditable', 'Width', 'Height', 'ToolTipService.ToolTip', 'Margin', 'HorizontalAlignment', 'VerticalAlignment'},
-            'TabView': {'TabItems', 'SelectedItem'},
-            'DataTemplate': {'DataType'},
-            'ItemsControl': {'ItemTemplate', 'ItemsSource'},
-            'Border': {'Background', 'BorderBrush', 'BorderThickness', 'CornerRadius'},
-            'ToolTip': {'Content', 'Placement'},
-            'Flyout': {'Content', 'Placement'},
-            'ProgressRing': {'IsActive', 'Width', 'Height'},
-            'controls:DataGrid': {'ItemsSource', 'AutoGenerateColumns', 'Columns'},
-            'controls:DataGridTextColumn': {'Header', 'Binding'},
-            'controls:DockPanel': {'LastChildFill', 'Dock'},
-            'SolidColorBrush': {'Color'}
-        }  # Extend this list with more known attributes for elements as needed.
-        for node in xml_node.getElementsByTagName("*"):
-            if node.tagName in known_attributes:
-                for attr_name in node.attributes.keys():
-                    if attr_name not in known_attributes[node.tagName]:
-                        errors.append(f"Unknown attribute {attr_name} in element <{node.tagName}>")
-        return errors
-
-    def check_for_binding_errors(self, xml_node):
-        errors = []
-        binding_pattern = re.compile(r"{Binding\s+Path=([^,}]+),?\s*}")
-        for node in xml_node.getElementsByTagName("*"):
-            for attr_name, attr_value in node.attributes.items():
-                binding_match = binding_pattern.search(attr_value)
-                if binding_match:
-                    path = binding_match.group(1)
-                    if not path:  # Simplified check, more detailed checks can be implemented.
-                        errors.append(f"Binding path error in attribute {attr_name} of element <{node.tagName}>")
-        return errors
-
-    def check_for_resource_errors(self, xml_node):
-        errors = []
-        resources = set()
-        for node in xml_node.getElementsByTagName("*"):
-            if node.tagName == "ResourceDictionary" or "Resource" in node.tagName:
-                for child in node.childNodes:
-                    if child.nodeType == minidom.Node.ELEMENT_NODE and 'x:Key' in child.attributes:
-                        resources.add(child.attributes['x:Key'].value)
-        for node in xml_node.getElementsByTagName("*"):
-            for attr_name, attr_value in node.attributes.items():
-                if "StaticResource" in attr_value or "DynamicResource" in attr_value:
-                    resource_key = re.search(r'\{(Static|Dynamic)Resource\s+(\w+)\}', attr_value)
-                    if resource_key and resource_key.group(2) not in resources:
-                        errors.append(f"Resource '{resource_key.group(2)}' not found in element <{node.tagName}>")
-        return errors
-
-    def check_for_style_template_errors(self, xml_node):
-        errors = []
-        for node in xml_node.getElementsByTagName("*"):
-            if "Style" in node.tagName or "Template" in node.tagName:
-                if 'TargetType' not in node.attributes:
-                    errors.append(f"Style or Template in element <{node.tagName}> missing 'TargetType' attribute")
-                if node.tagName == "Style" and 'BasedOn' in node.attributes:
-                    based_on = node.attributes['BasedOn'].value
-                    if not re.match(r'\{StaticResource \w+\}', based_on):
-                        errors.append(f"Invalid BasedOn reference '{based_on}' in <{node.tagName}>")
-        return errors
-
-    def check_for_namespace_errors(self, xml_node):
-        errors = []
-        namespaces = {node.prefix for node in xml_node.childNodes if node.nodeType == minidom.Node.ELEMENT_NODE}
-        for node in xml_node.getElementsByTagName("*"):
-            for attr_name, attr_value in node.attributes.items():
-                if ':' in attr_name:
-                    prefix = attr_name.split(':')[0]
-                    if prefix not in namespaces:
-                        errors.append(f"Namespace prefix '{prefix}' not defined for attribute {attr_name} in element <{node.tagName}>")
-        return errors
-
-    def check_for_control_errors(self, xml_node):
-        errors = []
-        known_controls = {
-            'Button', 'TextBox', 'TextBlock', 'Page', 'Grid', 'StackPanel', 'Canvas', 'ComboBox',
-            'TabView', 'TabViewItem', 'FontIcon', 'DataTemplate', 'ItemsControl', 'Border', 'ToolTip',
-            'ToolTipService', 'Flyout', 'ProgressRing', 'controls:DataGrid', 'controls:DataGridTextColumn',
-            'controls:DockPanel', 'SolidColorBrush', 'local:HalfWidthConverter', 'local:BooleanToVisibilityConverter',
-            'local:InvertBooleanConverter', 'local:NullableBooleanToBooleanConverter', 'local:TemplateSelector'
-        }  # Extend this list with more known controls as needed.
-        for node in xml_node.getElementsByTagName("*"):
-            if node.tagName not in known_controls:
-                errors.append(f"Unknown control: <{node.tagName}>")
-        return errors
-
-    def check_for_event_handler_errors(self, xml_node):
-        errors = []
-        event_pattern = re.compile(r'^[A-Za-z_]\w*$')
-        for node in xml_node.getElementsByTagName("*"):
-            for attr_name in node.attributes.keys():
-                if 'Click' in attr_name or 'Handler' in attr_name:
-                    handler_name = node.attributes[attr_name].value
-                    if not event_pattern.match(handler_name):
-                        errors.append(f"Invalid event handler name '{handler_name}' in attribute {attr_name} of element <{node.tagName}>")
-        return errors
-
-    def check_for_template_binding_errors(self, xml_node):
-        errors = []
-        for node in xml_node.getElementsByTagName("*"):
-            for attr_name, attr_value in node.attributes.items():
-                if "TemplateBinding" in attr_value:
-                    template_binding = re.search(r'\{TemplateBinding\s+(\w+)\}', attr_value)
-                    if template_binding and template_binding.group(1) not in node.attributes:
-                        errors.append(f"Invalid TemplateBinding '{template_binding.group(1)}' in element <{node.tagName}>")
-        return errors
-
-    def check_for_visual_tree_errors(self, xml_node):
-        errors = []
-        for node in xml_node.getElementsByTagName("*"):
-            if node.tagName == "VisualTree" and not node.hasChildNodes():
-                errors.append(f"VisualTree element <{node.tagName}> is empty")
-        return errors
-
-    def check_for_datatemplate_errors(self, xml_node):
-        errors = []
-        for node in xml_node.getElementsByTagName("DataTemplate"):
-            if not node.hasChildNodes():
-                errors.append(f"DataTemplate element <{node.tagName}> is empty")
-        return errors
-
-    def check_for_converter_errors(self, xml_node):
-        errors = []
-        for node in xml_node.getElementsByTagName("*"):
-            for attr_name, attr_value in node.attributes.items():
-                if "Converter" in attr_name:
-                    converter = re.search(r'\{(\w+Converter)\}', attr_value)
-                    if converter and converter.group(1) not in globals():
-                        errors.append(f"Converter '{converter.group(1)}' not found in element <{node.tagName}>")
-        return errors
-
-    def check_for_style_conflicts(self, xml_node):
-        errors = []
-        for node in xml_node.getElementsByTagName("Style"):
-            if 'TargetType' in node.attributes:
-                target_type = node.attributes['TargetType'].value
-                if any(child.tagName == "Style" and child != node and 'TargetType' in child.attributes and child.attributes['TargetType'].value == target_type for child in xml_node.getElementsByTagName("Style")):
-                    errors.append(f"Conflicting styles for TargetType '{target_type}' in element <{node.tagName}>")
-        return errors
-
-    def check_for_animation_storyboard_errors(self, xml_node):
-        errors = []
-        for node in xml_node.getElementsByTagName("Storyboard"):
-            for child in node.childNodes:
-                if child.nodeType == minidom.Node.ELEMENT_NODE and 'TargetProperty' not in child.attributes:
-                    errors.append(f"Animation <{child.tagName}> in Storyboard missing 'TargetProperty' attribute")
-        return errors
-
-    def check_for_markup_extension_errors(self, xml_node):
-        errors = []
-        for node in xml_node.getElementsByTagName("*"):
-            for attr_name, attr_value in node.attributes.items():
-                if "MarkupExtension" in attr_value:
-                    markup_extension = re.search(r'\{(\w+Extension)\}', attr_value)
-                    if markup_extension and markup_extension.group(1) not in globals():
-                        errors.append(f"MarkupExtension '{markup_extension.group(1)}' not found in element <{node.tagName}>")
-        return errors
-
-    def check_for_control_template_part_errors(self, xml_node):
-        errors = []
-        for node in xml_node.getElementsByTagName("*"):
-            if "ControlTemplate" in node.tagName:
-                for child in node.childNodes:
-                    if child.nodeType == minidom.Node.ELEMENT_NODE and 'x:Name' not in child.attributes:
-                        errors.append(f"ControlTemplate part <{child.tagName}> missing 'x:Name' attribute in element <{node.tagName}>")
-        return errors
-
-    async def highlight_errors(self, content, errors):
-        def highlight_task():
-            for error in errors:
-                match = re.search(re.escape(error), content)
-                if match:
-                    start, end = match.span()
-                    self.textbox.tag_add("tag_error", f"1.0+{start}c", f"1.0+{end}c")
-
-        await asyncio.to_thread(highlight_task)
+    def set_progress(self, fraction):
+        # Called for every progress report the scheduler relays; only whole-percent changes touch Tk.
+        value = int(fraction * 100)
+        if value != self.progress_value:
+            self.progress_value = value
+            self.progress_bar["value"] = value
+
+    def show_profile(self):
+        # Highlighting runs between format runs, so its totals since the last report are folded in here.
+        self.profile.merge(self.highlight_profile)
+        self.highlight_profile.clear()
+        self.output_textbox.insert(tk.INSERT, f"Time breakdown:\n{self.profile.format_table()}\n")
+        if "validate" in self.profile.stages:
+            # The next run's progress bar is weighted by where this one spent its time.
+            self.progress.weights_from(self.profile)
+
+    def jump_to_error(self, event):
+        line = int(self.output_textbox.index(f"@{event.x},{event.y}").split(".")[0])
+        error = self.error_lines.get(line)
+        if error is None:
+            return
+        self.textbox.mark_set(tk.INSERT, error.start_index())
+        self.textbox.tag_remove(tk.SEL, "1.0", tk.END)
+        self.textbox.tag_add(tk.SEL, error.start_index(), error.end_index())
+        self.textbox.see(tk.INSERT)
+        self.textbox.focus_set()
 
     def undo(self, event=None):
-        if len(self.undo_stack) > 1:
-            current_content = self.undo_stack.pop()
-            self.redo_stack.append(current_content)
-            previous_content = self.undo_stack[-1]
-            self.textbox.delete("1.0", tk.END)
-            self.textbox.insert(tk.INSERT, previous_content)
-            self.apply_syntax_highlighting_async()
+        # Popping history while the buffer cannot change would leave the two out of step.
+        if not self.saving:
+            self.apply_edits(self.history.undo())
+        return "break"
 
     def redo(self, event=None):
-        if self.redo_stack:
-            next_content = self.redo_stack.pop()
-            self.undo_stack.append(next_content)
-            self.textbox.delete("1.0", tk.END)
-            self.textbox.insert(tk.INSERT, next_content)
-            self.apply_syntax_highlighting_async()
+        if not self.saving:
+            self.apply_edits(self.history.redo())
+        return "break"
+
+    def apply_edits(self, edits):
+        if not edits:
+            return
+        with self.history.replaying():
+            for edit in edits:
+                if edit.kind == "insert":
+                    self.textbox.insert(edit.start, edit.text)
+                else:
+                    self.textbox.delete(edit.start, f"{edit.start}+{len(edit.text)}c")
+        last = edits[-1]
+        cursor = f"{last.start}+{len(last.text)}c" if last.kind == "insert" else last.start
+        self.textbox.mark_set(tk.INSERT, cursor)
+        self.textbox.see(tk.INSERT)
 
     def open_file(self):
         file_path = filedialog.askopenfilename(filetypes=[("XAML files", "*.xaml"), ("All files", "*.*")])
         if file_path:
-            threading.Thread(target=self.load_file, args=(file_path,)).start()
+            self.start_loading(file_path)
 
-    def load_file(self, file_path):
-        with open(file_path, 'r') as file:
-            content = file.read()
-            self.root.after(0, self.update_textbox, content)
+    def set_large_file_mode(self, large):
+        self.large_file = large
+        self.textbox.configure(wrap=tk.NONE if large else tk.WORD)
+        self.highlighter.set_lazy(large)
 
-    def update_textbox(self, content):
-        self.textbox.delete("1.0", tk.END)
-        self.textbox.insert(tk.INSERT, content)
-        self.apply_syntax_highlighting_async()
+    def start_loading(self, file_path):
+        # A reader thread queues the file in chunks and the event loop inserts one chunk per
+        # turn, so the window keeps responding while a large file streams in.
+        try:
+            large = os.path.getsize(file_path) >= LARGE_FILE_BYTES
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not open file: {e}")
+            return
+        self.cancel_validation()
+        self.set_large_file_mode(large)
+        with self.history.replaying():
+            self.textbox.delete("1.0", tk.END)
+        self.history.clear()
+        chunks = queue.Queue()
+        threading.Thread(target=self.load_file, args=(file_path, chunks), daemon=True).start()
+        self.root.after(1, self.insert_loaded_chunk, chunks)
+
+    def load_file(self, file_path, chunks):
+        self.resource_scope = None
+        try:
+            with open(file_path, 'r') as file:
+                while True:
+                    chunk = file.read(LOAD_CHUNK_CHARS)
+                    if not chunk:
+                        break
+                    chunks.put(chunk)
+        except (OSError, UnicodeDecodeError) as e:
+            chunks.put(e)
+        chunks.put(None)
+        # Still on the loader thread: index the file's project so resources defined in
+        # App.xaml and merged dictionaries resolve. Only changed files are rescanned.
+        project_root = find_project_root(file_path)
+        if project_root:
+            self.resource_scope = project_index(project_root).scope(file_path)
+
+    def insert_loaded_chunk(self, chunks):
+        try:
+            chunk = chunks.get_nowait()
+        except queue.Empty:
+            self.root.after(10, self.insert_loaded_chunk, chunks)
+            return
+        if isinstance(chunk, Exception):
+            messagebox.showerror("Error", f"Could not open file: {chunk}")
+            return
+        if chunk is None:
+            self.history.clear()
+            self.textbox.mark_set(tk.INSERT, "1.0")
+            self.textbox.see("1.0")
+            return
+        with self.history.replaying():
+            self.textbox.insert("end-1c", chunk)
+        self.root.after(1, self.insert_loaded_chunk, chunks)
 
     def save_file(self):
         file_path = filedialog.asksaveasfilename(defaultextension=".xaml", filetypes=[("XAML files", "*.xaml"), ("All files", "*.*")])
         if file_path:
-            threading.Thread(target=self.save_file_task, args=(file_path,)).start()
-
-    def save_file_task(self, file_path):
-        content = self.textbox.get("1.0", tk.END)
-        with open(file_path, 'w') as file:
-            file.write(content)
+            self.start_saving(file_path)
+
+    def start_saving(self, file_path):
+        # The event loop copies the buffer out SAVE_CHUNK_LINES lines per turn and a writer
+        # thread streams them to disk, so the whole text is never held as one string. The
+        # editor is read-only until the last block has been copied.
+        self.saving = True
+        self.textbox.configure(state=tk.DISABLED)
+        blocks = queue.Queue()
+        threading.Thread(target=self.save_file_task, args=(file_path, blocks)).start()
+        self.queue_save_block(blocks, 1)
+
+    def queue_save_block(self, blocks, line):
+        stop = line + SAVE_CHUNK_LINES
+        if self.textbox.compare(f"{stop}.0", ">=", tk.END):
+            blocks.put(self.textbox.get(f"{line}.0", tk.END))
+            blocks.put(None)
+            self.textbox.configure(state=tk.NORMAL)
+            self.saving = False
+            return
+        blocks.put(self.textbox.get(f"{line}.0", f"{stop}.0"))
+        self.root.after(1, self.queue_save_block, blocks, stop)
+
+    def save_file_task(self, file_path, blocks):
+        block = ""
+        try:
+            with open(file_path, 'w') as file:
+                while True:
+                    block = blocks.get()
+                    if block is None:
+                        break
+                    file.write(block)
+        except OSError as e:
+            while block is not None:
+                block = blocks.get()
+            self.root.after(0, messagebox.showerror, "Error", f"Could not save file: {e}")
 
 if __name__ == "__main__":
     root = tk.Tk()
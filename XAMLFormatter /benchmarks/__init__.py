@@ -0,0 +1,2 @@
+from .corpus import SHAPES, generate
+from .runner import compare, run_suite
@@ -0,0 +1,76 @@
+import argparse
+import json
+import sys
+
+from .corpus import SHAPES
+from .runner import DEFAULT_BASELINE_PATH, compare, load_baseline, run_suite, save_baseline
+
+EXIT_OK = 0
+EXIT_REGRESSION = 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="benchmarks", description="Time parsing, formatting, each validation rule and highlighting on synthetic XAML.")
+    parser.add_argument("--shape", action="append", choices=sorted(SHAPES), help="corpus shape to run; may be repeated (default: all)")
+    parser.add_argument("--elements", type=int, default=5000, help="approximate elements per generated document (default: 5000)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per benchmark; the fastest is kept (default: 3)")
+    parser.add_argument("--seed", type=int, default=0, help="corpus generator seed")
+    parser.add_argument("--only", action="append", metavar="TEXT", help="run only benchmarks whose name contains TEXT; may be repeated")
+    parser.add_argument("--no-tk", action="store_true", help="skip the Tk text widget highlighting benchmark")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="baseline results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown as a fraction of the baseline time (default: 0.25)")
+    parser.add_argument("--memory-threshold", type=float, help="allowed peak memory growth as a fraction (default: same as --threshold)")
+    parser.add_argument("--output-format", choices=("text", "json"), default="text")
+    return parser
+
+
+def format_ratio(ratio):
+    return "     -" if ratio is None else f"{(ratio - 1) * 100:+5.0f}%"
+
+
+def report_text(results, comparisons, stream):
+    by_id = {comparison["id"]: comparison for comparison in comparisons}
+    stream.write(f"{'benchmark':<48} {'ms':>9} {'KB/s':>10} {'elements/s':>12} {'peak MB':>8} {'time':>7} {'memory':>7}\n")
+    for result in results:
+        comparison = by_id.get(result["id"], {})
+        marker = "  REGRESSED" if comparison.get("regressed") else ""
+        stream.write(
+            f"{result['id']:<48} {result['seconds'] * 1000:9.2f} {result['kb_per_second'] or 0:10.0f} "
+            f"{result['elements_per_second'] or 0:12.0f} {result['peak_memory_bytes'] / 1024 / 1024:8.2f} "
+            f"{format_ratio(comparison.get('time_ratio')):>7} {format_ratio(comparison.get('memory_ratio')):>7}{marker}\n"
+        )
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    progress = None
+    if args.output_format == "text":
+        progress = lambda result: sys.stderr.write(f"  {result['id']}\n")
+    results = run_suite(args.shape, args.elements, args.repeat, args.seed, args.only, False if args.no_tk else None, progress)
+
+    if args.save_baseline:
+        save_baseline(results, args.baseline, args.elements, args.seed)
+        comparisons = []
+    else:
+        baseline = load_baseline(args.baseline)
+        if baseline is not None and (baseline["elements"], baseline["seed"]) != (args.elements, args.seed):
+            sys.stderr.write(f"Baseline was recorded with --elements {baseline['elements']} --seed {baseline['seed']}; not comparing.\n")
+            baseline = None
+        comparisons = compare(results, baseline, args.threshold, args.memory_threshold) if baseline else []
+
+    if args.output_format == "json":
+        json.dump({"results": results, "comparisons": comparisons}, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        report_text(results, comparisons, sys.stdout)
+        if args.save_baseline:
+            sys.stdout.write(f"Baseline saved to {args.baseline}\n")
+        elif not comparisons:
+            sys.stdout.write("No baseline to compare against; run with --save-baseline to record one.\n")
+
+    regressions = [comparison["id"] for comparison in comparisons if comparison["regressed"]]
+    if regressions:
+        sys.stdout.write(f"{len(regressions)} benchmark(s) regressed past the threshold: {', '.join(regressions)}\n")
+        return EXIT_REGRESSION
+    return EXIT_OK
@@ -0,0 +1,158 @@
+import random
+
+ROOT_NAMESPACES = (
+    'xmlns="http://schemas.microsoft.com/winfx/2006/xaml/presentation" '
+    'xmlns:x="http://schemas.microsoft.com/winfx/2006/xaml" '
+    'xmlns:d="http://schemas.microsoft.com/expression/blend/2008" '
+    'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" '
+    'xmlns:controls="using:CommunityToolkit.WinUI.UI.Controls" '
+    'xmlns:local="using:App" mc:Ignorable="d"'
+)
+
+PANELS = ("Grid", "StackPanel", "Border", "RelativePanel", "ScrollViewer")
+LEAVES = (
+    '<TextBlock Text="{x:Bind ViewModel.Title, Mode=OneWay}" Style="{StaticResource TitleStyle}" Margin="4" />',
+    '<Button Content="Save" Click="OnSave" Command="{Binding SaveCommand}" HorizontalAlignment="Right" />',
+    '<TextBox Text="{Binding Name, Mode=TwoWay, UpdateSourceTrigger=PropertyChanged}" PlaceholderText="Name" />',
+    '<FontIcon Glyph="&#xE713;" FontSize="16" Foreground="{ThemeResource AccentBrush}" />',
+    '<ProgressRing IsActive="{x:Bind ViewModel.IsBusy, Mode=OneWay}" Width="24" Height="24" />',
+    '<CheckBox Content="Enabled" IsChecked="{Binding IsEnabled, Mode=TwoWay}" ToolTipService.ToolTip="Toggle" />',
+)
+
+
+def count_elements(text):
+    # Start tags, close enough for throughput figures without parsing the text again.
+    return text.count("<") - text.count("</") - text.count("<!--") - text.count("<?")
+
+
+def deep_tree(elements, rng, max_depth=120):
+    # Nested panels down to max_depth, then back up, repeated until the element budget is spent.
+    lines = [f'<Page x:Class="App.DeepPage" {ROOT_NAMESPACES}>']
+    produced = 1
+    while produced < elements:
+        depth = min(max_depth, max(1, (elements - produced) // 2))
+        stack = []
+        for level in range(depth):
+            panel = rng.choice(PANELS)
+            attrs = f'Margin="{level % 8}" Padding="2"'
+            if panel == "Grid":
+                attrs += f' Grid.Row="{level % 3}"'
+            lines.append(f"{'  ' * (level + 1)}<{panel} {attrs}>")
+            stack.append(panel)
+            produced += 1
+        lines.append(f"{'  ' * (depth + 1)}{rng.choice(LEAVES)}")
+        produced += 1
+        for level in range(depth - 1, -1, -1):
+            lines.append(f"{'  ' * (level + 1)}</{stack.pop()}>")
+    lines.append("</Page>")
+    return "\n".join(lines) + "\n"
+
+
+def wide_resources(elements, rng):
+    # One flat ResourceDictionary with brushes, thicknesses and strings, plus references to them.
+    lines = [f"<ResourceDictionary {ROOT_NAMESPACES}>"]
+    lines.append('  <ResourceDictionary.MergedDictionaries><ResourceDictionary Source="ms-appx:///Styles/Colors.xaml" /></ResourceDictionary.MergedDictionaries>')
+    for i in range(max(1, elements - 3)):
+        kind = i % 4
+        if kind == 0:
+            lines.append(f'  <SolidColorBrush x:Key="Brush{i}" Color="#FF{rng.randrange(0x1000000):06X}" Opacity="0.{rng.randrange(10)}" />')
+        elif kind == 1:
+            lines.append(f'  <Thickness x:Key="Thickness{i}">{rng.randrange(16)},{rng.randrange(16)},0,0</Thickness>')
+        elif kind == 2:
+            lines.append(f'  <x:String x:Key="Text{i}">Resource string number {i}</x:String>')
+        else:
+            lines.append(f'  <LinearGradientBrush x:Key="Gradient{i}" StartPoint="0,0" EndPoint="{rng.randrange(2)},1" Opacity="{{StaticResource Opacity{i - 3}}}" />')
+    lines.append("</ResourceDictionary>")
+    return "\n".join(lines) + "\n"
+
+
+def data_templates(elements, rng):
+    # Item templates made almost entirely of bindings, converters and template bindings.
+    lines = [f'<Page x:Class="App.ListPage" {ROOT_NAMESPACES}>']
+    lines.append("  <Page.Resources>")
+    lines.append('    <local:BooleanToVisibilityConverter x:Key="BoolToVisibility" />')
+    lines.append('    <local:DateFormatConverter x:Key="DateFormat" />')
+    produced = 4
+    index = 0
+    templates = []
+    while produced < elements:
+        name = f"ItemTemplate{index}"
+        templates.append(name)
+        lines.append(f'    <DataTemplate x:Key="{name}" x:DataType="local:Item{index % 7}">')
+        lines.append('      <Grid ColumnSpacing="8" Padding="{StaticResource ItemPadding}">')
+        produced += 2
+        for field in range(rng.randrange(4, 12)):
+            binding = rng.choice((
+                f'{{x:Bind Field{field}, Mode=OneWay}}',
+                f'{{Binding Path=Field{field}, Converter={{StaticResource DateFormat}}, ConverterParameter=d}}',
+                f'{{Binding Items[{field}].Name, FallbackValue=None, TargetNullValue=-}}',
+                f'{{x:Bind local:Format.Money(Field{field}, Currency), Mode=OneWay}}',
+            ))
+            visibility = '{Binding IsVisible, Converter={StaticResource BoolToVisibility}}'
+            lines.append(f'        <TextBlock Grid.Column="{field % 4}" Text="{binding}" Visibility="{visibility}" />')
+            produced += 1
+        lines.append("      </Grid>")
+        lines.append("    </DataTemplate>")
+        index += 1
+    lines.append("  </Page.Resources>")
+    lines.append("  <StackPanel>")
+    for name in templates[:50]:
+        lines.append(f'    <ListView ItemsSource="{{x:Bind ViewModel.Items}}" ItemTemplate="{{StaticResource {name}}}" SelectionMode="Single" />')
+    lines.append("  </StackPanel>")
+    lines.append("</Page>")
+    return "\n".join(lines) + "\n"
+
+
+def styles(elements, rng):
+    # Styles with setters, BasedOn chains and control templates with visual states.
+    lines = [f"<ResourceDictionary {ROOT_NAMESPACES}>"]
+    produced = 1
+    index = 0
+    while produced < elements:
+        target = rng.choice(("Button", "TextBlock", "TextBox", "ComboBox", "ListViewItem", "ToggleButton"))
+        based_on = f' BasedOn="{{StaticResource Style{index - 1}}}"' if index and index % 3 else ""
+        lines.append(f'  <Style x:Key="Style{index}" TargetType="{target}"{based_on}>')
+        produced += 1
+        for setter in range(rng.randrange(3, 9)):
+            prop = rng.choice(("Margin", "Padding", "FontSize", "Foreground", "Background", "BorderThickness", "CornerRadius"))
+            value = rng.choice(("4", "8,4", "{ThemeResource TextFillColorPrimaryBrush}", "{StaticResource ControlCornerRadius}", "14"))
+            lines.append(f'    <Setter Property="{prop}" Value="{value}" />')
+            produced += 1
+        if index % 4 == 0:
+            lines.append('    <Setter Property="Template">')
+            lines.append("      <Setter.Value>")
+            lines.append(f'        <ControlTemplate TargetType="{target}">')
+            lines.append('          <Grid x:Name="RootGrid" Background="{TemplateBinding Background}">')
+            lines.append("            <VisualStateManager.VisualStateGroups>")
+            lines.append('              <VisualStateGroup x:Name="CommonStates">')
+            lines.append('                <VisualState x:Name="Normal" />')
+            lines.append('                <VisualState x:Name="PointerOver">')
+            lines.append("                  <Storyboard>")
+            lines.append('                    <DoubleAnimation Storyboard.TargetName="RootGrid" Storyboard.TargetProperty="Opacity" To="0.8" Duration="0:0:0.1" />')
+            lines.append("                  </Storyboard>")
+            lines.append("                </VisualState>")
+            lines.append("              </VisualStateGroup>")
+            lines.append("            </VisualStateManager.VisualStateGroups>")
+            lines.append('            <ContentPresenter x:Name="ContentPresenter" Content="{TemplateBinding Content}" Padding="{TemplateBinding Padding}" />')
+            lines.append("          </Grid>")
+            lines.append("        </ControlTemplate>")
+            lines.append("      </Setter.Value>")
+            lines.append("    </Setter>")
+            produced += 12
+        lines.append("  </Style>")
+        index += 1
+    lines.append("</ResourceDictionary>")
+    return "\n".join(lines) + "\n"
+
+
+SHAPES = {
+    "deep_tree": deep_tree,
+    "wide_resources": wide_resources,
+    "data_templates": data_templates,
+    "styles": styles,
+}
+
+
+def generate(shape, elements=5000, seed=0):
+    # Deterministic for a given shape, size and seed, so runs stay comparable with a stored baseline.
+    return SHAPES[shape](elements, random.Random(f"{shape}:{elements}:{seed}"))
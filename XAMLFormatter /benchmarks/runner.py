@@ -0,0 +1,196 @@
+import gc
+import io
+import json
+import os
+import platform
+import time
+import tracemalloc
+from xml.dom import minidom
+
+from xamlformatter import DEFAULT_RULES, XAMLValidator, parse_with_locations, pretty_print, stream_format
+from xamlformatter.formatting import remove_whitespace_nodes
+from xamlformatter.highlighting import HIGHLIGHT_TAGS, IncrementalHighlighter, spans_to_indices, tokenize
+
+from .corpus import SHAPES, count_elements, generate
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+BASELINE_VERSION = 1
+
+
+class Benchmark:
+    # setup() builds the input outside the timed region (a fresh one per repeat when
+    # fresh_input is set, for steps that mutate their input); run(input) is what gets timed.
+    def __init__(self, name, setup, run, fresh_input=False):
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.fresh_input = fresh_input
+
+
+def parsed_document(text):
+    document, source_map = parse_with_locations(text)
+    remove_whitespace_nodes(document)
+    return document, source_map
+
+
+def tk_highlight(text):
+    # Full highlight of a Text widget holding the document, driving the batches directly
+    # instead of waiting on the event loop.
+    import tkinter
+    root = tkinter.Tk()
+    root.withdraw()
+    try:
+        widget = tkinter.Text(root)
+        widget.insert("1.0", text)
+        for tag in HIGHLIGHT_TAGS:
+            widget.tag_configure(tag)
+        highlighter = IncrementalHighlighter(widget)
+        highlighter.invalidate_all()
+        highlighter.flush()
+        while highlighter._batch_id is not None:
+            widget.after_cancel(highlighter._batch_id)
+            highlighter._run_batch()
+    finally:
+        root.destroy()
+
+
+def tk_available():
+    try:
+        import tkinter
+        tkinter.Tk().destroy()
+    except Exception:
+        return False
+    return True
+
+
+def build_benchmarks(text, include_tk):
+    benchmarks = [
+        Benchmark("parse", lambda: text, minidom.parseString),
+        Benchmark("parse_locations", lambda: text, parse_with_locations),
+        Benchmark("pretty_print", lambda: minidom.parseString(text), pretty_print, fresh_input=True),
+        Benchmark("stream_format", lambda: text, lambda source: stream_format(source, io.StringIO())),
+    ]
+
+    def validate_with(rules):
+        validator = XAMLValidator(rules)
+        return lambda parsed: validator.validate(*parsed)
+
+    shared = {}
+
+    def document():
+        # Rules only read the tree, so one parse is shared by every rule benchmark.
+        if "document" not in shared:
+            shared["document"] = parsed_document(text)
+        return shared["document"]
+
+    benchmarks.append(Benchmark("validate", document, validate_with(None)))
+    for rule in DEFAULT_RULES:
+        benchmarks.append(Benchmark(f"rule:{rule.name}", document, validate_with([rule])))
+
+    benchmarks.append(Benchmark("highlight_tokenize", lambda: text, lambda source: spans_to_indices(source, tokenize(source)[0], 1, 0)))
+    if include_tk:
+        benchmarks.append(Benchmark("highlight_tk", lambda: text, tk_highlight))
+    return benchmarks
+
+
+def measure(benchmark, repeat):
+    # Best-of-N wall time, then one more run under tracemalloc for peak memory, kept
+    # separate because tracing slows allocation-heavy code down several times over.
+    argument = benchmark.setup()
+    benchmark.run(argument)  # Warm-up: fills memo tables and loads the catalog.
+    best = None
+    for _ in range(repeat):
+        if benchmark.fresh_input:
+            argument = benchmark.setup()
+        gc.collect()
+        start = time.perf_counter()
+        benchmark.run(argument)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    if benchmark.fresh_input:
+        argument = benchmark.setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        benchmark.run(argument)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def run_suite(shapes=None, elements=5000, repeat=3, seed=0, only=None, include_tk=None, progress=None):
+    if include_tk is None:
+        include_tk = tk_available()
+    results = []
+    for shape in shapes or SHAPES:
+        text = generate(shape, elements, seed)
+        size = len(text.encode("utf-8"))
+        element_count = count_elements(text)
+        for benchmark in build_benchmarks(text, include_tk):
+            if only and not any(pattern in benchmark.name for pattern in only):
+                continue
+            seconds, peak = measure(benchmark, repeat)
+            result = {
+                "id": f"{shape}/{benchmark.name}",
+                "shape": shape,
+                "benchmark": benchmark.name,
+                "bytes": size,
+                "elements": element_count,
+                "seconds": seconds,
+                "kb_per_second": size / 1024 / seconds if seconds else None,
+                "elements_per_second": element_count / seconds if seconds else None,
+                "peak_memory_bytes": peak
+            }
+            results.append(result)
+            if progress:
+                progress(result)
+    return results
+
+
+def environment():
+    return {"python": platform.python_version(), "implementation": platform.python_implementation(), "machine": platform.machine(), "system": platform.system()}
+
+
+def save_baseline(results, path, elements, seed):
+    data = {
+        "version": BASELINE_VERSION,
+        "elements": elements,
+        "seed": seed,
+        "environment": environment(),
+        "results": {result["id"]: {"seconds": result["seconds"], "peak_memory_bytes": result["peak_memory_bytes"]} for result in results}
+    }
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(data, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+
+def load_baseline(path):
+    try:
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+    except FileNotFoundError:
+        return None
+    if data.get("version") != BASELINE_VERSION:
+        return None
+    return data
+
+
+def compare(results, baseline, threshold, memory_threshold=None):
+    # Ratio of each result to its baseline entry; a benchmark regresses when its time (or
+    # peak memory) grows by more than the threshold fraction. Benchmarks missing from the
+    # baseline are reported but never fail a run.
+    memory_threshold = threshold if memory_threshold is None else memory_threshold
+    comparisons = []
+    for result in results:
+        entry = baseline["results"].get(result["id"])
+        if entry is None:
+            comparisons.append({"id": result["id"], "time_ratio": None, "memory_ratio": None, "regressed": False})
+            continue
+        time_ratio = result["seconds"] / entry["seconds"] if entry["seconds"] else None
+        memory_ratio = result["peak_memory_bytes"] / entry["peak_memory_bytes"] if entry["peak_memory_bytes"] else None
+        regressed = (time_ratio is not None and time_ratio > 1 + threshold) or \
+            (memory_ratio is not None and memory_ratio > 1 + memory_threshold)
+        comparisons.append({"id": result["id"], "time_ratio": time_ratio, "memory_ratio": memory_ratio, "regressed": regressed})
+    return comparisons
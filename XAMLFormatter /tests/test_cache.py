@@ -0,0 +1,49 @@
+import os
+
+from xamlformatter.cache import ResultCache, cache_key
+from xamlformatter.diagnostics import Diagnostic
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", "A", [])
+    cache.put("b", "B", [])
+    assert cache.get("a") == ("A", [])
+    cache.put("c", "C", [])
+    assert cache.get("b") is None
+    assert cache.get("a") == ("A", [])
+    assert cache.get("c") == ("C", [])
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_disk_entries_outlive_the_memory_cache(tmp_path):
+    key = cache_key("<Grid />", 1)
+    ResultCache(directory=str(tmp_path)).put(key, "<Grid />\n", [Diagnostic("Unknown element: <Grid>", "unknown_elements", line=1, column=1)])
+    formatted, errors = ResultCache(directory=str(tmp_path)).get(key)
+    assert formatted == "<Grid />\n"
+    assert [(error.message, error.line) for error in errors] == [("Unknown element: <Grid>", 1)]
+
+
+def entry_path(directory, key):
+    return os.path.join(directory, key[:2], f"{key}.json")
+
+
+def test_disk_cache_evicts_oldest_entries_past_its_size(tmp_path):
+    directory = str(tmp_path)
+    keys = [cache_key(f"<Page{i} />") for i in range(3)]
+    probe = ResultCache(directory=str(tmp_path / "probe"))
+    probe.put(keys[0], "x" * 100, [])
+    size = os.path.getsize(entry_path(probe.directory, keys[0]))
+
+    cache = ResultCache(directory=directory, max_disk_bytes=int(size * 2.5))
+    cache.put(keys[0], "x" * 100, [])
+    cache.put(keys[1], "x" * 100, [])
+    os.utime(entry_path(directory, keys[0]), (1000, 1000))
+    os.utime(entry_path(directory, keys[1]), (2000, 2000))
+    # Reading an entry back from disk makes it the most recently used.
+    assert ResultCache(directory=directory).get(keys[0]) is not None
+    cache.put(keys[2], "x" * 100, [])
+
+    assert os.path.exists(entry_path(directory, keys[0]))
+    assert not os.path.exists(entry_path(directory, keys[1]))
+    assert os.path.exists(entry_path(directory, keys[2]))
@@ -0,0 +1,59 @@
+import re
+
+from xamlformatter.cli import main
+
+PRESENTATION = "http://schemas.microsoft.com/winfx/2006/xaml/presentation"
+ONE_LINE = f'<Page xmlns="{PRESENTATION}"><StackPanel><TextBlock Text="{{StaticResource Missing}}" /></StackPanel></Page>'
+
+
+def error_lines(output):
+    return sorted(line for line in output.splitlines() if re.match(r"page\.xaml:\d", line))
+
+
+def test_unwritten_format_reports_positions_in_the_file_on_disk(tmp_path, capsys, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "page.xaml").write_text(ONE_LINE, encoding="utf-8")
+    assert main(["check", "-j", "1", "page.xaml"]) == 1
+    checked = error_lines(capsys.readouterr().out)
+    assert checked and all(line.startswith("page.xaml:1:") for line in checked)
+    for options in (["--check"], ["--diff"], ["--diff", "--lines", "1:1"]):
+        main(["format", "-j", "1", *options, "page.xaml"])
+        captured = capsys.readouterr()
+        assert error_lines(captured.out + captured.err) == checked
+    assert (tmp_path / "page.xaml").read_text(encoding="utf-8") == ONE_LINE
+
+
+def test_written_format_reports_positions_in_the_formatted_file(tmp_path, capsys, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "page.xaml").write_text(ONE_LINE, encoding="utf-8")
+    main(["format", "-j", "1", "page.xaml"])
+    formatted = error_lines(capsys.readouterr().out)
+    main(["check", "-j", "1", "page.xaml"])
+    assert formatted and error_lines(capsys.readouterr().out) == formatted
+
+
+def test_bad_catalog_is_a_one_line_error(tmp_path, capsys):
+    (tmp_path / "page.xaml").write_text(ONE_LINE, encoding="utf-8")
+    (tmp_path / "broken.json").write_text("{not json", encoding="utf-8")
+    for catalog in (tmp_path / "missing.json", tmp_path / "broken.json"):
+        assert main(["check", "-j", "1", "--catalog", str(catalog), str(tmp_path / "page.xaml")]) == 2
+        err = capsys.readouterr().err
+        assert err.count("\n") == 1 and str(catalog) in err
+
+
+def test_missing_paths_are_named(tmp_path, capsys):
+    (tmp_path / "page.xaml").write_text(ONE_LINE, encoding="utf-8")
+    missing = [str(tmp_path / "gone.xaml"), str(tmp_path / "gone")]
+    assert main(["check", "-j", "1", str(tmp_path / "page.xaml"), *missing]) == 2
+    assert capsys.readouterr().err.splitlines() == [f"xamlformatter: error: {path}: no such file or directory" for path in missing]
+
+
+def test_diff_exits_with_1_when_files_would_change(tmp_path, capsys):
+    page = tmp_path / "page.xaml"
+    page.write_text(f'<Page xmlns="{PRESENTATION}"><Grid Background="Red" /></Page>', encoding="utf-8")
+    assert main(["format", "-j", "1", "--diff", str(page)]) == 1
+    assert capsys.readouterr().out.startswith("--- a/")
+    main(["format", "-j", "1", str(page)])
+    capsys.readouterr()
+    assert main(["format", "-j", "1", "--diff", str(page)]) == 0
+    assert capsys.readouterr().out == ""
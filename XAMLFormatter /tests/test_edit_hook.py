@@ -0,0 +1,39 @@
+import tkinter
+
+from XAMLFormatter import TEXT_PROXY_PROC
+
+# Stands in for a Text widget's command: enough of index/compare/get/cget for the proxy.
+FAKE_TEXT = """
+set state normal
+proc fake_text {args} {
+    global state
+    switch -- [lindex $args 0] {
+        cget {return $state}
+        index {return 1.0}
+        compare {return 0}
+        get {return "x"}
+    }
+    return ""
+}
+"""
+
+
+def run_proxy(state, *commands):
+    tcl = tkinter.Tcl()
+    tcl.eval(TEXT_PROXY_PROC)
+    tcl.eval(FAKE_TEXT)
+    tcl.eval(f"set state {state}")
+    calls = []
+    tcl.createcommand("on_edit", lambda *args: calls.append(args))
+    for command in commands:
+        tcl.eval(f"xamlformatter_text_proxy fake_text on_edit {command}")
+    return calls
+
+
+def test_edits_are_reported():
+    assert run_proxy("normal", "insert 1.0 abc", "delete 1.0 1.1") == [("insert", "1.0", "1.0", "abc"), ("delete", "1.0", "1.0", "x")]
+
+
+def test_edits_to_a_disabled_widget_are_not_reported():
+    # Tk ignores them, so recording them would put history out of step with the buffer.
+    assert run_proxy("disabled", "insert 1.0 abc", "delete 1.0 1.1", "replace 1.0 1.1 y") == []
@@ -0,0 +1,84 @@
+import io
+
+import pytest
+
+from xamlformatter.edits import TextEdit, apply_edits, diff_edits, edit_positions, merge_edits
+from xamlformatter.locations import LineIndex
+from xamlformatter.server import Document, LanguageServer
+
+OLD = '<Grid>\n<Button Content="a"/>\n    <TextBlock Text="😀 b"/>\n</Grid>\n'
+NEW = '<Grid>\n  <Button Content="a" />\n  <TextBlock Text="😀 b" />\n</Grid>\n'
+
+
+@pytest.mark.parametrize("old, new", [
+    (OLD, NEW),
+    (NEW, OLD),
+    ("", "<Grid />\n"),
+    ("<Grid />", ""),
+    ("<Grid><Button/></Grid>", "<Grid>\n  <Button />\n</Grid>\n"),
+    ("a\nb\nc\n", "a\nc\nd\ne\n"),
+    ("<A>\n<B/>\n<C/>\n</A>\n" * 50, "<A>\n  <B />\n  <C />\n</A>\n" * 50),
+])
+def test_diff_edits_round_trip(old, new):
+    edits = diff_edits(old, new)
+    assert apply_edits(old, edits) == new
+    assert all(a.end <= b.start for a, b in zip(edits, edits[1:]))
+    assert apply_edits(old, merge_edits(old, edits)) == new
+
+
+def test_each_changed_run_of_a_line_is_its_own_edit():
+    old = '<Grid>\n<Button Content="a"/>\n</Grid>\n'
+    new = '<Grid>\n  <Button Content="a" />\n</Grid>\n'
+    assert diff_edits(old, new) == [TextEdit(7, 7, "  "), TextEdit(26, 26, " ")]
+
+
+def test_diff_edits_base_offsets_into_a_larger_text():
+    text = "<Page>\n<Grid/>\n</Page>\n"
+    edits = diff_edits("<Grid/>\n", "  <Grid />\n", base=7)
+    assert apply_edits(text, edits) == "<Page>\n  <Grid />\n</Page>\n"
+
+
+def test_edit_positions_count_characters():
+    edits = diff_edits(OLD, NEW)
+    positions = edit_positions(OLD, edits)
+    assert positions[-1] == (3, 25, 3, 25, " ")
+    lines = LineIndex(OLD)
+    assert edit_positions(OLD, edits, lines) == positions
+
+
+def utf16_offset(text, position):
+    # What a client counting UTF-16 code units makes of an LSP position.
+    line_start = 0
+    for _ in range(position["line"]):
+        line_start = text.index("\n", line_start) + 1
+    prefix = text[line_start:].encode("utf-16-le")[:position["character"] * 2].decode("utf-16-le")
+    return line_start + len(prefix)
+
+
+def apply_client_edits(text, edits):
+    for edit in sorted(edits, key=lambda edit: (edit["range"]["start"]["line"], edit["range"]["start"]["character"]), reverse=True):
+        start = utf16_offset(text, edit["range"]["start"])
+        end = utf16_offset(text, edit["range"]["end"])
+        text = text[:start] + edit["newText"] + text[end:]
+    return text
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_lsp_edits_round_trip_with_utf16_positions(tmp_path, newline):
+    server = LanguageServer(io.StringIO(), io.StringIO(), cache_dir=str(tmp_path))
+    document = Document("file:///page.xaml", OLD.replace("\n", newline), 1)
+    source = document.source()
+    edits = diff_edits(source, NEW)
+    lsp_edits = server.text_edits(document, edits, LineIndex(source))
+    # The astral character before the last edit takes two UTF-16 code units, one more than
+    # its character column.
+    assert lsp_edits[-1]["range"]["start"] == {"line": 2, "character": 26}
+    assert apply_client_edits(document.text, lsp_edits) == NEW.replace("\n", newline)
+
+
+def test_from_client_inverts_to_client():
+    document = Document("file:///page.xaml", OLD.replace("\n", "\r\n"), 1)
+    for offset in range(len(document.source())):
+        line, column = LineIndex(document.source()).position(offset)
+        position = document.to_client(line, column, utf16=True)
+        assert utf16_offset(document.text, position) == document.from_client(position, utf16=True)
@@ -0,0 +1,34 @@
+import io
+from xml.dom import minidom
+
+import pytest
+
+from xamlformatter.formatting import pretty_print, remove_whitespace_nodes, stream_format
+
+PRESENTATION = "http://schemas.microsoft.com/winfx/2006/xaml/presentation"
+
+
+def format_dom(xaml):
+    document = minidom.parseString(xaml)
+    remove_whitespace_nodes(document)
+    return pretty_print(document)
+
+
+def format_stream(xaml):
+    output = io.StringIO()
+    stream_format(xaml, output)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize("format_xaml", [format_dom, format_stream])
+@pytest.mark.parametrize("reference, value", [("&#x0a;", "\n"), ("&#x0d;", "\r"), ("&#x09;", "\t"), ("&quot;", '"')])
+def test_attribute_character_references_round_trip(format_xaml, reference, value):
+    xaml = f'<TextBlock xmlns="{PRESENTATION}" Text="Line1{reference}Line2" />'
+    formatted = format_xaml(xaml)
+    assert minidom.parseString(formatted).documentElement.getAttribute("Text") == f"Line1{value}Line2"
+    assert format_xaml(formatted) == formatted
+
+
+def test_streaming_matches_dom_formatting_for_escaped_attributes():
+    xaml = f'<TextBlock xmlns="{PRESENTATION}" Text="a&#10;b&#9;c&#13;d &amp; &lt;e&gt;" />'
+    assert format_stream(xaml) == format_dom(xaml)
@@ -0,0 +1,79 @@
+from xamlformatter.history import EDIT_OVERHEAD_BYTES, EditHistory
+
+
+def summary(edits):
+    return [(edit.kind, edit.start, edit.text) for edit in edits]
+
+
+def test_typing_is_grouped_until_the_timeout():
+    history = EditHistory(group_timeout=1.0)
+    history.record("insert", "1.0", "1.1", "a", now=0.0)
+    history.record("insert", "1.1", "1.2", "b", now=0.5)
+    history.record("insert", "1.2", "1.3", "c", now=2.0)
+    assert summary(history.undo()) == [("delete", "1.2", "c")]
+    assert summary(history.undo()) == [("delete", "1.0", "ab")]
+    assert not history.can_undo()
+
+
+def test_newline_and_seal_end_a_group():
+    history = EditHistory()
+    history.record("insert", "1.0", "2.0", "a\n", now=0.0)
+    history.record("insert", "2.0", "2.1", "b", now=0.1)
+    history.seal()
+    history.record("insert", "2.1", "2.2", "c", now=0.2)
+    assert summary(history.undo()) == [("delete", "2.1", "c")]
+    assert summary(history.undo()) == [("delete", "2.0", "b")]
+    assert summary(history.undo()) == [("delete", "1.0", "a\n")]
+
+
+def test_backspace_and_forward_delete_are_grouped():
+    history = EditHistory()
+    history.record("delete", "1.2", "1.3", "c", now=0.0)
+    history.record("delete", "1.1", "1.2", "b", now=0.1)
+    assert summary(history.undo()) == [("insert", "1.1", "bc")]
+    history.record("delete", "1.0", "1.1", "x", now=5.0)
+    history.record("delete", "1.0", "1.1", "y", now=5.1)
+    assert summary(history.undo()) == [("insert", "1.0", "xy")]
+
+
+def test_undo_and_redo_order():
+    history = EditHistory()
+    history.record("delete", "1.0", "1.3", "old", now=0.0)
+    history.record("insert", "1.0", "1.3", "new", now=0.1)
+    # Typing over a selection undoes as one step, the insert first.
+    assert summary(history.undo()) == [("delete", "1.0", "new"), ("insert", "1.0", "old")]
+    assert summary(history.redo()) == [("delete", "1.0", "old"), ("insert", "1.0", "new")]
+    assert not history.can_redo()
+    history.undo()
+    history.record("insert", "1.0", "1.1", "z", now=1.0)
+    assert not history.can_redo()
+
+
+def test_compound_records_one_group():
+    history = EditHistory()
+    history.record("insert", "1.0", "1.1", "a", now=0.0)
+    with history.compound():
+        history.record("delete", "3.0", "3.2", "  ", now=0.1)
+        history.record("insert", "1.0", "1.4", "    ", now=0.2)
+    history.record("insert", "1.5", "1.6", "b", now=0.3)
+    assert summary(history.undo()) == [("delete", "1.5", "b")]
+    assert summary(history.undo()) == [("delete", "1.0", "    "), ("insert", "3.0", "  ")]
+    assert summary(history.undo()) == [("delete", "1.0", "a")]
+
+
+def test_replayed_edits_are_not_recorded():
+    history = EditHistory()
+    history.record("insert", "1.0", "1.1", "a", now=0.0)
+    with history.replaying():
+        history.record("insert", "1.0", "1.1", "b", now=0.1)
+    assert summary(history.undo()) == [("delete", "1.0", "a")]
+    assert not history.can_undo()
+
+
+def test_oldest_groups_are_dropped_past_max_bytes():
+    history = EditHistory(max_bytes=3 * (10 + EDIT_OVERHEAD_BYTES))
+    for i in range(5):
+        history.record("insert", f"{i + 1}.0", f"{i + 1}.10", "x" * 10, now=i * 10.0)
+    assert history.size == 3 * (10 + EDIT_OVERHEAD_BYTES)
+    assert [history.undo()[0].start for _ in range(3)] == ["5.0", "4.0", "3.0"]
+    assert not history.can_undo()
@@ -0,0 +1,51 @@
+import pytest
+
+from xamlformatter.markup import MarkupExtension, MarkupSyntaxError, parse_markup
+
+
+@pytest.mark.parametrize("value", ["Hello", "", "{}{0:N2}", "{} {literal}"])
+def test_literal_values_are_not_extensions(value):
+    assert parse_markup(value) is None
+
+
+def test_nested_extensions():
+    markup = parse_markup("{Binding Path=Width, RelativeSource={RelativeSource Mode=FindAncestor, AncestorType={x:Type Grid}}}")
+    assert markup.name == "Binding"
+    source = dict(markup.named)["RelativeSource"]
+    assert isinstance(source, MarkupExtension)
+    assert source.name == "RelativeSource"
+    assert dict(source.named)["AncestorType"].positional == ("Grid",)
+
+
+def test_positional_and_named_arguments():
+    markup = parse_markup("{x:Bind Format(A, B), Mode=OneWay}")
+    assert markup.positional == ("Format(A, B)",)
+    assert markup.named == (("Mode", "OneWay"),)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("{Binding ConverterParameter='a, b'}", "a, b"),
+    ('{Binding ConverterParameter="x=}"}', "x=}"),
+    ("{Binding ConverterParameter=a\\,b}", "a,b"),
+    ("{Binding ConverterParameter=a\\}b}", "a}b"),
+])
+def test_quoting_and_escapes(value, expected):
+    assert dict(parse_markup(value).named)["ConverterParameter"] == expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("{Binding Path=Name, StringFormat={}{0:N2}}", "{0:N2}"),
+    ("{Binding StringFormat={}{0} of {1}, Path=Count}", "{0} of {1}"),
+])
+def test_escaped_braces_in_a_named_value_are_text(value, expected):
+    assert dict(parse_markup(value).named)["StringFormat"] == expected
+
+
+@pytest.mark.parametrize("value", ["{Binding ,}", "{Binding Path,,Mode=OneWay}", "{Binding Path,}"])
+def test_empty_arguments_are_syntax_errors(value):
+    assert isinstance(parse_markup(value), MarkupSyntaxError)
+
+
+@pytest.mark.parametrize("value", ["{Binding", "{ Path=A}", "{Binding ConverterParameter='a}"])
+def test_malformed_extensions_are_syntax_errors(value):
+    assert isinstance(parse_markup(value), MarkupSyntaxError)
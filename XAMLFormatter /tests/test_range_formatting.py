@@ -0,0 +1,52 @@
+from xml.parsers import expat
+
+from xamlformatter import pipeline
+from xamlformatter.cli import main
+from xamlformatter.edits import apply_edits
+from xamlformatter.locations import parse_with_locations
+from xamlformatter.pipeline import format_range_edits, format_xaml_range, line_range_offsets
+
+PRESENTATION = "http://schemas.microsoft.com/winfx/2006/xaml/presentation"
+# An empty element right before its parent's end tag.
+NESTED_EMPTY = f'<Grid xmlns="{PRESENTATION}">\n  <StackPanel>\n    <Button    Content="a"/></StackPanel>\n</Grid>\n'
+
+
+def test_empty_element_extent_stops_at_its_own_end():
+    document, source_map = parse_with_locations(NESTED_EMPTY)
+    button = document.getElementsByTagName("Button")[0]
+    start, end = source_map.element_extent(button)
+    assert NESTED_EMPTY[start:end] == '<Button    Content="a"/>'
+    panel = document.getElementsByTagName("StackPanel")[0]
+    start, end = source_map.element_extent(panel)
+    assert NESTED_EMPTY[start:end].endswith('"a"/></StackPanel>')
+
+
+def test_range_formatting_empty_element_before_parent_end():
+    offset = NESTED_EMPTY.index("Button")
+    start, end, replacement = format_xaml_range(NESTED_EMPTY, offset, offset)
+    assert replacement == '    <Button Content="a" />'
+    # Line 3 ends inside the StackPanel's end tag, so the StackPanel is what encloses it.
+    edits = format_range_edits(NESTED_EMPTY, *line_range_offsets(NESTED_EMPTY, 3, 3))
+    expected = NESTED_EMPTY.replace('<Button    Content="a"/></StackPanel>', '<Button Content="a" />\n  </StackPanel>')
+    assert apply_edits(NESTED_EMPTY, edits) == expected
+
+
+def test_cli_lines_diff_empty_element_before_parent_end(tmp_path, capsys):
+    path = tmp_path / "page.xaml"
+    path.write_text(NESTED_EMPTY, encoding="utf-8")
+    assert main(["format", "--diff", "--lines", "3:3", "-j", "1", str(path)]) == 1
+    out = capsys.readouterr().out
+    assert '-    <Button    Content="a"/></StackPanel>' in out
+    assert '+    <Button Content="a" />\n+  </StackPanel>\n' in out
+    assert path.read_text(encoding="utf-8") == NESTED_EMPTY
+
+
+def test_cli_lines_unformattable_element_is_a_file_failure(tmp_path, capsys, monkeypatch):
+    def broken_fragment(fragment, indent="  ", depth=0):
+        raise expat.ExpatError("not well-formed")
+
+    monkeypatch.setattr(pipeline, "format_fragment", broken_fragment)
+    path = tmp_path / "page.xaml"
+    path.write_text(NESTED_EMPTY, encoding="utf-8")
+    assert main(["format", "--lines", "3:3", "-j", "1", str(path)]) == 2
+    assert "failed: Cannot format the element at line 2" in capsys.readouterr().out
@@ -0,0 +1,111 @@
+from xamlformatter.resources import ResourceIndex
+
+NAMESPACES = 'xmlns="http://schemas.microsoft.com/winfx/2006/xaml/presentation" xmlns:x="http://schemas.microsoft.com/winfx/2006/xaml"'
+
+APP = f"""<Application {NAMESPACES}>
+  <Application.Resources>
+    <ResourceDictionary>
+      <ResourceDictionary.MergedDictionaries>
+        <ResourceDictionary Source="ms-appx:///Styles/Colors.xaml" />
+      </ResourceDictionary.MergedDictionaries>
+      <x:Double x:Key="AppSpacing">8</x:Double>
+    </ResourceDictionary>
+  </Application.Resources>
+</Application>
+"""
+
+COLORS = f"""<ResourceDictionary {NAMESPACES}>
+  <SolidColorBrush x:Key="AccentBrush" Color="Red" />
+  <Style TargetType="Button" />
+</ResourceDictionary>
+"""
+
+LOCAL = f"""<ResourceDictionary {NAMESPACES}>
+  <SolidColorBrush x:Key="LocalBrush" Color="Blue" />
+</ResourceDictionary>
+"""
+
+PAGE = f"""<Page {NAMESPACES}>
+  <Page.Resources>
+    <ResourceDictionary>
+      <ResourceDictionary.MergedDictionaries>
+        <ResourceDictionary Source="Local.xaml" />
+      </ResourceDictionary.MergedDictionaries>
+      <x:String x:Key="PageTitle">Home</x:String>
+    </ResourceDictionary>
+  </Page.Resources>
+</Page>
+"""
+
+OTHER = f"""<Page {NAMESPACES}>
+  <Grid />
+</Page>
+"""
+
+
+def make_project(tmp_path):
+    root = tmp_path / "App"
+    for rel, text in [("App.xaml", APP), ("Styles/Colors.xaml", COLORS), ("Views/Local.xaml", LOCAL),
+                      ("Views/Page.xaml", PAGE), ("Views/Other.xaml", OTHER)]:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+    return root
+
+
+def new_index(tmp_path, root):
+    return ResourceIndex(str(root), cache_dir=str(tmp_path / "cache")).load()
+
+
+def test_update_reports_only_files_whose_resources_changed(tmp_path):
+    root = make_project(tmp_path)
+    index = new_index(tmp_path, root)
+    assert sorted(index.update()) == ["App.xaml", "Styles/Colors.xaml", "Views/Local.xaml", "Views/Other.xaml", "Views/Page.xaml"]
+    assert index.update() == []
+
+    # Moving a definition updates where it is found without reporting a change.
+    (root / "Views/Local.xaml").write_text("\n" + LOCAL, encoding="utf-8")
+    assert index.update() == []
+    assert index.find("LocalBrush") == [("Views/Local.xaml", 3, 2)]
+
+    (root / "Views/Local.xaml").write_text(LOCAL.replace("LocalBrush", "OtherBrush"), encoding="utf-8")
+    assert index.update([str(root / "Views/Local.xaml")]) == ["Views/Local.xaml"]
+    assert index.find("LocalBrush") == []
+
+    (root / "Views/Other.xaml").unlink()
+    assert index.update() == ["Views/Other.xaml"]
+    assert "Views/Other.xaml" not in index.files
+
+
+def test_index_is_reused_between_runs(tmp_path):
+    root = make_project(tmp_path)
+    index = new_index(tmp_path, root)
+    index.update()
+    index.save()
+    reloaded = new_index(tmp_path, root)
+    assert reloaded.update() == []
+    assert reloaded.find("AccentBrush") == [("Styles/Colors.xaml", 2, 2)]
+    assert reloaded.find_style("Button") == [("Styles/Colors.xaml", 3, 2)]
+
+
+def test_scope_holds_application_and_merged_resources(tmp_path):
+    root = make_project(tmp_path)
+    index = new_index(tmp_path, root)
+    index.update()
+    page = index.scope(str(root / "Views/Page.xaml"))
+    assert {"AppSpacing", "AccentBrush", "LocalBrush"} <= set(page.definitions)
+    assert "PageTitle" not in page  # The file's own keys come from the text being validated.
+    assert page.lookup("LocalBrush") == ("Views/Local.xaml", 2, 2)
+    other = index.scope(str(root / "Views/Other.xaml"))
+    assert "AccentBrush" in other and "LocalBrush" not in other
+    assert other.version != page.version
+
+
+def test_dependents(tmp_path):
+    root = make_project(tmp_path)
+    index = new_index(tmp_path, root)
+    index.update()
+    assert index.dependents(["Views/Local.xaml"]) == ["Views/Page.xaml"]
+    assert index.dependents(["Views/Other.xaml"]) == []
+    assert sorted(index.dependents(["Styles/Colors.xaml"])) == sorted(index.files)
+    assert index.dependents([]) == []
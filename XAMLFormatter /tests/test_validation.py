@@ -0,0 +1,50 @@
+from xamlformatter.pipeline import validate_xaml_text
+from xamlformatter.validation import XAMLValidator
+
+APP_XAML = """<Application
+    x:Class="App.App"
+    xmlns="http://schemas.microsoft.com/winfx/2006/xaml/presentation"
+    xmlns:x="http://schemas.microsoft.com/winfx/2006/xaml"
+    RequestedTheme="Dark">
+  <Application.Resources>
+    <ResourceDictionary>
+      <ResourceDictionary.MergedDictionaries>
+        <XamlControlsResources xmlns="using:Microsoft.UI.Xaml.Controls" />
+      </ResourceDictionary.MergedDictionaries>
+      <SolidColorBrush x:Key="AccentBrush" Color="#FF0078D4" />
+      <Style x:Key="PageTitleStyle" TargetType="TextBlock" BasedOn="{StaticResource TitleTextBlockStyle}">
+        <Setter Property="Foreground" Value="{StaticResource AccentBrush}" />
+      </Style>
+    </ResourceDictionary>
+  </Application.Resources>
+</Application>
+"""
+
+
+def test_minimal_app_xaml_validates_clean():
+    assert validate_xaml_text(APP_XAML, XAMLValidator()) == []
+
+
+def test_common_presentation_types_are_known():
+    xaml = """<Page
+    xmlns="http://schemas.microsoft.com/winfx/2006/xaml/presentation"
+    xmlns:x="http://schemas.microsoft.com/winfx/2006/xaml">
+  <Page.Resources>
+    <DataTemplateSelector x:Key="Selector" />
+    <CollectionViewSource x:Key="Groups" IsSourceGrouped="True" />
+    <Style x:Key="ItemStyle" TargetType="ListViewItem">
+      <Setter Property="Template">
+        <Setter.Value>
+          <ControlTemplate TargetType="ListViewItem">
+            <ListViewItemPresenter SelectedBackground="Red" ContentMargin="4" />
+          </ControlTemplate>
+        </Setter.Value>
+      </Setter>
+    </Style>
+  </Page.Resources>
+  <Grid>
+    <TitleBar Title="App" IsBackButtonVisible="True" />
+  </Grid>
+</Page>
+"""
+    assert [error.message for error in validate_xaml_text(xaml, XAMLValidator()) if "Unknown" in error.message] == []
@@ -0,0 +1,136 @@
+import re
+from xml.dom import minidom
+
+from xamlformatter.profiling import Profile
+from xamlformatter.validation import (
+    DEFAULT_RULES, AnimationStoryboardErrorsRule, ControlTemplatePartErrorsRule, DataTemplateErrorsRule,
+    EventHandlerErrorsRule, MissingTagsRule, VisualTreeErrorsRule, XAMLValidator,
+)
+
+SAMPLE = """<Page
+    xmlns="http://schemas.microsoft.com/winfx/2006/xaml/presentation"
+    xmlns:x="http://schemas.microsoft.com/winfx/2006/xaml">
+  <Page.Resources>
+    <Storyboard x:Key="Fade">
+      <DoubleAnimation To="0" />
+      <DoubleAnimation Storyboard.TargetProperty="Opacity" To="1" />
+    </Storyboard>
+    <DataTemplate x:Key="Empty"></DataTemplate>
+    <ControlTemplate x:Key="Chrome" TargetType="Button">
+      <Border x:Name="Root"><ContentPresenter /></Border>
+      <Rectangle Fill="Red" />
+    </ControlTemplate>
+    <Style TargetType="Button" BasedOn="{StaticResource Missing}" />
+    <Style TargetType="Button" />
+  </Page.Resources>
+  <StackPanel>
+    <Button Click="On Click" Content="{Binding Path=, Mode=OneWay}" />
+    <Button Click="OnClick" Content="{TemplateBinding Tag}" />
+    <TextBlock />
+    <VisualTree></VisualTree>
+    <Grid Background="{StaticResource AccentBrush}" />
+  </StackPanel>
+</Page>
+"""
+
+
+# The per-rule walks the validator replaced, for the rules whose reports did not change.
+def check_for_missing_tags(xml_node):
+    errors = []
+    for node in xml_node.getElementsByTagName("*"):
+        if not node.hasChildNodes() and not node.hasAttributes():
+            errors.append(f"Element <{node.tagName}> is empty and might be missing child elements or attributes.")
+    return errors
+
+
+def check_for_event_handler_errors(xml_node):
+    errors = []
+    event_pattern = re.compile(r'^[A-Za-z_]\w*$')
+    for node in xml_node.getElementsByTagName("*"):
+        for attr_name in node.attributes.keys():
+            if 'Click' in attr_name or 'Handler' in attr_name:
+                handler_name = node.attributes[attr_name].value
+                if not event_pattern.match(handler_name):
+                    errors.append(f"Invalid event handler name '{handler_name}' in attribute {attr_name} of element <{node.tagName}>")
+    return errors
+
+
+def check_for_visual_tree_errors(xml_node):
+    errors = []
+    for node in xml_node.getElementsByTagName("*"):
+        if node.tagName == "VisualTree" and not node.hasChildNodes():
+            errors.append(f"VisualTree element <{node.tagName}> is empty")
+    return errors
+
+
+def check_for_datatemplate_errors(xml_node):
+    errors = []
+    for node in xml_node.getElementsByTagName("DataTemplate"):
+        if not node.hasChildNodes():
+            errors.append(f"DataTemplate element <{node.tagName}> is empty")
+    return errors
+
+
+def check_for_animation_storyboard_errors(xml_node):
+    errors = []
+    for node in xml_node.getElementsByTagName("Storyboard"):
+        for child in node.childNodes:
+            if child.nodeType == minidom.Node.ELEMENT_NODE and 'TargetProperty' not in child.attributes:
+                errors.append(f"Animation <{child.tagName}> in Storyboard missing 'TargetProperty' attribute")
+    return errors
+
+
+def check_for_control_template_part_errors(xml_node):
+    errors = []
+    for node in xml_node.getElementsByTagName("*"):
+        if "ControlTemplate" in node.tagName:
+            for child in node.childNodes:
+                if child.nodeType == minidom.Node.ELEMENT_NODE and 'x:Name' not in child.attributes:
+                    errors.append(f"ControlTemplate part <{child.tagName}> missing 'x:Name' attribute in element <{node.tagName}>")
+    return errors
+
+
+UNCHANGED_RULES = [
+    (MissingTagsRule, check_for_missing_tags),
+    (EventHandlerErrorsRule, check_for_event_handler_errors),
+    (VisualTreeErrorsRule, check_for_visual_tree_errors),
+    (DataTemplateErrorsRule, check_for_datatemplate_errors),
+    (AnimationStoryboardErrorsRule, check_for_animation_storyboard_errors),
+    (ControlTemplatePartErrorsRule, check_for_control_template_part_errors),
+]
+
+
+def parse(xaml):
+    return minidom.parseString(xaml)
+
+
+def messages(errors):
+    return [error.message for error in errors]
+
+
+def test_single_walk_matches_the_old_per_rule_walks():
+    document = parse(SAMPLE)
+    errors = XAMLValidator([rule for rule, _ in UNCHANGED_RULES]).validate(document)
+    expected = []
+    for _, check in UNCHANGED_RULES:
+        expected.extend(check(document))
+    assert expected
+    assert messages(errors) == expected
+
+
+def test_single_walk_matches_one_walk_per_rule():
+    document = parse(SAMPLE)
+    expected = []
+    for rule in DEFAULT_RULES:
+        expected.extend((error.rule, error.message) for error in XAMLValidator([rule]).validate(document))
+    errors = XAMLValidator().validate(document)
+    assert [(error.rule, error.message) for error in errors] == expected
+    assert {error.rule for error in errors} >= {"binding_errors", "style_conflicts", "template_binding_errors"}
+
+
+def test_profiled_walk_reports_the_same_errors():
+    document = parse(SAMPLE)
+    plain = XAMLValidator().validate(document)
+    profile = Profile()
+    profiled = XAMLValidator().validate(document, profile=profile, progress=lambda stage, fraction: None, total_elements=20)
+    assert messages(profiled) == messages(plain)
@@ -0,0 +1,9 @@
+from .validation import XAMLValidator, ValidationRule, DEFAULT_RULES
+from .formatting import pretty_print, stream_format
+from .pipeline import format_xaml_text, validate_xaml_text
+from .cache import ResultCache
+from .markup import MarkupExtension, parse_markup
+from .diagnostics import Diagnostic
+from .locations import SourceMap, parse_with_locations
+from .profiling import Profile
+from .resources import ResourceIndex, ResourceScope, find_project_root
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from .diagnostics import Diagnostic
+
+
+def cache_key(text, *parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    # Maps a content hash to (formatted_text, diagnostics). Entries live in an in-memory LRU and,
+    # when a directory is given, in one JSON file per key that is evicted oldest-first once
+    # the directory grows past max_disk_bytes.
+    def __init__(self, max_entries=128, directory=None, max_disk_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = None
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], list(entry[1])
+        entry = self._read_disk(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._remember(key, entry)
+        return entry[0], list(entry[1])
+
+    def put(self, key, formatted, errors):
+        entry = (formatted, tuple(errors))
+        self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _read_disk(self, key):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as file:
+                data = json.load(file)
+            entry = data["formatted"], tuple(Diagnostic.from_dict(error) for error in data["errors"])
+            os.utime(path)  # Eviction is least-recently-used by mtime.
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return entry
+
+    def _write_disk(self, key, entry):
+        if not self.directory:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(path))
+            try:
+                with open(fd, "w", encoding="utf-8") as file:
+                    json.dump({"formatted": entry[0], "errors": [error.to_dict() for error in entry[1]]}, file)
+                os.replace(temp_path, path)
+            except OSError:
+                os.remove(temp_path)
+                raise
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        if self._disk_bytes is None:
+            self._disk_bytes = self._scan_disk_bytes()
+        else:
+            self._disk_bytes += size
+        if self._disk_bytes > self.max_disk_bytes:
+            self._evict_disk()
+
+    def _disk_files(self):
+        files = []
+        for dir_path, dir_names, file_names in os.walk(self.directory):
+            for file_name in file_names:
+                if file_name.endswith(".json"):
+                    path = os.path.join(dir_path, file_name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _scan_disk_bytes(self):
+        return sum(size for _, size, _ in self._disk_files())
+
+    def _evict_disk(self):
+        # Other processes may share the directory, so the size is recomputed from disk here.
+        files = sorted(self._disk_files())
+        total = sum(size for _, size, _ in files)
+        target = self.max_disk_bytes * 0.9
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        self._disk_bytes = total
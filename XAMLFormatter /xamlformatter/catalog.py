@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+
+PRESENTATION_NAMESPACE = "http://schemas.microsoft.com/winfx/2006/xaml/presentation"
+XAML_NAMESPACE = "http://schemas.microsoft.com/winfx/2006/xaml"
+XML_NAMESPACE = "http://www.w3.org/XML/1998/namespace"
+XMLNS_NAMESPACE = "http://www.w3.org/2000/xmlns/"
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "winui3_catalog.json")
+
+# Bump when the compiled layout changes, so stale binary caches are rebuilt.
+CATALOG_FORMAT_VERSION = 2
+
+_loaded = {}
+
+
+class Catalog:
+    # Compiled element/property metadata. Types map (namespace, name) to
+    # (abstract, members), where members already include every inherited property and event.
+    def __init__(self, types, attached, directives, ignored_namespaces, key="", resource_keys=frozenset()):
+        self.types = types
+        self.attached = attached
+        self.directives = directives
+        self.ignored_namespaces = ignored_namespaces
+        self.resource_keys = resource_keys  # Keys the framework itself provides, such as BodyTextBlockStyle.
+        self.namespaces = frozenset(namespace for namespace, _ in types) | frozenset(namespace for namespace, _ in attached)
+        self.key = key
+
+    def describes(self, namespace):
+        # Types in namespaces the catalog knows nothing about (a project's own local:
+        # controls, say) cannot be checked, so they are not reported as unknown.
+        return namespace in self.namespaces
+
+    def is_ignored(self, namespace):
+        return namespace in self.ignored_namespaces
+
+    def lookup(self, namespace, name):
+        return self.types.get((namespace, name))
+
+    def has_member(self, namespace, owner, member):
+        entry = self.types.get((namespace, owner))
+        if entry is not None and member in entry[1]:
+            return True
+        attached = self.attached.get((namespace, owner))
+        return attached is not None and member in attached
+
+    def is_owner(self, namespace, owner):
+        return (namespace, owner) in self.types or (namespace, owner) in self.attached
+
+
+def catalog_sources(extra_paths=()):
+    return (DEFAULT_CATALOG_PATH,) + tuple(os.path.abspath(path) for path in extra_paths)
+
+
+def catalog_key(extra_paths=()):
+    # Derived from file metadata only, so checking whether the binary cache is current costs a few stat calls.
+    digest = hashlib.sha256(str(CATALOG_FORMAT_VERSION).encode())
+    for path in catalog_sources(extra_paths):
+        stat = os.stat(path)
+        digest.update(f"{path}\0{stat.st_mtime_ns}\0{stat.st_size}\0".encode("utf-8"))
+    return digest.hexdigest()[:24]
+
+
+def user_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "xamlformatter")
+
+
+class CatalogError(Exception):
+    pass
+
+
+def read_catalog_file(path):
+    # The parsed JSON of a catalog file; CatalogError, with a one-line message, when it is
+    # missing, unreadable or not a JSON object.
+    try:
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+    except OSError as e:
+        raise CatalogError(f"{path}: cannot read catalog: {e.strerror or e}")
+    except ValueError as e:
+        raise CatalogError(f"{path}: invalid catalog JSON: {e}")
+    if not isinstance(data, dict):
+        raise CatalogError(f"{path}: invalid catalog: expected a JSON object")
+    return data
+
+
+def merge_sources(paths):
+    namespaces = {}
+    ignored = set()
+    resource_keys = set()
+    for path in paths:
+        data = read_catalog_file(path)
+        ignored.update(data.get("ignored_namespaces", ()))
+        resource_keys.update(data.get("resource_keys", ()))
+        for namespace, content in data.get("namespaces", {}).items():
+            target = namespaces.setdefault(namespace, {"types": {}, "attached": {}, "directives": []})
+            target["types"].update(content.get("types", {}))
+            for owner, members in content.get("attached", {}).items():
+                target["attached"].setdefault(owner, []).extend(members)
+            target["directives"].extend(content.get("directives", ()))
+    return namespaces, ignored, resource_keys
+
+
+def compile_catalog(paths, key=""):
+    namespaces, ignored, resource_keys = merge_sources(paths)
+    resolved = {}
+
+    def resolve(namespace, name, seen=()):
+        if (namespace, name) in resolved:
+            return resolved[(namespace, name)]
+        definition = namespaces.get(namespace, {}).get("types", {}).get(name)
+        if definition is None and namespace != PRESENTATION_NAMESPACE:
+            # Types in other namespaces usually derive from WinUI base classes.
+            return resolve(PRESENTATION_NAMESPACE, name, seen)
+        if definition is None or (namespace, name) in seen:
+            return None
+        members = set(definition.get("properties", ())) | set(definition.get("events", ()))
+        base = definition.get("base")
+        if base:
+            inherited = resolve(namespace, base, seen + ((namespace, name),))
+            if inherited is not None:
+                members |= inherited[1]
+        entry = (bool(definition.get("abstract", False)), frozenset(sys.intern(member) for member in members))
+        resolved[(namespace, name)] = entry
+        return entry
+
+    types = {}
+    attached = {}
+    directives = set()
+    for namespace, content in namespaces.items():
+        namespace = sys.intern(namespace)
+        for name in content["types"]:
+            types[(namespace, sys.intern(name))] = resolve(namespace, name)
+        for owner, members in content["attached"].items():
+            attached[(namespace, sys.intern(owner))] = frozenset(sys.intern(member) for member in members)
+        if namespace == XAML_NAMESPACE:
+            directives.update(sys.intern(directive) for directive in content["directives"])
+    return Catalog(types, attached, frozenset(directives), frozenset(ignored), key, frozenset(sys.intern(key) for key in resource_keys))
+
+
+def load_catalog(extra_paths=()):
+    # Loads the compiled catalog from the binary cache when it matches the JSON sources,
+    # compiling and storing it otherwise. Results are kept for the life of the process.
+    extra_paths = tuple(extra_paths)
+    catalog = _loaded.get(extra_paths)
+    if catalog is not None:
+        return catalog
+
+    key = catalog_key(extra_paths)
+    cache_path = os.path.join(user_cache_dir(), f"catalog-{key}.pickle")
+    try:
+        with open(cache_path, "rb") as file:
+            catalog = pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        catalog = compile_catalog(catalog_sources(extra_paths), key)
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(cache_path))
+            with open(fd, "wb") as file:
+                pickle.dump(catalog, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, cache_path)
+        except OSError:
+            pass
+    _loaded[extra_paths] = catalog
+    return catalog
@@ -0,0 +1,292 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from .catalog import CatalogError, read_catalog_file
+from .files import find_xaml_files
+from .pipeline import process_file
+from .profiling import Profile
+from .resources import find_project_root, project_index
+
+EXIT_OK = 0
+EXIT_ISSUES = 1
+EXIT_FAILURE = 2
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+
+
+def line_range(value):
+    # "START:END" (1-based, inclusive) for --lines; a single number is one line.
+    first, _, last = value.partition(":")
+    try:
+        first = int(first)
+        last = int(last) if last else first
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected START:END, got {value!r}")
+    if first < 1 or last < first:
+        raise argparse.ArgumentTypeError(f"invalid line range {value!r}")
+    return first, last
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="xamlformatter", description="Format and validate WinUI3 XAML files without the GUI.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_common_arguments(subparser):
+        subparser.add_argument("paths", nargs="+", help="XAML files or directories to search for *.xaml files")
+        subparser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="number of worker processes (default: all cores)")
+        subparser.add_argument("--output-format", choices=("text", "json", "sarif"), default="text", help="report format written to stdout")
+        subparser.add_argument("--cache-dir", help="reuse results for unchanged content from this directory")
+        subparser.add_argument("--cache-size", type=int, default=64, help="maximum size of the cache directory in MB (default: 64)")
+        subparser.add_argument("--catalog", action="append", default=[], metavar="PATH", help="extra type catalog (JSON) for custom namespaces; may be repeated")
+        subparser.add_argument("--profile", metavar="PATH", help="write per-stage and per-rule timings (JSON) to PATH")
+        subparser.add_argument("--project", metavar="DIR", help="resolve resource keys across this project (default: the nearest "
+                               "directory with a .csproj, .sln or App.xaml above each file)")
+
+    check_parser = subparsers.add_parser("check", help="validate XAML files")
+    add_common_arguments(check_parser)
+
+    format_parser = subparsers.add_parser("format", help="format XAML files in place and validate them")
+    add_common_arguments(format_parser)
+    format_parser.add_argument("--check", action="store_true", help="do not write files; exit with 1 if any file would be reformatted")
+    format_parser.add_argument("--indent", type=int, default=2, help="spaces per indentation level")
+    format_parser.add_argument("--stream", action="store_true", help="format with bounded memory for very large files; skips rule validation")
+    format_parser.add_argument("--diff", action="store_true", help="do not write files; print the changes as a unified diff instead and "
+                               "exit with 1 if there are any")
+    format_parser.add_argument("--lines", type=line_range, metavar="START:END", help="format only the elements enclosing these lines "
+                               "(1-based, inclusive) of a single file")
+
+    watch_parser = subparsers.add_parser("watch", help="check (or format) XAML files again whenever they change")
+    watch_parser.add_argument("paths", nargs="+", help="XAML files or directories to watch")
+    watch_parser.add_argument("--format", action="store_true", help="reformat changed files in place before checking them")
+    watch_parser.add_argument("--indent", type=int, default=2, help="spaces per indentation level")
+    watch_parser.add_argument("--output-format", choices=("text", "json"), default="text", help="text lines, or one JSON object per file and batch")
+    watch_parser.add_argument("--cache-dir", help="reuse results for unchanged content from this directory")
+    watch_parser.add_argument("--cache-size", type=int, default=64, help="maximum size of the cache directory in MB (default: 64)")
+    watch_parser.add_argument("--catalog", action="append", default=[], metavar="PATH", help="extra type catalog (JSON) for custom namespaces; may be repeated")
+    watch_parser.add_argument("--project", metavar="DIR", help="resolve resource keys across this project (default: detected per file)")
+    watch_parser.add_argument("--debounce", type=float, default=0.2, help="seconds without further changes before a batch is processed (default: 0.2)")
+    watch_parser.add_argument("--interval", type=float, default=0.5, help="seconds between scans when polling (default: 0.5)")
+    watch_parser.add_argument("--poll", action="store_true", help="poll the file system even if watchdog is installed")
+    watch_parser.add_argument("--no-initial", action="store_true", help="do not check every file once at startup")
+
+    serve_parser = subparsers.add_parser("serve", help="run a language server on stdin/stdout for editors and tools")
+    serve_parser.add_argument("--cache-dir", help="reuse results for unchanged content from this directory")
+    serve_parser.add_argument("--cache-size", type=int, default=64, help="maximum size of the cache directory in MB (default: 64)")
+    serve_parser.add_argument("--catalog", action="append", default=[], metavar="PATH", help="extra type catalog (JSON) for custom namespaces; may be repeated")
+    return parser
+
+
+def run_jobs(paths, worker, jobs, project_roots):
+    if jobs <= 1 or len(paths) <= 1:
+        return [worker(path, root) for path, root in zip(paths, project_roots)]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        chunksize = max(1, len(paths) // (jobs * 4))
+        return list(executor.map(worker, paths, project_roots, chunksize=chunksize))
+
+
+def process_in_project(path, project_root, **options):
+    return process_file(path, project_root=project_root, **options)
+
+
+def index_projects(paths, project=None):
+    # Project root for each path, with every project's resource index brought up to date
+    # (and saved) here, once, before the workers read it.
+    roots_by_directory = {}
+    roots = []
+    for path in paths:
+        if project:
+            root = os.path.abspath(project)
+        else:
+            directory = os.path.dirname(os.path.abspath(path))
+            if directory not in roots_by_directory:
+                roots_by_directory[directory] = find_project_root(directory)
+            root = roots_by_directory[directory]
+        roots.append(root)
+    for root in set(roots) - {None}:
+        project_index(root)
+    return roots
+
+
+def write_result_text(result, command, stream):
+    if result["failure"]:
+        stream.write(f"{result['path']}: failed: {result['failure']}\n")
+    if result["changed"]:
+        stream.write(f"{result['path']}: {'would reformat' if command == 'check' else 'reformatted'}\n")
+    for error in result["errors"]:
+        # "path:line:column: message", the form editors and CI logs turn into links.
+        stream.write(f"{result['path']}:{error}\n" if error.located else f"{result['path']}: {error}\n")
+
+
+def report_text(results, command, stream):
+    # With --diff the patches alone go to stream, so it can be piped to git apply or patch;
+    # diagnostics and the summary go to stderr.
+    messages = sys.stderr if any("diff" in result for result in results) else stream
+    for result in results:
+        if "diff" in result:
+            stream.write(result["diff"])
+        write_result_text(result, command, messages)
+    summary = summarize(results)
+    messages.write(f"{summary['files']} file(s), {summary['errors']} error(s), {summary['changed']} reformatted, {summary['failures']} failure(s)\n")
+
+
+def report_json(results, command, stream):
+    files = [dict(result, errors=[error.to_dict() for error in result["errors"]]) for result in results]
+    json.dump({"command": command, "files": files, "summary": summarize(results)}, stream, indent=2)
+    stream.write("\n")
+
+
+def report_sarif(results, command, stream):
+    sarif_results = []
+    for result in results:
+        artifact = {"artifactLocation": {"uri": result["path"].replace(os.sep, "/")}}
+        for error in result["errors"]:
+            location = dict(artifact)
+            if error.located:
+                # SARIF columns are 1-based.
+                location["region"] = {
+                    "startLine": error.line,
+                    "startColumn": error.column + 1,
+                    "endLine": error.end_line,
+                    "endColumn": error.end_column + 1
+                }
+            sarif_result = {"level": "error", "message": {"text": error.message}, "locations": [{"physicalLocation": location}]}
+            if error.rule:
+                sarif_result["ruleId"] = error.rule
+            sarif_results.append(sarif_result)
+        if result["failure"]:
+            sarif_results.append({
+                "level": "error",
+                "message": {"text": f"Failed: {result['failure']}"},
+                "locations": [{"physicalLocation": artifact}]
+            })
+    sarif = {
+        "$schema": SARIF_SCHEMA,
+        "version": "2.1.0",
+        "runs": [{"tool": {"driver": {"name": "XAMLFormatter"}}, "results": sarif_results}]
+    }
+    json.dump(sarif, stream, indent=2)
+    stream.write("\n")
+
+
+REPORTERS = {"text": report_text, "json": report_json, "sarif": report_sarif}
+
+
+def write_profile(results, path):
+    # Totals across all files, plus each file's own stages so the slowest files stand out.
+    total = Profile()
+    files = {}
+    for result in results:
+        stages = result.pop("profile", {})
+        total.merge(stages)
+        files[result["path"]] = stages
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"stages": total.to_dict(), "files": files}, file, indent=2)
+        file.write("\n")
+
+
+def watch(args):
+    # Diagnostics are written and flushed per file as each completes, so editors and
+    # terminals see them without waiting for the rest of the batch.
+    from .watch import WatchSession
+
+    command = "format" if args.format else "check"
+
+    def emit(result):
+        if args.output_format == "json":
+            json.dump(dict(result, errors=[error.to_dict() for error in result["errors"]]), sys.stdout)
+            sys.stdout.write("\n")
+        else:
+            write_result_text(result, command, sys.stdout)
+        sys.stdout.flush()
+
+    def batch_done(results, seconds):
+        summary = summarize(results)
+        if args.output_format == "json":
+            json.dump({"batch": summary, "seconds": seconds}, sys.stdout)
+            sys.stdout.write("\n")
+        else:
+            sys.stdout.write(f"[{time.strftime('%H:%M:%S')}] {summary['files']} file(s), {summary['errors']} error(s), "
+                             f"{summary['changed']} reformatted, {summary['failures']} failure(s) in {seconds * 1000:.0f} ms\n")
+        sys.stdout.flush()
+
+    session = WatchSession(args.paths, emit, batch_done, project=args.project, debounce=args.debounce, interval=args.interval,
+                           polling=args.poll, mode=command, indent=" " * args.indent, cache_dir=args.cache_dir,
+                           cache_size=args.cache_size * 1024 * 1024, catalog_paths=tuple(args.catalog))
+    session.run(initial=not args.no_initial)
+    return EXIT_OK
+
+
+def summarize(results):
+    return {
+        "files": len(results),
+        "errors": sum(len(result["errors"]) for result in results),
+        "changed": sum(1 for result in results if result["changed"]),
+        "failures": sum(1 for result in results if result["failure"])
+    }
+
+
+def check_catalogs(paths):
+    # Catalogs are read in every worker; a bad one is reported once, here, before any work starts.
+    for path in paths:
+        try:
+            read_catalog_file(path)
+        except CatalogError as e:
+            sys.stderr.write(f"xamlformatter: error: {e}\n")
+            return False
+    return True
+
+
+def check_paths(paths):
+    # Every path that matches nothing is named, rather than the run reporting zero files.
+    missing = [path for path in paths if not os.path.exists(path)]
+    for path in missing:
+        sys.stderr.write(f"xamlformatter: error: {path}: no such file or directory\n")
+    return not missing
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not check_catalogs(args.catalog):
+        return EXIT_FAILURE
+    # The server and the watcher are imported only when used, so check and format runs
+    # (and their worker processes) do not load them.
+    if args.command == "serve":
+        from .server import serve
+        return serve(tuple(args.catalog), args.cache_dir, args.cache_size * 1024 * 1024)
+    if args.command == "watch":
+        return watch(args)
+    if not check_paths(args.paths):
+        return EXIT_FAILURE
+    paths = find_xaml_files(args.paths)
+    common_options = {"cache_dir": args.cache_dir, "cache_size": args.cache_size * 1024 * 1024, "catalog_paths": tuple(args.catalog), "profile": bool(args.profile)}
+    if args.command == "format":
+        if args.lines and (len(paths) != 1 or args.stream):
+            parser.error("--lines needs exactly one file and cannot be combined with --stream")
+        if args.diff and args.stream:
+            parser.error("--diff cannot be combined with --stream")
+        worker = partial(process_in_project, mode="format", write=not (args.check or args.diff), indent=" " * args.indent,
+                         stream=args.stream, lines=args.lines, diff=args.diff, **common_options)
+        command = "check" if args.check or args.diff else "format"
+    else:
+        worker = partial(process_in_project, mode="check", **common_options)
+        command = "check"
+
+    # Streaming skips validation, so it has no use for resource indexes.
+    project_roots = [None] * len(paths) if getattr(args, "stream", False) else index_projects(paths, args.project)
+    results = run_jobs(paths, worker, args.jobs, project_roots)
+    if args.profile:
+        write_profile(results, args.profile)
+    REPORTERS[args.output_format](results, command, sys.stdout)
+
+    summary = summarize(results)
+    if summary["failures"] or not paths:
+        return EXIT_FAILURE
+    if summary["errors"] or (args.command == "format" and (args.check or args.diff) and summary["changed"]):
+        return EXIT_ISSUES
+    return EXIT_OK
@@ -0,0 +1,72 @@
+class Diagnostic:
+    # One validation error. Lines are 1-based and columns 0-based, matching Tk text indices;
+    # the end position is exclusive. Rules may leave the position empty and name the node
+    # (and attribute) instead, which the validator resolves against the parse's SourceMap.
+    __slots__ = ("message", "rule", "line", "column", "end_line", "end_column", "node", "attribute")
+
+    def __init__(self, message, rule=None, line=None, column=None, end_line=None, end_column=None, node=None, attribute=None):
+        self.message = message
+        self.rule = rule
+        self.line = line
+        self.column = column
+        self.end_line = end_line
+        self.end_column = end_column
+        self.node = node
+        self.attribute = attribute
+
+    @property
+    def located(self):
+        return self.line is not None
+
+    def start_index(self):
+        return f"{self.line}.{self.column}"
+
+    def end_index(self):
+        return f"{self.end_line}.{self.end_column}"
+
+    def to_dict(self):
+        return {
+            "message": self.message,
+            "rule": self.rule,
+            "line": self.line,
+            "column": self.column,
+            "end_line": self.end_line,
+            "end_column": self.end_column
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["message"], data.get("rule"), data.get("line"), data.get("column"), data.get("end_line"), data.get("end_column"))
+
+    def __str__(self):
+        if self.located:
+            return f"{self.line}:{self.column + 1}: {self.message}"
+        return self.message
+
+    def __repr__(self):
+        return f"Diagnostic({self.message!r}, {self.rule!r}, {self.line!r}, {self.column!r}, {self.end_line!r}, {self.end_column!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, Diagnostic):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __hash__(self):
+        return hash((self.message, self.line, self.column))
+
+    def __getstate__(self):
+        # Nodes are resolved to positions before diagnostics leave the validator.
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        for name in self.__slots__:
+            setattr(self, name, state.get(name))
+
+
+def syntax_error(error):
+    # Diagnostic for a parser exception; expat errors carry the failing line and column.
+    line = getattr(error, "lineno", None)
+    column = getattr(error, "offset", None)
+    if line is None or column is None:
+        return Diagnostic(f"Syntax error: {error}", "syntax")
+    return Diagnostic(f"Syntax error: {error}", "syntax", line, column, line, column + 1)
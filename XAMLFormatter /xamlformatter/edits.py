@@ -0,0 +1,141 @@
+import difflib
+import os
+
+from .locations import LineIndex
+
+
+class TextEdit:
+    # Replace old[start:end] with text. Offsets refer to the text the edit was computed
+    # against, before any edit of the same list has been applied.
+    __slots__ = ("start", "end", "text")
+
+    def __init__(self, start, end, text):
+        self.start = start
+        self.end = end
+        self.text = text
+
+    def __repr__(self):
+        return f"TextEdit({self.start}, {self.end}, {self.text!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, TextEdit) and (self.start, self.end, self.text) == (other.start, other.end, other.text)
+
+
+def common_prefix_length(a, b):
+    return len(os.path.commonprefix([a, b]))
+
+
+def common_suffix_length(a, b, limit):
+    # Characters a and b share at their ends, at most limit.
+    length = 0
+    while length < limit and a[-1 - length] == b[-1 - length]:
+        length += 1
+    return length
+
+
+# Lines longer than this are narrowed to their common prefix and suffix only: matching
+# characters costs up to the product of the two lengths.
+MAX_CHARACTER_DIFF_LENGTH = 2000
+
+
+def changed_runs(start, removed, inserted, line_pair):
+    # Edits turning removed (at offset start) into inserted. A line changed in two places,
+    # such as a re-indent plus "/>" becoming " />", gives one edit per place.
+    prefix = common_prefix_length(removed, inserted)
+    suffix = common_suffix_length(removed, inserted, min(len(removed), len(inserted)) - prefix)
+    old_middle = removed[prefix:len(removed) - suffix]
+    new_middle = inserted[prefix:len(inserted) - suffix]
+    start += prefix
+    if not line_pair or not old_middle or not new_middle or max(len(old_middle), len(new_middle)) > MAX_CHARACTER_DIFF_LENGTH:
+        return [TextEdit(start, start + len(old_middle), new_middle)]
+    # The usual case, text added or removed at both ends of what is left (a re-indent plus
+    # " />"), is found without a matcher.
+    if old_middle in new_middle:
+        at = new_middle.index(old_middle)
+        return [TextEdit(start, start, new_middle[:at]), TextEdit(start + len(old_middle), start + len(old_middle), new_middle[at + len(old_middle):])]
+    if new_middle in old_middle:
+        at = old_middle.index(new_middle)
+        return [TextEdit(start, start + at, ""), TextEdit(start + at + len(new_middle), start + len(old_middle), "")]
+    matcher = difflib.SequenceMatcher(None, old_middle, new_middle, autojunk=False)
+    return [TextEdit(start + i1, start + i2, new_middle[j1:j2])
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal"]
+
+
+def diff_edits(old, new, base=0):
+    # The edits that turn old into new, in order, with offsets shifted by base (where old
+    # sits in a larger text). Lines left alone by formatting are matched and skipped, and
+    # each changed line is narrowed to the characters that differ, so re-indenting a line
+    # is an edit of its leading whitespace only.
+    if old == new:
+        return []
+    all_old_lines = old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    # Unchanged lines at either end are dropped before matching: the matcher's cost grows
+    # with what is left, which after a local change is just the changed area.
+    head = 0
+    while head < len(old_lines) and head < len(new_lines) and old_lines[head] == new_lines[head]:
+        head += 1
+    tail = 0
+    while tail < len(old_lines) - head and tail < len(new_lines) - head and old_lines[-1 - tail] == new_lines[-1 - tail]:
+        tail += 1
+    old_lines = old_lines[head:len(old_lines) - tail]
+    new_lines = new_lines[head:len(new_lines) - tail]
+
+    starts = [base + sum(map(len, all_old_lines[:head]))]
+    for line in old_lines:
+        starts.append(starts[-1] + len(line))
+    edits = []
+    # With autojunk, lines as common as "</StackPanel>" do not seed matches; the unique
+    # lines around them do. The edits stay correct and matching stays close to linear.
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        if i2 - i1 == j2 - j1:
+            # Line for line, as when only indentation changed: narrow edits per line.
+            for i, j in zip(range(i1, i2), range(j1, j2)):
+                edits.extend(changed_runs(starts[i], old_lines[i], new_lines[j], line_pair=True))
+        else:
+            edits.extend(changed_runs(starts[i1], "".join(old_lines[i1:i2]), "".join(new_lines[j1:j2]), line_pair=False))
+    return edits
+
+
+def apply_edits(text, edits):
+    # edits must be in order and not overlap, as diff_edits returns them.
+    parts = []
+    position = 0
+    for edit in edits:
+        parts.append(text[position:edit.start])
+        parts.append(edit.text)
+        position = edit.end
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+def merge_edits(text, edits):
+    # A single edit with the same effect as edits, for callers to whom applying many small
+    # edits costs more than one large one.
+    if len(edits) < 2:
+        return list(edits)
+    start, end = edits[0].start, edits[-1].end
+    shifted = [TextEdit(edit.start - start, edit.end - start, edit.text) for edit in edits]
+    return [TextEdit(start, end, apply_edits(text[start:end], shifted))]
+
+
+def edit_positions(text, edits, lines=None):
+    # (start_line, start_column, end_line, end_column, text) for each edit: 1-based lines
+    # and character columns in text, as a Tk index or Diagnostic counts them. lines is
+    # text's LineIndex, when the caller already has one.
+    lines = lines or LineIndex(text)
+    return [lines.position(edit.start) + lines.position(edit.end) + (edit.text,) for edit in edits]
+
+
+def unified_diff(path, old, new, context=3):
+    # The change as a patch against path, or "" when there is none.
+    name = path.replace(os.sep, "/").lstrip("/")
+    lines = []
+    for line in difflib.unified_diff(old.splitlines(keepends=True), new.splitlines(keepends=True), f"a/{name}", f"b/{name}", n=context):
+        lines.append(line)
+        if not line.endswith("\n"):
+            lines.append("\n\\ No newline at end of file\n")
+    return "".join(lines)
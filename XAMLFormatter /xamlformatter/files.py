@@ -0,0 +1,32 @@
+import codecs
+import os
+
+EXCLUDED_DIRECTORIES = {"bin", "obj", "node_modules"}
+
+
+def find_xaml_files(paths):
+    found = []
+    for path in paths:
+        if os.path.isfile(path):
+            found.append(path)
+            continue
+        for dir_path, dir_names, file_names in os.walk(path):
+            dir_names[:] = sorted(d for d in dir_names if not d.startswith(".") and d.lower() not in EXCLUDED_DIRECTORIES)
+            for file_name in sorted(file_names):
+                if file_name.lower().endswith(".xaml"):
+                    found.append(os.path.join(dir_path, file_name))
+    return found
+
+
+def read_xaml_file(path):
+    with open(path, "rb") as file:
+        raw = file.read()
+    has_bom = raw.startswith(codecs.BOM_UTF8)
+    text = raw.decode("utf-8-sig")
+    newline = "\r\n" if "\r\n" in text else "\n"
+    return text.replace("\r\n", "\n"), has_bom, newline
+
+
+def write_xaml_file(path, text, has_bom=False, newline="\n"):
+    with open(path, "w", encoding="utf-8-sig" if has_bom else "utf-8", newline=newline) as file:
+        file.write(text)
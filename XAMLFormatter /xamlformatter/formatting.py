@@ -0,0 +1,200 @@
+import io
+from xml.dom import minidom
+from xml.parsers import expat
+from xml.sax.saxutils import escape
+
+# Besides the quote, line breaks and tabs must stay character references: attribute-value
+# normalization would turn them into spaces if they were written out literally.
+ATTRIBUTE_ENTITIES = {'"': "&quot;", "\n": "&#10;", "\r": "&#13;", "\t": "&#9;"}
+
+# Bump when the formatter's output changes, so cached results are not reused.
+FORMATTER_VERSION = 2
+
+
+def remove_whitespace_nodes(node, unlink=True):
+    remove_list = []
+    for child in node.childNodes:
+        if child.nodeType == minidom.Node.TEXT_NODE and not child.data.strip():
+            remove_list.append(child)
+        elif child.hasChildNodes():
+            remove_whitespace_nodes(child, unlink)
+    for node in remove_list:
+        node.parentNode.removeChild(node)
+        if unlink:
+            node.unlink()
+
+
+def pretty_print(xml_node, indent="  "):
+    remove_whitespace_nodes(xml_node)
+    return format_node(xml_node, indent, 0)
+
+
+def xml_declaration(version, encoding=None, standalone=None):
+    declaration = f'<?xml version="{version}"'
+    if encoding:
+        declaration += f' encoding="{encoding}"'
+    if standalone is not None:
+        declaration += f' standalone="{"yes" if standalone else "no"}"'
+    return declaration + "?>\n"
+
+
+def format_node(node, indent, level):
+    output = []
+    if node.nodeType == minidom.Node.ELEMENT_NODE:
+        output.append(f"{indent * level}<{node.tagName}")
+        for attr_name, attr_value in node.attributes.items():
+            output.append(f' {attr_name}="{escape(attr_value, ATTRIBUTE_ENTITIES)}"')
+        if node.childNodes:
+            output.append(">\n")
+            for child in node.childNodes:
+                output.append(format_node(child, indent, level + 1))
+            output.append(f"{indent * level}</{node.tagName}>\n")
+        else:
+            output.append(" />\n")
+    elif node.nodeType == minidom.Node.TEXT_NODE:
+        text = node.data.strip()
+        if text:
+            output.append(f"{indent * level}{escape(text)}\n")
+    elif node.nodeType == minidom.Node.CDATA_SECTION_NODE:
+        output.append(f"{indent * level}<![CDATA[{node.data}]]>\n")
+    elif node.nodeType == minidom.Node.COMMENT_NODE:
+        output.append(f"{indent * level}<!--{node.data}-->\n")
+    elif node.nodeType == minidom.Node.PROCESSING_INSTRUCTION_NODE:
+        output.append(f"{indent * level}<?{node.target} {node.data}?>\n")
+    elif node.nodeType == minidom.Node.DOCUMENT_NODE:
+        if node.version:
+            output.append(xml_declaration(node.version, node.encoding, node.standalone))
+        for child in node.childNodes:
+            output.append(format_node(child, indent, level))
+    return ''.join(output)
+
+
+class StreamingFormatter:
+    # Produces the same output as pretty_print from expat events, holding only the
+    # current element's pending open tag and text run instead of a whole DOM.
+    buffer_size = 64 * 1024
+
+    def __init__(self, out, indent="  "):
+        self.out = out
+        self.indent = indent
+        self.elements = 0
+        self.attributes = 0
+        self.depth = 0
+        self.open_tag_pending = False
+        self.text = []
+        self.cdata = None
+
+    def create_parser(self):
+        parser = expat.ParserCreate()
+        parser.ordered_attributes = True
+        parser.buffer_text = True
+        parser.buffer_size = self.buffer_size
+        parser.XmlDeclHandler = self.xml_decl
+        parser.StartElementHandler = self.start_element
+        parser.EndElementHandler = self.end_element
+        parser.CharacterDataHandler = self.character_data
+        parser.StartCdataSectionHandler = self.start_cdata
+        parser.EndCdataSectionHandler = self.end_cdata
+        parser.CommentHandler = self.comment
+        parser.ProcessingInstructionHandler = self.processing_instruction
+        return parser
+
+    def format_file(self, file):
+        self.create_parser().ParseFile(file)
+
+    def format_text(self, xaml, progress=None):
+        parser = self.create_parser()
+        for start in range(0, len(xaml), self.buffer_size):
+            parser.Parse(xaml[start:start + self.buffer_size], False)
+            if progress is not None:
+                progress(min(start + self.buffer_size, len(xaml)) / len(xaml))
+        parser.Parse("", True)
+
+    def write_line(self, line):
+        self.out.write(f"{self.indent * self.depth}{line}\n")
+
+    def close_open_tag(self):
+        if self.open_tag_pending:
+            self.out.write(">\n")
+            self.open_tag_pending = False
+
+    def flush_text(self):
+        if self.text:
+            text = "".join(self.text).strip()
+            self.text.clear()
+            if text:
+                self.close_open_tag()
+                self.write_line(escape(text))
+
+    def xml_decl(self, version, encoding, standalone):
+        if version:
+            self.out.write(xml_declaration(version, encoding, None if standalone < 0 else standalone))
+
+    def start_element(self, name, attributes):
+        self.flush_text()
+        self.close_open_tag()
+        pairs = list(zip(attributes[::2], attributes[1::2]))
+        self.elements += 1
+        self.attributes += len(pairs)
+        # minidom lists namespace declarations ahead of ordinary attributes.
+        pairs.sort(key=lambda pair: not (pair[0] == "xmlns" or pair[0].startswith("xmlns:")))
+        self.out.write(f"{self.indent * self.depth}<{name}")
+        for attr_name, attr_value in pairs:
+            self.out.write(f' {attr_name}="{escape(attr_value, ATTRIBUTE_ENTITIES)}"')
+        self.open_tag_pending = True
+        self.depth += 1
+
+    def end_element(self, name):
+        self.flush_text()
+        self.depth -= 1
+        if self.open_tag_pending:
+            self.out.write(" />\n")
+            self.open_tag_pending = False
+        else:
+            self.write_line(f"</{name}>")
+
+    def character_data(self, data):
+        if self.cdata is not None:
+            self.cdata.append(data)
+        else:
+            self.text.append(data)
+
+    def start_cdata(self):
+        self.flush_text()
+        self.cdata = []
+
+    def end_cdata(self):
+        data = "".join(self.cdata)
+        self.cdata = None
+        self.close_open_tag()
+        self.write_line(f"<![CDATA[{data}]]>")
+
+    def comment(self, data):
+        self.flush_text()
+        self.close_open_tag()
+        self.write_line(f"<!--{data}-->")
+
+    def processing_instruction(self, target, data):
+        self.flush_text()
+        self.close_open_tag()
+        self.write_line(f"<?{target} {data}?>")
+
+
+def format_fragment(fragment, indent="  ", depth=0):
+    # Formats one element's markup as if it sat depth levels deep in its document, without
+    # the final newline. Namespace prefixes need not be declared within the fragment.
+    out = io.StringIO()
+    formatter = StreamingFormatter(out, indent)
+    formatter.depth = depth
+    formatter.format_text(fragment)
+    return out.getvalue().rstrip("\n")
+
+
+def stream_format(source, out, indent="  ", progress=None):
+    # progress(fraction) is called after each buffer when formatting a string.
+    formatter = StreamingFormatter(out, indent)
+    if isinstance(source, str):
+        formatter.format_text(source, progress)
+    else:
+        formatter.format_file(source)
+    return formatter
@@ -0,0 +1,250 @@
+import re
+import time
+
+from .locations import LineIndex
+
+HIGHLIGHT_TAGS = ("tag_element", "tag_attribute", "tag_value", "tag_comment")
+
+ELEMENT_NAME_PATTERN = re.compile(r'</?[^\s/>"\'=<]*')
+IN_TAG_PATTERN = re.compile(
+    r'\s*(?:(?P<close>/?>)|(?P<value>"[^"]*"?|\'[^\']*\'?)|(?P<attribute>[^\s=/>"\'<]+)|(?P<restart>(?=<))|(?P<other>[=/]))'
+)
+
+
+def tokenize(text, pos=0, end=None):
+    # Single pass over the text: markup outside of tags is skipped with str.find and
+    # only the inside of each tag is scanned token by token. Returns the spans and the
+    # offset of a tag still open at the end of the text, so a caller slicing a large
+    # buffer can resume from there.
+    end = len(text) if end is None else end
+    spans = []
+    resume = end
+    while True:
+        lt = text.find("<", pos, end)
+        if lt < 0:
+            return spans, resume
+        if text.startswith("<!--", lt):
+            close = text.find("-->", lt + 4, end)
+            pos = end if close < 0 else close + 3
+            spans.append(("tag_comment", lt, pos))
+            if close < 0:
+                return spans, lt
+            continue
+
+        match = ELEMENT_NAME_PATTERN.match(text, lt, end)
+        spans.append(("tag_element", lt, match.end()))
+        pos = match.end()
+        closed = False
+        while pos < end:
+            match = IN_TAG_PATTERN.match(text, pos, end)
+            if not match or match.end() == pos and not match.group("restart"):
+                break
+            kind = match.lastgroup
+            if kind == "restart":
+                pos = match.end()
+                closed = True
+                break
+            if kind == "close":
+                spans.append(("tag_element", match.start(kind), match.end()))
+                pos = match.end()
+                closed = True
+                break
+            if kind == "value":
+                spans.append(("tag_value", match.start(kind), match.end()))
+            elif kind == "attribute":
+                spans.append(("tag_attribute", match.start(kind), match.end()))
+            pos = match.end()
+        if not closed:
+            return spans, lt
+
+
+def spans_to_indices(text, spans, first_line, first_column):
+    # Turns character offsets into Tk "line.column" indices without asking Tk to count characters.
+    lines = LineIndex(text)
+
+    def to_index(offset):
+        line, column = lines.position(offset)
+        if line == 1:
+            column += first_column
+        return f"{first_line + line - 1}.{column}"
+
+    ranges = {tag: [] for tag in HIGHLIGHT_TAGS}
+    for tag, start, end in spans:
+        ranges[tag].append(to_index(start))
+        ranges[tag].append(to_index(end))
+    return ranges
+
+
+class IncrementalHighlighter:
+    # Coalesces edits reported through invalidate() and, once typing pauses for `delay`
+    # milliseconds, re-tokenizes only the dirty lines plus some context. Large regions are
+    # processed `batch_lines` at a time from the Tk event loop. In lazy mode dirty text is
+    # only marked stale (with the "hl_stale" tag, which moves with edits like any tag) and
+    # highlighted when it comes within `margin_lines` of the visible lines.
+    def __init__(self, widget, delay=150, context_lines=2, batch_lines=400, max_tag_lines=50, profile=None, margin_lines=150):
+        self.widget = widget
+        self.profile = profile  # Optional Profile; each batch is recorded under "highlight".
+        self.delay = delay
+        self.context_lines = context_lines
+        self.batch_lines = batch_lines
+        self.max_tag_lines = max_tag_lines
+        self.margin_lines = margin_lines
+        self.lazy = False
+        self._dirty = False
+        self._debounce_id = None
+        self._batch_id = None
+        self._viewport_id = None
+        self._watching_viewport = False
+        widget.mark_set("hl_dirty_start", "1.0")
+        widget.mark_gravity("hl_dirty_start", "left")
+        widget.mark_set("hl_dirty_end", "1.0")
+        widget.mark_gravity("hl_dirty_end", "right")
+        widget.mark_set("hl_batch_start", "1.0")
+        widget.mark_gravity("hl_batch_start", "left")
+        widget.mark_set("hl_batch_end", "1.0")
+        widget.mark_gravity("hl_batch_end", "right")
+
+    def invalidate(self, start, end):
+        widget = self.widget
+        if not self._dirty:
+            widget.mark_set("hl_dirty_start", start)
+            widget.mark_set("hl_dirty_end", end)
+            self._dirty = True
+        else:
+            if widget.compare(start, "<", "hl_dirty_start"):
+                widget.mark_set("hl_dirty_start", start)
+            if widget.compare(end, ">", "hl_dirty_end"):
+                widget.mark_set("hl_dirty_end", end)
+        if self._debounce_id is not None:
+            widget.after_cancel(self._debounce_id)
+        self._debounce_id = widget.after(self.delay, self.flush)
+
+    def invalidate_all(self):
+        self.invalidate("1.0", "end")
+
+    def set_lazy(self, lazy):
+        self.lazy = lazy
+        if not lazy:
+            self.widget.tag_remove("hl_stale", "1.0", "end")
+        elif not self._watching_viewport:
+            self._watch_viewport()
+
+    def _watch_viewport(self):
+        # Scrolling and resizing both change which lines are visible.
+        widget = self.widget
+        scroll_command = widget.cget("yscrollcommand")
+
+        def on_scroll(first, last):
+            if scroll_command:
+                widget.tk.call(*widget.tk.splitlist(scroll_command), first, last)
+            self.schedule_viewport()
+
+        widget.configure(yscrollcommand=on_scroll)
+        widget.bind("<Configure>", lambda event: self.schedule_viewport(), add="+")
+        self._watching_viewport = True
+
+    def schedule_viewport(self):
+        if self.lazy and self._viewport_id is None:
+            self._viewport_id = self.widget.after(30, self.highlight_viewport)
+
+    def highlight_viewport(self):
+        # Highlights the stale text between margin_lines above the first visible line and
+        # margin_lines below the last one.
+        self._viewport_id = None
+        widget = self.widget
+        if self._batch_id is not None:
+            # Whatever a previous viewport left unfinished goes back to being stale.
+            widget.after_cancel(self._batch_id)
+            self._batch_id = None
+            widget.tag_add("hl_stale", "hl_batch_start", "hl_batch_end")
+        top = widget.index(f"@0,0 linestart -{self.margin_lines} lines")
+        bottom = widget.index(f"@0,{widget.winfo_height()} lineend +{self.margin_lines} lines lineend")
+        if "hl_stale" in widget.tag_names(top):
+            start = top
+        else:
+            next_range = widget.tag_nextrange("hl_stale", top, bottom)
+            if not next_range:
+                return
+            start = next_range[0]
+        last_range = widget.tag_prevrange("hl_stale", bottom, start)
+        end = last_range[1] if last_range else bottom
+        if widget.compare(end, ">", bottom):
+            end = bottom
+        widget.tag_remove("hl_stale", start, end)
+        self._start_batches(self._expand_to_tag_start(start), end)
+
+    def flush(self):
+        self._debounce_id = None
+        if not self._dirty:
+            return
+        self._dirty = False
+        widget = self.widget
+        start = self._expand_to_tag_start(widget.index(f"hl_dirty_start linestart -{self.context_lines} lines"))
+        end = widget.index(f"hl_dirty_end +{self.context_lines} lines lineend")
+        if self.lazy:
+            widget.tag_add("hl_stale", start, end)
+            self.highlight_viewport()
+            return
+        self._start_batches(start, end)
+
+    def _start_batches(self, start, end):
+        widget = self.widget
+        if self._batch_id is not None:
+            # Fold the unfinished part of a running batch into the new region.
+            widget.after_cancel(self._batch_id)
+            self._batch_id = None
+            if widget.compare("hl_batch_start", "<", start):
+                start = widget.index("hl_batch_start")
+            if widget.compare("hl_batch_end", ">", end):
+                end = widget.index("hl_batch_end")
+        widget.mark_set("hl_batch_start", start)
+        widget.mark_set("hl_batch_end", end)
+        self._run_batch()
+
+    def _expand_to_tag_start(self, index):
+        # Start tokenizing at the '<' of a tag that spans into the region, if there is one.
+        widget = self.widget
+        lt = widget.search("<", index, backwards=True, stopindex=f"{index} -{self.max_tag_lines} lines")
+        if lt and not widget.search(">", lt, stopindex=index):
+            return widget.index(lt)
+        return index
+
+    def _run_batch(self):
+        started = time.perf_counter()
+        self._batch_id = None
+        widget = self.widget
+        start = widget.index("hl_batch_start")
+        stop = widget.index(f"{start} +{self.batch_lines} lines lineend")
+        last = widget.compare(stop, ">=", "hl_batch_end")
+        if last:
+            stop = widget.index("hl_batch_end")
+
+        text = widget.get(start, stop)
+        spans, resume = tokenize(text)
+        if not last and 0 < resume < len(text):
+            # A tag is still open at the end of this slice; leave it for the next one.
+            spans = [span for span in spans if span[2] <= resume]
+            text = text[:resume]
+        line, column = map(int, start.split("."))
+        ranges = spans_to_indices(text, spans, line, column)
+        last_newline = text.rfind("\n")
+        if last_newline >= 0:
+            line_count = text.count("\n")
+            stop = f"{line + line_count}.{len(text) - last_newline - 1}"
+        else:
+            stop = f"{line}.{column + len(text)}"
+
+        for tag in HIGHLIGHT_TAGS:
+            widget.tag_remove(tag, start, stop)
+        for tag, indices in ranges.items():
+            if indices:
+                widget.tag_add(tag, *indices)
+
+        if self.profile is not None:
+            elements = sum(1 for tag, start, _ in spans if tag == "tag_element" and text.startswith("<", start) and not text.startswith("</", start))
+            attributes = len(ranges["tag_attribute"]) // 2
+            self.profile.add("highlight", time.perf_counter() - started, 1, elements, attributes)
+
+        if not last:
+            widget.mark_set("hl_batch_start", stop)
+            self._batch_id = widget.after(1, self._run_batch)
@@ -0,0 +1,165 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+
+EDIT_OVERHEAD_BYTES = 64
+
+
+class Edit:
+    __slots__ = ("kind", "start", "text")
+
+    def __init__(self, kind, start, text):
+        self.kind = kind  # "insert" or "delete"
+        self.start = start  # Tk index of the first affected character.
+        self.text = text
+
+    def inverse(self):
+        return Edit("delete" if self.kind == "insert" else "insert", self.start, self.text)
+
+    @property
+    def size(self):
+        return len(self.text) + EDIT_OVERHEAD_BYTES
+
+
+class EditGroup:
+    __slots__ = ("edits", "end", "updated", "sealed")
+
+    def __init__(self, edit, end, now):
+        self.edits = [edit]
+        self.end = end  # Index just after the last inserted text, used to extend typing runs.
+        self.updated = now
+        self.sealed = False
+
+    @property
+    def size(self):
+        return sum(edit.size for edit in self.edits)
+
+
+class EditHistory:
+    # Undo/redo as compact insert/delete deltas instead of buffer snapshots. Consecutive
+    # keystrokes are grouped into one logical edit, and the oldest groups are dropped once
+    # the recorded text exceeds max_bytes.
+    def __init__(self, max_bytes=8 * 1024 * 1024, group_timeout=1.0):
+        self.max_bytes = max_bytes
+        self.group_timeout = group_timeout
+        self._undo = deque()
+        self._redo = []
+        self._bytes = 0
+        self._replaying = False
+        self._compound = None  # While compound() is active: its group, once it has one.
+        self._in_compound = False
+
+    @property
+    def size(self):
+        return self._bytes
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def record(self, kind, start, end, text, now=None):
+        if self._replaying or not text:
+            return
+        now = time.monotonic() if now is None else now
+        if self._redo:
+            self._bytes -= sum(group.size for group in self._redo)
+            self._redo.clear()
+
+        group = self._undo[-1] if self._undo else None
+        if self._in_compound and group is not None and group is self._compound:
+            group.edits.append(Edit(kind, start, text))
+            group.updated = now
+            self._bytes += len(text) + EDIT_OVERHEAD_BYTES
+            self._trim()
+            return
+        if group is not None and not group.sealed and now - group.updated <= self.group_timeout:
+            if self._extend(group, kind, start, end, text):
+                group.updated = now
+                self._bytes += len(text)
+                self._trim()
+                return
+
+        self._undo.append(EditGroup(Edit(kind, start, text), end if kind == "insert" else start, now))
+        self._bytes += len(text) + EDIT_OVERHEAD_BYTES
+        if self._in_compound:
+            self._compound = self._undo[-1]
+        if kind == "insert" and "\n" in text:
+            self._undo[-1].sealed = True
+        self._trim()
+
+    def _extend(self, group, kind, start, end, text):
+        last = group.edits[-1]
+        if kind == "insert":
+            if last.kind == "insert" and start == group.end:
+                last.text += text
+            elif last.kind == "delete" and len(group.edits) == 1 and start == last.start:
+                # Typing over a selection: the delete and the insert undo together.
+                group.edits.append(Edit(kind, start, text))
+                self._bytes += EDIT_OVERHEAD_BYTES
+            else:
+                return False
+            group.end = end
+            group.sealed = "\n" in text
+            return True
+        if last.kind != "delete" or len(group.edits) != 1:
+            return False
+        if end == last.start:  # Backspace.
+            last.text = text + last.text
+            last.start = start
+        elif start == last.start:  # Forward delete.
+            last.text += text
+        else:
+            return False
+        return True
+
+    def seal(self):
+        if self._undo:
+            self._undo[-1].sealed = True
+
+    def _trim(self):
+        while self._bytes > self.max_bytes and self._undo:
+            self._bytes -= self._undo.popleft().size
+
+    def undo(self):
+        if not self._undo:
+            return []
+        group = self._undo.pop()
+        group.sealed = True
+        self._redo.append(group)
+        return [edit.inverse() for edit in reversed(group.edits)]
+
+    def redo(self):
+        if not self._redo:
+            return []
+        group = self._redo.pop()
+        self._undo.append(group)
+        return list(group.edits)
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._bytes = 0
+
+    @contextmanager
+    def compound(self):
+        # Everything recorded inside is one group, undone and redone as a whole, however
+        # many separate places it touched.
+        self.seal()
+        self._in_compound = True
+        try:
+            yield
+        finally:
+            self._in_compound = False
+            self._compound = None
+            self.seal()
+
+    @contextmanager
+    def replaying(self):
+        # Edits made while applying undo/redo must not be recorded as new history.
+        self._replaying = True
+        try:
+            yield
+        finally:
+            self._replaying = False
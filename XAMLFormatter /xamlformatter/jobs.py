@@ -0,0 +1,213 @@
+import itertools
+import multiprocessing
+import os
+import queue
+from concurrent.futures import ProcessPoolExecutor
+
+from .diagnostics import Diagnostic
+from .edits import apply_edits, diff_edits, edit_positions, merge_edits
+from .locations import LineIndex
+from .pipeline import default_validator, format_range_edits, format_xaml_text, shared_cache, validate_xaml_text
+from .profiling import Profile, profile_stage
+
+KINDS = ("format", "validate", "highlight")
+
+# Set in each worker process by _init_worker.
+_latest = None
+_events = None
+
+
+class JobCancelled(BaseException):
+    # Raised inside a job once a newer job of its kind has been submitted. A BaseException,
+    # like KeyboardInterrupt, so the pipeline's "except Exception" fallbacks let it through.
+    pass
+
+
+def _init_worker(latest, events):
+    global _latest, _events
+    _latest = latest
+    _events = events
+
+
+class _JobContext:
+    # Worker-side view of one job. Progress reports double as cancellation points: a job
+    # that has been superseded stops at its next report instead of running to the end.
+    def __init__(self, kind, generation):
+        self.slot = KINDS.index(kind)
+        self.kind = kind
+        self.generation = generation
+        self.reported = {}
+
+    def check(self):
+        if _latest is not None and _latest[self.slot] != self.generation:
+            raise JobCancelled()
+
+    def progress(self, stage, fraction):
+        self.check()
+        percent = int(fraction * 100)
+        if _events is not None and self.reported.get(stage) != percent:
+            self.reported[stage] = percent
+            _events.put((self.kind, self.generation, stage, fraction))
+
+
+def run_job(kind, generation, function, args, kwargs):
+    context = _JobContext(kind, generation)
+    context.check()
+    return function(*args, progress=context.progress, **kwargs)
+
+
+def warm_up(catalog_paths=()):
+    # Loads the catalog and builds the validator before the first real job needs them.
+    default_validator(catalog_paths).catalog
+
+
+def format_text_job(xaml, indent="  ", catalog_paths=(), resource_scope=None, selection=None, max_edits=None, progress=None):
+    # Formats xaml, or with selection ((line, column), (line, column)) just the element
+    # enclosing it, and returns the edits that turn xaml into the result as edit_positions()
+    # tuples, the result's errors and the profile. Only the edits travel back to the editor;
+    # more than max_edits of them are merged into one.
+    profile = Profile()
+    validator = default_validator(catalog_paths)
+    lines = LineIndex(xaml)
+    if selection is None:
+        formatted, errors = format_xaml_text(xaml, validator, indent, cache=shared_cache(), profile=profile, progress=progress,
+                                             resource_scope=resource_scope)
+        with profile_stage(profile, "diff"):
+            edits = diff_edits(xaml, formatted)
+    else:
+        try:
+            with profile_stage(profile, "format"):
+                edits = format_range_edits(xaml, lines.offset(*selection[0]), lines.offset(*selection[1]), indent)
+        except ValueError as e:
+            # Reported in the error list like any other problem with the text, not as a failed job.
+            return [], [Diagnostic(str(e), "format")], profile.to_dict()
+        errors = validate_xaml_text(apply_edits(xaml, edits), validator, cache=shared_cache(), profile=profile, progress=progress,
+                                    resource_scope=resource_scope)
+    if max_edits is not None and len(edits) > max_edits:
+        edits = merge_edits(xaml, edits)
+    return edit_positions(xaml, edits, lines), errors, profile.to_dict()
+
+
+def validate_text_job(xaml, catalog_paths=(), resource_scope=None, progress=None):
+    profile = Profile()
+    errors = validate_xaml_text(xaml, default_validator(catalog_paths), cache=shared_cache(), profile=profile, progress=progress,
+                                resource_scope=resource_scope)
+    return errors, profile.to_dict()
+
+
+class Job:
+    __slots__ = ("kind", "generation", "future", "on_done", "on_progress", "on_error")
+
+    def __init__(self, kind, generation, on_done, on_progress=None, on_error=None):
+        self.kind = kind
+        self.generation = generation
+        self.future = None
+        self.on_done = on_done
+        self.on_progress = on_progress
+        self.on_error = on_error
+
+
+class JobScheduler:
+    # Runs CPU-bound jobs in a reusable process pool on behalf of a Tk application. At most
+    # one job per kind is current: submitting another cancels the previous one, which is
+    # dropped if it has not started and stops at its next progress report if it has.
+    # Progress and results are queued by the pool and handed to the callbacks from the Tk
+    # event loop (widget.after), so callbacks may touch widgets freely.
+    def __init__(self, widget, workers=None, poll_interval=20, catalog_paths=()):
+        self.widget = widget
+        self.poll_interval = poll_interval
+        # Spawned rather than forked: forking a process that is running Tk threads is unsafe,
+        # and spawn is what Windows uses anyway.
+        context = multiprocessing.get_context("spawn")
+        self.latest = context.Array("q", len(KINDS), lock=False)
+        self.events = context.Queue()
+        self.executor = ProcessPoolExecutor(max_workers=workers or max(1, min(2, (os.cpu_count() or 1) - 1)), mp_context=context,
+                                            initializer=_init_worker, initargs=(self.latest, self.events))
+        self.executor.submit(warm_up, catalog_paths)
+        self.jobs = {}  # Kind -> current Job.
+        self.finished = queue.Queue()
+        self.generations = itertools.count(1)
+        self._poll_id = None
+        self._batches = {}  # Kind -> after() id of a running apply_in_batches.
+
+    def submit(self, kind, function, *args, on_done, on_progress=None, on_error=None, **kwargs):
+        self.cancel(kind)
+        generation = next(self.generations)
+        self.latest[KINDS.index(kind)] = generation
+        job = self.jobs[kind] = Job(kind, generation, on_done, on_progress, on_error)
+        job.future = self.executor.submit(run_job, kind, generation, function, args, kwargs)
+        job.future.add_done_callback(lambda future: self.finished.put(job))
+        self._schedule_poll()
+        return job
+
+    def cancel(self, kind):
+        job = self.jobs.pop(kind, None)
+        if job is not None:
+            job.future.cancel()
+            # Any change to the kind's generation makes a running job stop at its next check.
+            self.latest[KINDS.index(kind)] = 0
+        batch_id = self._batches.pop(kind, None)
+        if batch_id is not None:
+            self.widget.after_cancel(batch_id)
+
+    def is_running(self, kind):
+        return kind in self.jobs
+
+    def apply_in_batches(self, kind, items, apply, batch_size=200, done=None):
+        # Calls apply(batch) from the event loop for successive slices of items, yielding
+        # to the UI in between; a newer job or batch run of the same kind stops it.
+        items = list(items)
+        batch_id = self._batches.pop(kind, None)
+        if batch_id is not None:
+            self.widget.after_cancel(batch_id)
+
+        def step(start):
+            self._batches.pop(kind, None)
+            apply(items[start:start + batch_size])
+            if start + batch_size < len(items):
+                self._batches[kind] = self.widget.after(1, step, start + batch_size)
+            elif done is not None:
+                done()
+
+        step(0)
+
+    def _schedule_poll(self):
+        if self._poll_id is None:
+            self._poll_id = self.widget.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        self._poll_id = None
+        while True:
+            try:
+                kind, generation, stage, fraction = self.events.get_nowait()
+            except queue.Empty:
+                break
+            job = self.jobs.get(kind)
+            if job is not None and job.generation == generation and job.on_progress is not None:
+                job.on_progress(stage, fraction)
+        while True:
+            try:
+                job = self.finished.get_nowait()
+            except queue.Empty:
+                break
+            if self.jobs.get(job.kind) is not job or job.future.cancelled():
+                continue  # Superseded; its result is stale.
+            del self.jobs[job.kind]
+            error = job.future.exception()
+            if isinstance(error, JobCancelled):
+                continue
+            if error is not None:
+                if job.on_error is not None:
+                    job.on_error(error)
+                continue
+            job.on_done(job.future.result())
+        if self.jobs:
+            self._schedule_poll()
+
+    def shutdown(self):
+        for kind in list(self.jobs):
+            self.cancel(kind)
+        if self._poll_id is not None:
+            self.widget.after_cancel(self._poll_id)
+            self._poll_id = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,168 @@
+import re
+from array import array
+from bisect import bisect_right
+from xml.dom.expatbuilder import ExpatBuilderNS
+
+TAG_NAME_PATTERN = re.compile(r"<([^\s/>]+)")
+ATTRIBUTE_PATTERN = re.compile(r"""\s+([^\s=/>]+)\s*=\s*("[^"]*"|'[^']*')""")
+START_TAG_CLOSE_PATTERN = re.compile(r"\s*(/?)>")
+NEWLINE_PATTERN = re.compile("\n")
+
+
+class LineIndex:
+    # Offsets at which each line starts, in an array (8 bytes a line however large the
+    # file), so offset <-> (line, column) is a bisect rather than a scan. Built in one go
+    # from a string or chunk by chunk while a file is read.
+    def __init__(self, text=""):
+        self.starts = array("q", [0])
+        self.length = 0
+        if text:
+            self.append(text)
+
+    def append(self, chunk):
+        base = self.length
+        self.starts.extend(base + match.end() for match in NEWLINE_PATTERN.finditer(chunk))
+        self.length += len(chunk)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def offset(self, line, column):
+        return self.starts[line - 1] + column
+
+    def position(self, offset):
+        line = bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1]
+
+
+class SourceMap:
+    # Where each element's tags sit in the parsed text. Only the (line, column) pairs expat
+    # reports are stored while parsing; tag-name and attribute ranges are worked out on
+    # demand by lexing just the one start tag, so locating an error never rescans the text.
+    def __init__(self, text):
+        self.text = text
+        self.starts = {}  # Element -> (line, column) of its "<".
+        self.ends = {}  # Element -> (line, column) of its "</", or just past "/>" for empty elements.
+        self._lines = None
+
+    def lines(self):
+        if self._lines is None:
+            self._lines = LineIndex(self.text)
+        return self._lines
+
+    def line_starts(self):
+        return self.lines().starts
+
+    def offset(self, line, column):
+        return self.lines().offset(line, column)
+
+    def position(self, offset):
+        return self.lines().position(offset)
+
+    def _range(self, start, end):
+        line, column = self.position(start)
+        end_line, end_column = self.position(end)
+        return line, column, end_line, end_column
+
+    def start_tag_offset(self, node):
+        position = self.starts.get(node)
+        return None if position is None else self.offset(*position)
+
+    def element_range(self, node):
+        # The tag name in the element's start tag.
+        start = self.start_tag_offset(node)
+        if start is None:
+            return None
+        match = TAG_NAME_PATTERN.match(self.text, start)
+        if match is None:
+            return None
+        return self._range(match.start(1), match.end(1))
+
+    def attribute_range(self, node, attr_name):
+        # From the attribute's name to its closing quote; the tag name if it is not found.
+        start = self.start_tag_offset(node)
+        if start is None:
+            return None
+        match = TAG_NAME_PATTERN.match(self.text, start)
+        if match is None:
+            return None
+        pos = match.end()
+        while True:
+            attribute = ATTRIBUTE_PATTERN.match(self.text, pos)
+            if attribute is None:
+                return self._range(match.start(1), match.end(1))
+            if attribute.group(1) == attr_name:
+                return self._range(attribute.start(1), attribute.end(2))
+            pos = attribute.end()
+
+    def is_self_closing(self, node):
+        # Whether the element's start tag ends in "/>", found by lexing just that tag.
+        start = self.start_tag_offset(node)
+        if start is None:
+            return False
+        match = TAG_NAME_PATTERN.match(self.text, start)
+        if match is None:
+            return False
+        pos = match.end()
+        while True:
+            attribute = ATTRIBUTE_PATTERN.match(self.text, pos)
+            if attribute is None:
+                break
+            pos = attribute.end()
+        close = START_TAG_CLOSE_PATTERN.match(self.text, pos)
+        return close is not None and close.group(1) == "/"
+
+    def element_extent(self, node):
+        # Offsets of the whole element, from its "<" to just past its end tag. An empty
+        # element's end position is already past its "/>"; a "</" found there belongs to
+        # its parent.
+        start = self.start_tag_offset(node)
+        position = self.ends.get(node)
+        if start is None or position is None:
+            return None
+        end = self.offset(*position)
+        if self.text.startswith("</", end) and not self.is_self_closing(node):
+            end = self.text.index(">", end) + 1
+        return start, end
+
+
+class _LocatingBuilder(ExpatBuilderNS):
+    def __init__(self, source_map):
+        super().__init__()
+        self.source_map = source_map
+
+    def start_element_handler(self, name, attributes):
+        position = (self._parser.CurrentLineNumber, self._parser.CurrentColumnNumber)
+        super().start_element_handler(name, attributes)
+        self.source_map.starts[self.curNode] = position
+
+    def end_element_handler(self, name):
+        self.source_map.ends[self.curNode] = (self._parser.CurrentLineNumber, self._parser.CurrentColumnNumber)
+        super().end_element_handler(name)
+
+
+class _ProgressReader:
+    # File-like view of a string that reports how much of it the parser has consumed.
+    def __init__(self, text, progress):
+        self.text = text
+        self.pos = 0
+        self.progress = progress
+
+    def read(self, size):
+        chunk = self.text[self.pos:self.pos + size]
+        self.pos += len(chunk)
+        if self.text:
+            self.progress(self.pos / len(self.text))
+        return chunk
+
+
+def parse_with_locations(text, progress=None):
+    # Same document as minidom.parseString(text), plus a SourceMap of its elements. With
+    # progress, the text is fed to expat in chunks and progress(fraction) called after each.
+    source_map = SourceMap(text)
+    builder = _LocatingBuilder(source_map)
+    if progress is None:
+        document = builder.parseString(text)
+    else:
+        document = builder.parseFile(_ProgressReader(text, progress))
+    return document, source_map
@@ -0,0 +1,170 @@
+import sys
+from functools import lru_cache
+
+RESOURCE_EXTENSIONS = frozenset({"StaticResource", "ThemeResource", "DynamicResource", "CustomResource"})
+BINDING_EXTENSIONS = frozenset({"Binding", "x:Bind"})
+KNOWN_EXTENSIONS = RESOURCE_EXTENSIONS | BINDING_EXTENSIONS | {"TemplateBinding", "RelativeSource", "x:Null"}
+
+
+class MarkupExtension:
+    # One parsed "{Name arg, Key=Value}" value. Arguments are plain strings or nested
+    # MarkupExtension nodes.
+    __slots__ = ("name", "positional", "named")
+
+    def __init__(self, name, positional, named):
+        self.name = name
+        self.positional = positional
+        self.named = named
+
+    def get(self, key, default=None):
+        for name, value in self.named:
+            if name == key:
+                return value
+        return default
+
+    def argument(self, key, position=0):
+        # Value given either by name or, as in "{StaticResource Key}", by position.
+        value = self.get(key)
+        if value is None and len(self.positional) > position:
+            value = self.positional[position]
+        return value
+
+    def walk(self):
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            nested = [value for value in node.positional if isinstance(value, MarkupExtension)]
+            nested.extend(value for _, value in node.named if isinstance(value, MarkupExtension))
+            stack.extend(reversed(nested))
+
+    def __repr__(self):
+        return f"MarkupExtension({self.name!r}, {self.positional!r}, {self.named!r})"
+
+
+class MarkupSyntaxError:
+    __slots__ = ("message",)
+
+    def __init__(self, message):
+        self.message = message
+
+    def __repr__(self):
+        return f"MarkupSyntaxError({self.message!r})"
+
+
+class _MarkupParser:
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+
+    def error(self, message):
+        raise ValueError(f"{message} at position {self.pos}")
+
+    def skip_whitespace(self):
+        text = self.text
+        while self.pos < len(text) and text[self.pos].isspace():
+            self.pos += 1
+
+    def peek(self):
+        return self.text[self.pos] if self.pos < len(self.text) else ""
+
+    def parse_extension(self):
+        self.pos += 1  # "{"
+        self.skip_whitespace()
+        start = self.pos
+        while self.peek() and not self.peek().isspace() and self.peek() not in "},=":
+            self.pos += 1
+        name = self.text[start:self.pos]
+        if not name:
+            self.error("Missing markup extension name")
+
+        positional = []
+        named = []
+        self.skip_whitespace()
+        if self.peek() == "}":
+            self.pos += 1
+            return MarkupExtension(sys.intern(name), (), ())
+        while True:
+            self.skip_whitespace()
+            if self.peek() in (",", "}"):
+                self.error("Missing argument")
+            value = self.parse_value(stop_at_equals=True)
+            self.skip_whitespace()
+            if self.peek() == "=":
+                if not isinstance(value, str) or not value:
+                    self.error("Invalid argument name")
+                self.pos += 1
+                self.skip_whitespace()
+                named.append((sys.intern(value), self.parse_value(stop_at_equals=False)))
+            else:
+                positional.append(value)
+            self.skip_whitespace()
+            separator = self.peek()
+            if separator == ",":
+                self.pos += 1
+            elif separator == "}":
+                self.pos += 1
+                return MarkupExtension(sys.intern(name), tuple(positional), tuple(named))
+            elif not separator:
+                self.error("Unterminated markup extension")
+            else:
+                self.error(f"Unexpected '{separator}'")
+
+    def parse_value(self, stop_at_equals):
+        char = self.peek()
+        if self.text.startswith("{}", self.pos):
+            # The "{}" escape: what follows is text, as in StringFormat={}{0:N2}, whose
+            # braces pair up among themselves.
+            self.pos += 2
+            return self.parse_text(stop_at_equals, braces=True)
+        if char == "{":
+            return self.parse_extension()
+        if char in ("'", '"'):
+            end = self.text.find(char, self.pos + 1)
+            if end < 0:
+                self.error("Unterminated quoted value")
+            value = self.text[self.pos + 1:end]
+            self.pos = end + 1
+            return sys.intern(value)
+        return self.parse_text(stop_at_equals)
+
+    def parse_text(self, stop_at_equals, braces=False):
+        opening = "[({" if braces else "[("
+        closing = "])}" if braces else "])"
+        stops = ",}=" if stop_at_equals else ",}"
+        chars = []
+        depth = 0
+        while self.pos < len(self.text):
+            char = self.text[self.pos]
+            if char == "\\" and self.pos + 1 < len(self.text):
+                chars.append(self.text[self.pos + 1])
+                self.pos += 2
+                continue
+            if depth == 0 and char in stops:
+                break
+            # Indexers and x:Bind function calls, as in "Items[0]" or "Format(A, B)", may contain separators.
+            if char in opening:
+                depth += 1
+            elif char in closing and depth:
+                depth -= 1
+            chars.append(char)
+            self.pos += 1
+        return sys.intern("".join(chars).strip())
+
+
+@lru_cache(maxsize=16384)
+def parse_markup(value):
+    # Returns None for plain attribute values (including the "{}" escape), a
+    # MarkupExtension, or a MarkupSyntaxError. Attribute values repeat heavily across
+    # a document, so results are memoized per distinct string.
+    if not value.startswith("{") or value.startswith("{}"):
+        return None
+    parser = _MarkupParser(value)
+    try:
+        node = parser.parse_extension()
+        parser.skip_whitespace()
+        if parser.pos != len(value):
+            parser.error("Unexpected text after markup extension")
+    except ValueError as e:
+        return MarkupSyntaxError(str(e))
+    return node
@@ -0,0 +1,264 @@
+import codecs
+import filecmp
+import io
+import os
+import shutil
+import tempfile
+from xml.parsers import expat
+
+from .cache import ResultCache, cache_key
+from .diagnostics import syntax_error
+from .edits import apply_edits, diff_edits, unified_diff
+from .files import read_xaml_file, write_xaml_file
+from .formatting import FORMATTER_VERSION, format_fragment, remove_whitespace_nodes, stream_format
+from .locations import LineIndex, parse_with_locations
+from .profiling import Profile, profile_stage, stage_progress
+from .resources import project_index
+from .validation import XAMLValidator
+
+_validators = {}
+_caches = {}
+
+
+def default_validator(catalog_paths=()):
+    # One validator per process keeps its rule-routing tables and catalog warm across files.
+    catalog_paths = tuple(catalog_paths)
+    validator = _validators.get(catalog_paths)
+    if validator is None:
+        validator = _validators[catalog_paths] = XAMLValidator(catalog_paths=catalog_paths)
+    return validator
+
+
+def scope_version(resource_scope):
+    # Results depend on the project resources a file can see, so their version is part of the cache key.
+    return "" if resource_scope is None else resource_scope.version
+
+
+def shared_cache(directory=None, max_disk_bytes=64 * 1024 * 1024):
+    # Worker processes reuse one cache per directory for every file they are handed.
+    cache = _caches.get(directory)
+    if cache is None:
+        cache = _caches[directory] = ResultCache(directory=directory, max_disk_bytes=max_disk_bytes)
+    return cache
+
+
+def format_xaml_text(xaml, validator=None, indent="  ", cache=None, profile=None, progress=None, resource_scope=None):
+    # profile (a Profile) collects per-stage and per-rule timings; progress(stage, fraction)
+    # reports how far each stage has got. Neither is used for cached results. resource_scope
+    # is the project's ResourceScope for the file, when it belongs to an indexed project.
+    validator = validator or default_validator()
+    if cache is not None:
+        key = cache_key(xaml, "format", FORMATTER_VERSION, repr(indent), validator.ruleset_version, scope_version(resource_scope))
+        with profile_stage(profile, "cache"):
+            cached = cache.get(key)
+        if cached is not None:
+            return cached
+        formatted_xml, errors = format_xaml_text(xaml, validator, indent, profile=profile, progress=progress, resource_scope=resource_scope)
+        cache.put(key, formatted_xml, errors)
+        return formatted_xml, errors
+
+    try:
+        # Formatting goes straight from expat events to text, and the formatted text is the
+        # one parsed for validation, so every diagnostic points into what the user sees.
+        output = io.StringIO()
+        with profile_stage(profile, "format") as stats:
+            formatter = stream_format(xaml, output, indent, stage_progress(progress, "format"))
+            if stats is not None:
+                stats.elements += formatter.elements
+                stats.attributes += formatter.attributes
+        formatted_xml = output.getvalue()
+        return formatted_xml, parse_and_validate(formatted_xml, validator, profile, progress, resource_scope)
+    except Exception as e:
+        return xaml, [syntax_error(e)]
+
+
+def validate_xaml_text(xaml, validator=None, cache=None, profile=None, progress=None, resource_scope=None):
+    validator = validator or default_validator()
+    if cache is not None:
+        key = cache_key(xaml, "check", validator.ruleset_version, scope_version(resource_scope))
+        with profile_stage(profile, "cache"):
+            cached = cache.get(key)
+        if cached is not None:
+            return cached[1]
+        errors = validate_xaml_text(xaml, validator, profile=profile, progress=progress, resource_scope=resource_scope)
+        cache.put(key, None, errors)
+        return errors
+
+    try:
+        return parse_and_validate(xaml, validator, profile, progress, resource_scope)
+    except Exception as e:
+        return [syntax_error(e)]
+
+
+def parse_and_validate(xaml, validator, profile=None, progress=None, resource_scope=None):
+    with profile_stage(profile, "parse") as stats:
+        parsed_xml, source_map = parse_with_locations(xaml, stage_progress(progress, "parse"))
+        if stats is not None:
+            stats.elements += len(source_map.starts)
+    with profile_stage(profile, "strip_whitespace"):
+        remove_whitespace_nodes(parsed_xml)
+    with profile_stage(profile, "validate"):
+        return validator.validate(parsed_xml, source_map, profile, progress, len(source_map.starts), resource_scope)
+
+
+def enclosing_element(document, source_map, start, end):
+    # The innermost element whose text covers offsets start..end, or None.
+    def covers(node):
+        if node.nodeType != node.ELEMENT_NODE:
+            return False
+        extent = source_map.element_extent(node)
+        return extent is not None and extent[0] <= start and end <= extent[1]
+
+    found = None
+    candidates = [document.documentElement]
+    while candidates:
+        node = next((node for node in candidates if covers(node)), None)
+        if node is None:
+            break
+        found = node
+        candidates = node.childNodes
+    return found
+
+
+def format_xaml_range(xaml, start, end, indent="  ", parsed=None):
+    # Formats just the element enclosing offsets start..end and returns (start, end, text):
+    # the element's extent and its formatted replacement. None when the range is already
+    # formatted, lies outside any element, or the document does not parse; ValueError when
+    # the element's text does not parse on its own. parsed is
+    # (document, source_map) of xaml, when the caller already has one. Whitespace at either
+    # end of the range does not count, so selecting whole lines picks the element they hold.
+    while start < end and xaml[start].isspace():
+        start += 1
+    while end > start and xaml[end - 1].isspace():
+        end -= 1
+    try:
+        document, source_map = parsed or parse_with_locations(xaml)
+    except expat.ExpatError:
+        return None
+    node = enclosing_element(document, source_map, start, end)
+    if node is None:
+        node = document.documentElement
+    extent = source_map.element_extent(node)
+    if extent is None:
+        return None
+    depth = 0
+    parent = node.parentNode
+    while parent is not None and parent.nodeType == parent.ELEMENT_NODE:
+        depth += 1
+        parent = parent.parentNode
+    start, end = extent
+    try:
+        replacement = format_fragment(xaml[start:end], indent, depth)
+    except expat.ExpatError as e:
+        line, column = source_map.position(start)
+        raise ValueError(f"Cannot format the element at line {line}, column {column}: {e}")
+    line_start = xaml.rfind("\n", 0, start) + 1
+    if xaml[line_start:start].strip():
+        replacement = replacement.lstrip()  # Shares its line with other markup; only the element changes.
+    else:
+        start = line_start
+    if replacement == xaml[start:end]:
+        return None
+    return start, end, replacement
+
+
+def format_range_edits(xaml, start, end, indent="  ", parsed=None):
+    # format_xaml_range as a minimal list of TextEdits into xaml. Only the enclosing
+    # element's text is compared with its replacement, so the work beyond parsing grows
+    # with the size of that element, not of the document.
+    edit = format_xaml_range(xaml, start, end, indent, parsed)
+    if edit is None:
+        return []
+    start, end, replacement = edit
+    return diff_edits(xaml[start:end], replacement, base=start)
+
+
+def line_range_offsets(text, first, last):
+    # Offsets spanning lines first..last (1-based, inclusive) of text, clamped to it.
+    lines = LineIndex(text)
+    first = max(1, min(first, len(lines)))
+    start = lines.starts[first - 1]
+    end = lines.starts[last] - 1 if last < len(lines) else len(text)
+    return start, max(start, end)
+
+
+def stream_format_file(path, write=True, indent="  "):
+    # Formats through a temporary file so neither the input nor the output is held in memory.
+    result = {"path": path, "changed": False, "errors": [], "failure": None}
+    temp_path = None
+    try:
+        with open(path, "rb") as source:
+            head = source.read(4096)
+        has_bom = head.startswith(codecs.BOM_UTF8)
+        newline = "\r\n" if b"\r\n" in head else "\n"
+        fd, temp_path = tempfile.mkstemp(suffix=".xaml", dir=os.path.dirname(os.path.abspath(path)) if write else None)
+        with open(path, "rb") as source, open(fd, "w", encoding="utf-8-sig" if has_bom else "utf-8", newline=newline) as out:
+            stream_format(source, out, indent)
+        result["changed"] = not filecmp.cmp(path, temp_path, shallow=False)
+        if result["changed"] and write:
+            shutil.copymode(path, temp_path)
+            os.replace(temp_path, path)
+            temp_path = None
+    except expat.ExpatError as e:
+        result["errors"].append(syntax_error(e))
+    except OSError as e:
+        result["failure"] = str(e)
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+    return result
+
+
+def process_file(path, mode="check", write=True, indent="  ", stream=False, cache_dir=None, cache_size=64 * 1024 * 1024,
+                 catalog_paths=(), profile=False, project_root=None, lines=None, diff=False):
+    # With profile set, the result carries the file's Profile as a dict under "profile".
+    # project_root names a project whose resource index the caller has already updated.
+    # lines, a (first, last) pair of 1-based line numbers, limits formatting to the
+    # elements enclosing them; with diff set, the changes formatting makes are returned as a
+    # unified diff under "diff" ("" for none).
+    if mode == "format" and stream:
+        return stream_format_file(path, write, indent)
+    cache = shared_cache(cache_dir, cache_size) if cache_dir else None
+    validator = default_validator(catalog_paths)
+    resource_scope = project_index(project_root, update=False).scope(path) if project_root else None
+    file_profile = Profile() if profile else None
+    result = {"path": path, "changed": False, "errors": [], "failure": None}
+    if profile:
+        result["profile"] = {}
+    try:
+        text, has_bom, newline = read_xaml_file(path)
+    except (OSError, UnicodeDecodeError) as e:
+        result["failure"] = str(e)
+        return result
+
+    if mode == "format":
+        if lines is not None:
+            try:
+                with profile_stage(file_profile, "format"):
+                    formatted = apply_edits(text, format_range_edits(text, *line_range_offsets(text, *lines), indent))
+            except ValueError as e:
+                result["failure"] = str(e)
+                return result
+            errors = None
+        else:
+            formatted, errors = format_xaml_text(text, validator, indent=indent, cache=cache, profile=file_profile, resource_scope=resource_scope)
+        result["changed"] = formatted != text
+        # Diagnostics point into the text that ends up on disk: the formatted text once it is
+        # written, the original when it is only checked or diffed.
+        written = result["changed"] and write
+        if errors is None or (result["changed"] and not written):
+            errors = validate_xaml_text(formatted if written else text, validator, cache=cache, profile=file_profile,
+                                        resource_scope=resource_scope)
+        result["errors"] = errors
+        if diff:
+            result["diff"] = unified_diff(path, text, formatted)
+        if written:
+            try:
+                write_xaml_file(path, formatted, has_bom, newline)
+            except OSError as e:
+                result["failure"] = str(e)
+    else:
+        result["errors"] = validate_xaml_text(text, validator, cache=cache, profile=file_profile, resource_scope=resource_scope)
+    if profile:
+        result["profile"] = file_profile.to_dict()
+    return result
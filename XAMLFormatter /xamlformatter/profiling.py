@@ -0,0 +1,114 @@
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class StageStats:
+    __slots__ = ("seconds", "calls", "elements", "attributes")
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+        self.elements = 0
+        self.attributes = 0
+
+    def to_dict(self):
+        return {"seconds": self.seconds, "calls": self.calls, "elements": self.elements, "attributes": self.attributes}
+
+
+class Profile:
+    # Wall time, call counts and elements/attributes visited per pipeline stage. Stages are
+    # named "parse", "format", "rule:<name>" and so on; profiles from several files or
+    # worker processes are combined with merge().
+    def __init__(self):
+        self.stages = {}
+
+    def stats(self, name):
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats()
+        return stats
+
+    def add(self, name, seconds=0.0, calls=1, elements=0, attributes=0):
+        stats = self.stats(name)
+        stats.seconds += seconds
+        stats.calls += calls
+        stats.elements += elements
+        stats.attributes += attributes
+
+    @contextmanager
+    def stage(self, name):
+        stats = self.stats(name)
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.seconds += time.perf_counter() - start
+            stats.calls += 1
+
+    def merge(self, other):
+        stages = other.stages.items() if isinstance(other, Profile) else other.items()
+        for name, stats in stages:
+            if isinstance(stats, dict):
+                self.add(name, stats["seconds"], stats["calls"], stats["elements"], stats["attributes"])
+            else:
+                self.add(name, stats.seconds, stats.calls, stats.elements, stats.attributes)
+
+    def clear(self):
+        self.stages.clear()
+
+    def to_dict(self):
+        return {name: stats.to_dict() for name, stats in self.stages.items()}
+
+    def format_table(self):
+        # Top-level stages first, then rules, each ordered by time spent.
+        def order(item):
+            name, stats = item
+            return name.startswith("rule:"), -stats.seconds
+
+        total = sum(stats.seconds for name, stats in self.stages.items() if not name.startswith("rule:"))
+        lines = [f"{'stage':<36} {'ms':>9} {'share':>6} {'calls':>7} {'elements':>9} {'attributes':>10}"]
+        for name, stats in sorted(self.stages.items(), key=order):
+            share = f"{stats.seconds / total * 100:5.1f}%" if total else "     -"
+            lines.append(f"{name:<36} {stats.seconds * 1000:9.2f} {share:>6} {stats.calls:7d} {stats.elements:9d} {stats.attributes:10d}")
+        return "\n".join(lines)
+
+
+def profile_stage(profile, name):
+    # profile.stage(name), or a no-op when profiling is off; yields the stage's StageStats or None.
+    return nullcontext() if profile is None else profile.stage(name)
+
+
+def stage_progress(progress, stage):
+    # Adapts a progress(stage, fraction) callback to the progress(fraction) form used by single steps.
+    if progress is None:
+        return None
+    return lambda fraction: progress(stage, fraction)
+
+
+class StagedProgress:
+    # Turns (stage, fraction) reports from the pipeline into one overall fraction. Each
+    # stage's share of the bar is its share of the time the previous run spent there, so
+    # the bar moves at the rate work actually gets done.
+    default_weights = {"format": 2.0, "parse": 3.0, "strip_whitespace": 0.5, "validate": 4.0}
+
+    def __init__(self, callback, weights=None):
+        self.callback = callback
+        self.set_weights(weights)
+
+    def set_weights(self, weights=None):
+        weights = {name: seconds for name, seconds in (weights or self.default_weights).items() if seconds > 0}
+        total = sum(weights.values()) or 1.0
+        self.offsets = {}
+        offset = 0.0
+        for name, weight in weights.items():
+            self.offsets[name] = (offset, weight / total)
+            offset += weight / total
+
+    def weights_from(self, profile):
+        self.set_weights({name: profile.stages[name].seconds for name in self.default_weights if name in profile.stages})
+
+    def __call__(self, stage, fraction):
+        if stage not in self.offsets:
+            return
+        offset, share = self.offsets[stage]
+        self.callback(offset + share * min(max(fraction, 0.0), 1.0))
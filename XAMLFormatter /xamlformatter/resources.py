@@ -0,0 +1,288 @@
+import hashlib
+import json
+import os
+import posixpath
+import tempfile
+from xml.parsers import expat
+
+from .catalog import XAML_NAMESPACE, user_cache_dir
+from .files import find_xaml_files
+
+# Bump when the stored layout or what a scan records changes, so old indexes are rebuilt.
+INDEX_FORMAT_VERSION = 2
+
+PROJECT_MARKERS = (".csproj", ".sln")
+KEY_ATTRIBUTE = f"{XAML_NAMESPACE} Key"
+
+_indexes = {}
+
+
+def find_project_root(path):
+    # Nearest directory at or above path holding a project/solution file or App.xaml.
+    directory = os.path.abspath(path if os.path.isdir(path) else os.path.dirname(path))
+    while True:
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            names = []
+        if any(name.endswith(PROJECT_MARKERS) or name.lower() == "app.xaml" for name in names):
+            return directory
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+def scan_resources(data):
+    # What one file contributes to the project: x:Keys declared directly in a resource
+    # dictionary, implicit styles by TargetType, and the Sources of its merged dictionaries.
+    # Only expat events are looked at, no DOM is built.
+    keys = {}
+    target_types = {}
+    merged = []
+    stack = []
+    entry = {"application": False, "keys": keys, "target_types": target_types, "merged": merged}
+    parser = expat.ParserCreate(namespace_separator=" ")
+
+    def start(name, attributes):
+        local = name.rpartition(" ")[2]
+        if not stack:
+            entry["application"] = local == "Application"
+        parent = stack[-1] if stack else ""
+        if parent == "ResourceDictionary" or parent.endswith(".Resources"):
+            position = [parser.CurrentLineNumber, parser.CurrentColumnNumber]
+            key = attributes.get(KEY_ATTRIBUTE)
+            if key:
+                keys.setdefault(key, position)
+            elif local == "Style" and attributes.get("TargetType"):
+                target_types.setdefault(attributes["TargetType"], []).append(position)
+        if local == "ResourceDictionary" and parent.endswith(".MergedDictionaries") and attributes.get("Source"):
+            merged.append(attributes["Source"])
+        stack.append(local)
+
+    parser.StartElementHandler = start
+    parser.EndElementHandler = lambda name: stack.pop()
+    try:
+        parser.Parse(data, True)
+    except expat.ExpatError:
+        pass  # Keep whatever was declared before the error; the file's own check reports it.
+    # What other files can observe, positions aside: edits that only move or restyle
+    # markup leave it unchanged and so do not invalidate the files that depend on this one.
+    observable = [entry["application"], sorted(keys), sorted(target_types), merged]
+    entry["digest"] = hashlib.sha256(json.dumps(observable).encode("utf-8")).hexdigest()
+    return entry
+
+
+class ResourceScope:
+    # The resources one file can reference besides its own: the application's dictionaries
+    # and the dictionaries the file merges, transitively. lookup() is a single dict probe.
+    def __init__(self, definitions, version):
+        self.definitions = definitions  # Key -> (path, line, column) of its definition.
+        self.version = version
+
+    def __contains__(self, key):
+        return key in self.definitions
+
+    def lookup(self, key):
+        return self.definitions.get(key)
+
+
+class ResourceIndex:
+    # Resource keys and implicit styles for every XAML file under a project root, kept in
+    # the user cache directory between runs. update() rescans only files whose size or
+    # mtime changed and whose content hash no longer matches.
+    def __init__(self, root, cache_dir=None):
+        self.root = os.path.abspath(root)
+        digest = hashlib.sha256(os.path.normcase(self.root).encode("utf-8")).hexdigest()[:24]
+        self.path = os.path.join(cache_dir or user_cache_dir(), f"resources-{digest}.json")
+        self.files = {}  # Root-relative "/" path -> entry from scan_resources() plus stat and hash.
+        self.definitions = {}  # Key -> [(path, line, column)], every file defining it.
+        self.styles = {}  # TargetType -> [(path, line, column)] of implicit styles.
+        self.dirty = False
+        self._moved = False
+        self._closures = {}
+        self._scopes = {}
+
+    def relative(self, path):
+        return os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, "/")
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return self
+        if data.get("version") == INDEX_FORMAT_VERSION and data.get("root") == self.root:
+            self.files = data["files"]
+            self._rebuild()
+        return self
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+        try:
+            with open(fd, "w", encoding="utf-8") as file:
+                json.dump({"version": INDEX_FORMAT_VERSION, "root": self.root, "files": self.files}, file)
+            os.replace(temp_path, self.path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        self.dirty = False
+
+    def update(self, paths=None):
+        # Brings the index up to date with the files on disk (all of them, or just paths)
+        # and returns the relative paths whose resources changed: added, removed, or with a
+        # different set of keys, implicit styles or merged dictionaries.
+        changed = []
+        seen = set()
+        for path in find_xaml_files([self.root] if paths is None else paths):
+            rel = self.relative(path)
+            if rel.startswith("../"):
+                continue
+            seen.add(rel)
+            if self._refresh(path, rel):
+                changed.append(rel)
+        if paths is None:
+            removed = [rel for rel in self.files if rel not in seen]
+        else:
+            removed = [self.relative(path) for path in paths if self.relative(path) in self.files and not os.path.exists(path)]
+        for rel in removed:
+            del self.files[rel]
+        changed.extend(removed)
+        if changed or self._moved:
+            self.dirty = True
+            self._moved = False
+            self._rebuild()
+        return changed
+
+    def _refresh(self, path, rel):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        entry = self.files.get(rel)
+        if entry is not None and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return False
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except OSError:
+            return False
+        digest = hashlib.sha256(data).hexdigest()
+        if entry is not None and entry["sha256"] == digest:
+            # Touched but not edited: remember the new stat so the next update skips the hash.
+            entry["mtime_ns"], entry["size"] = stat.st_mtime_ns, stat.st_size
+            self.dirty = True
+            return False
+        previous = entry
+        entry = scan_resources(data)
+        entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size, sha256=digest)
+        self.files[rel] = entry
+        if previous is not None and previous["digest"] == entry["digest"]:
+            # Same resources, perhaps at new positions: definitions are refreshed at the end
+            # of update() without reporting a change.
+            self.dirty = self._moved = True
+            return False
+        return True
+
+    def _rebuild(self):
+        self.definitions = {}
+        self.styles = {}
+        for rel, entry in sorted(self.files.items()):
+            for key, (line, column) in entry["keys"].items():
+                self.definitions.setdefault(key, []).append((rel, line, column))
+            for target_type, positions in entry["target_types"].items():
+                self.styles.setdefault(target_type, []).extend((rel, line, column) for line, column in positions)
+        self._closures.clear()
+        self._scopes.clear()
+
+    def resolve_source(self, rel, source):
+        # A merged dictionary's Source as a relative path in the index, or None. ms-appx:///
+        # URIs are rooted at the package, which may or may not start with the project's name.
+        source = source.strip().replace("\\", "/")
+        if source.lower().startswith("ms-appx:///"):
+            target = source[len("ms-appx:///"):]
+            candidates = [target, target.partition("/")[2]]
+        elif "://" in source:
+            return None
+        elif source.startswith("/"):
+            candidates = [source[1:]]
+        else:
+            candidates = [posixpath.normpath(posixpath.join(posixpath.dirname(rel), source))]
+        for candidate in candidates:
+            if candidate in self.files:
+                return candidate
+        return None
+
+    def closure(self, rel):
+        # rel and every dictionary it merges, directly or through other dictionaries.
+        closure = self._closures.get(rel)
+        if closure is None:
+            closure = set()
+            pending = [rel]
+            while pending:
+                current = pending.pop()
+                if current in closure or current not in self.files:
+                    continue
+                closure.add(current)
+                for source in self.files[current]["merged"]:
+                    target = self.resolve_source(current, source)
+                    if target is not None:
+                        pending.append(target)
+            self._closures[rel] = closure = frozenset(closure)
+        return closure
+
+    def application_closure(self):
+        # Application resources are visible everywhere. A project without an Application
+        # file (a control library, say) is assumed to be merged whole by whoever uses it.
+        applications = [rel for rel, entry in self.files.items() if entry["application"]]
+        if not applications:
+            return frozenset(self.files)
+        return frozenset().union(*(self.closure(rel) for rel in applications))
+
+    def scope(self, path):
+        # ResourceScope for the file at path. The file itself is left out: its own keys come
+        # from the text being validated, which may be newer than what is on disk.
+        rel = self.relative(path)
+        scope = self._scopes.get(rel)
+        if scope is None:
+            contributing = (self.application_closure() | self.closure(rel)) - {rel}
+            definitions = {}
+            digest = hashlib.sha256()
+            for source in sorted(contributing):
+                entry = self.files[source]
+                digest.update(f"{source}\0{entry['digest']}\0".encode("utf-8"))
+                for key, (line, column) in entry["keys"].items():
+                    definitions.setdefault(key, (source, line, column))
+            scope = self._scopes[rel] = ResourceScope(definitions, digest.hexdigest()[:16])
+        return scope
+
+    def dependents(self, changed):
+        # Relative paths of the files whose scope includes any of the changed files.
+        changed = set(changed)
+        if not changed:
+            return []
+        if changed & self.application_closure():
+            return list(self.files)
+        return [rel for rel in self.files if rel not in changed and self.closure(rel) & changed]
+
+    def find(self, key):
+        return self.definitions.get(key, [])
+
+    def find_style(self, target_type):
+        return self.styles.get(target_type, [])
+
+
+def project_index(root, cache_dir=None, update=True):
+    # One index per project root and process. Worker processes pass update=False and read
+    # what the main process has already brought up to date and saved.
+    index = _indexes.get(root)
+    if index is None:
+        index = _indexes[root] = ResourceIndex(root, cache_dir).load()
+    if update:
+        index.update()
+        index.save()
+    return index
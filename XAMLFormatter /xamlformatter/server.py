@@ -0,0 +1,342 @@
+import json
+import queue
+import sys
+import threading
+from urllib.parse import unquote, urlparse
+from urllib.request import url2pathname
+from xml.parsers import expat
+
+from .edits import diff_edits
+from .locations import LineIndex, parse_with_locations
+from .pipeline import default_validator, format_range_edits, format_xaml_text, shared_cache, validate_xaml_text
+from .resources import find_project_root, project_index
+
+# JSON-RPC error codes used by the Language Server Protocol.
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+SERVER_NOT_INITIALIZED = -32002
+REQUEST_FAILED = -32803
+
+SYNC_INCREMENTAL = 2
+SEVERITY_ERROR = 1
+
+
+def uri_to_path(uri):
+    parsed = urlparse(uri)
+    if parsed.scheme != "file":
+        return None
+    return url2pathname(unquote(parsed.path))
+
+
+def read_message(stream):
+    # One "Content-Length: n" framed message, or None at end of input.
+    length = None
+    while True:
+        line = stream.readline()
+        if not line:
+            return None
+        line = line.strip()
+        if not line:
+            break
+        name, _, value = line.decode("ascii").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    if length is None:
+        return None
+    return json.loads(stream.read(length).decode("utf-8"))
+
+
+def write_message(stream, message):
+    body = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    stream.write(f"Content-Length: {len(body)}\r\n\r\n".encode("ascii") + body)
+    stream.flush()
+
+
+class Document:
+    # An open editor buffer. Lines and columns here are the pipeline's (1-based lines,
+    # character columns); the server converts them to the client's position encoding.
+    def __init__(self, uri, text, version):
+        self.uri = uri
+        self.path = uri_to_path(uri)
+        self.version = version
+        self.project_root = None
+        self.resource_scope = None
+        self.set_text(text)
+
+    def set_text(self, text):
+        self.text = text
+        self.lines = LineIndex(text)
+        self._parsed = None
+
+    def source(self):
+        # The text the pipeline sees; read_xaml_file normalizes line endings the same way.
+        return self.text.replace("\r\n", "\n")
+
+    def parsed(self):
+        # (document, source_map) of the current text, kept until the next edit.
+        if self._parsed is None:
+            self._parsed = parse_with_locations(self.source())
+        return self._parsed
+
+    def line_text(self, line):
+        line_starts = self.lines.starts
+        start = line_starts[line - 1]
+        end = line_starts[line] if line < len(line_starts) else len(self.text)
+        return self.text[start:end]
+
+    def to_client(self, line, column, utf16):
+        if utf16:
+            column += sum(1 for char in self.line_text(line)[:column] if ord(char) > 0xFFFF)
+        return {"line": line - 1, "character": column}
+
+    def from_client(self, position, utf16):
+        # Offset into self.text of an LSP position, clamped to the document.
+        line_starts = self.lines.starts
+        line = position["line"] + 1
+        if line > len(line_starts):
+            return len(self.text)
+        column = position["character"]
+        if utf16:
+            text = self.line_text(line)
+            units = 0
+            for index, char in enumerate(text):
+                if units >= column:
+                    column = index
+                    break
+                units += 2 if ord(char) > 0xFFFF else 1
+            else:
+                column = len(text)
+        return min(line_starts[line - 1] + column, len(self.text))
+
+    def apply_change(self, change, utf16):
+        if "range" not in change:
+            self.set_text(change["text"])
+            return
+        start = self.from_client(change["range"]["start"], utf16)
+        end = self.from_client(change["range"]["end"], utf16)
+        self.set_text(self.text[:start] + change["text"] + self.text[end:])
+
+
+class LanguageServer:
+    # Validation, formatting and range formatting over the Language Server Protocol on
+    # stdio. One process keeps the validator's routing tables, the catalog, the result
+    # cache, project resource indexes and each open document's latest parse warm between
+    # requests. Messages are read on a separate thread; edits that arrive in a burst are
+    # validated once, after the last of them has been applied.
+    def __init__(self, reader, writer, catalog_paths=(), cache_dir=None, cache_size=64 * 1024 * 1024):
+        self.reader = reader
+        self.writer = writer
+        self.validator = default_validator(catalog_paths)
+        self.cache = shared_cache(cache_dir, cache_size)
+        self.documents = {}
+        self.indexes = {}  # Project root -> ResourceIndex.
+        self.pending = {}  # uri -> Document waiting to be validated.
+        self.messages = queue.Queue()
+        self.utf16 = True
+        self.initialized = False
+        self.shutting_down = False
+        self.handlers = {
+            "initialize": self.initialize,
+            "initialized": lambda params: None,
+            "shutdown": self.shutdown,
+            "textDocument/didOpen": self.did_open,
+            "textDocument/didChange": self.did_change,
+            "textDocument/didSave": self.did_save,
+            "textDocument/didClose": self.did_close,
+            "textDocument/formatting": self.formatting,
+            "textDocument/rangeFormatting": self.range_formatting,
+        }
+
+    def serve(self):
+        threading.Thread(target=self._read_messages, daemon=True).start()
+        while True:
+            message = self.messages.get()
+            if message is None or message.get("method") == "exit":
+                return 0 if self.shutting_down else 1
+            self.dispatch(message)
+            if self.messages.empty():
+                self.validate_pending()
+
+    def _read_messages(self):
+        try:
+            while True:
+                message = read_message(self.reader)
+                self.messages.put(message)
+                # Stop reading at exit too, so no thread is left blocked on stdin at shutdown.
+                if message is None or message.get("method") == "exit":
+                    return
+        except (OSError, ValueError):
+            self.messages.put(None)
+
+    def send(self, message):
+        message["jsonrpc"] = "2.0"
+        write_message(self.writer, message)
+
+    def notify(self, method, params):
+        self.send({"method": method, "params": params})
+
+    def dispatch(self, message):
+        method = message.get("method")
+        request_id = message.get("id")
+        handler = self.handlers.get(method)
+        if handler is None:
+            # Unknown notifications, $/cancelRequest included, are ignored; requests get an error.
+            if request_id is not None and method is not None:
+                self.send({"id": request_id, "error": {"code": METHOD_NOT_FOUND, "message": f"Unsupported method: {method}"}})
+            return
+        if not self.initialized and method != "initialize":
+            if request_id is not None:
+                self.send({"id": request_id, "error": {"code": SERVER_NOT_INITIALIZED, "message": "Server not initialized"}})
+            return
+        try:
+            result = handler(message.get("params") or {})
+        except (KeyError, TypeError) as e:
+            if request_id is not None:
+                self.send({"id": request_id, "error": {"code": INVALID_PARAMS, "message": f"Invalid params: {e}"}})
+            return
+        except ValueError as e:
+            # The request was understood but cannot be carried out, as for a range that cannot be formatted.
+            if request_id is not None:
+                self.send({"id": request_id, "error": {"code": REQUEST_FAILED, "message": str(e)}})
+            return
+        except Exception as e:
+            if request_id is not None:
+                self.send({"id": request_id, "error": {"code": INTERNAL_ERROR, "message": str(e)}})
+            return
+        if request_id is not None:
+            self.send({"id": request_id, "result": result})
+
+    def initialize(self, params):
+        self.initialized = True
+        # Columns are counted in characters; clients that accept that are spared the UTF-16 conversion.
+        encodings = params.get("capabilities", {}).get("general", {}).get("positionEncodings", ())
+        self.utf16 = "utf-32" not in encodings
+        return {
+            "capabilities": {
+                "positionEncoding": "utf-16" if self.utf16 else "utf-32",
+                "textDocumentSync": {"openClose": True, "change": SYNC_INCREMENTAL, "save": {"includeText": False}},
+                "documentFormattingProvider": True,
+                "documentRangeFormattingProvider": True
+            },
+            "serverInfo": {"name": "xamlformatter"}
+        }
+
+    def shutdown(self, params):
+        self.shutting_down = True
+        return None
+
+    def did_open(self, params):
+        item = params["textDocument"]
+        document = self.documents[item["uri"]] = Document(item["uri"], item["text"], item.get("version"))
+        if document.path:
+            document.project_root = find_project_root(document.path)
+        if document.project_root:
+            # The first document from a project indexes it; later ones reuse the index.
+            index = self.indexes.get(document.project_root)
+            if index is None:
+                index = self.indexes[document.project_root] = project_index(document.project_root)
+            document.resource_scope = index.scope(document.path)
+        self.pending[document.uri] = document
+
+    def did_change(self, params):
+        document = self.documents.get(params["textDocument"]["uri"])
+        if document is None:
+            return
+        for change in params["contentChanges"]:
+            document.apply_change(change, self.utf16)
+        document.version = params["textDocument"].get("version")
+        self.pending[document.uri] = document
+
+    def did_save(self, params):
+        # A saved dictionary may define keys other open documents use, so every open
+        # document in the same project is validated again against the updated index.
+        document = self.documents.get(params["textDocument"]["uri"])
+        if document is None or document.project_root is None:
+            return
+        index = self.indexes[document.project_root]
+        if not index.update([document.path]):
+            return
+        index.save()
+        for other in self.documents.values():
+            if other.project_root == document.project_root:
+                other.resource_scope = index.scope(other.path)
+                self.pending[other.uri] = other
+
+    def did_close(self, params):
+        uri = params["textDocument"]["uri"]
+        self.documents.pop(uri, None)
+        self.pending.pop(uri, None)
+        self.notify("textDocument/publishDiagnostics", {"uri": uri, "diagnostics": []})
+
+    def validate_pending(self):
+        pending = list(self.pending.values())
+        self.pending.clear()
+        for document in pending:
+            errors = validate_xaml_text(document.source(), self.validator, cache=self.cache, resource_scope=document.resource_scope)
+            self.notify("textDocument/publishDiagnostics", {
+                "uri": document.uri,
+                "version": document.version,
+                "diagnostics": [self.to_lsp_diagnostic(document, error) for error in errors]
+            })
+
+    def to_lsp_diagnostic(self, document, error):
+        if error.located:
+            start = document.to_client(error.line, error.column, self.utf16)
+            end = document.to_client(error.end_line, error.end_column, self.utf16)
+        else:
+            start = end = {"line": 0, "character": 0}
+        diagnostic = {"range": {"start": start, "end": end}, "severity": SEVERITY_ERROR, "source": "xamlformatter", "message": error.message}
+        if error.rule:
+            diagnostic["code"] = error.rule
+        return diagnostic
+
+    def text_edits(self, document, edits, lines):
+        # LSP TextEdits for TextEdits into document.source(); lines is its LineIndex.
+        crlf = "\r\n" in document.text
+        return [{
+            "range": {
+                "start": document.to_client(*lines.position(edit.start), self.utf16),
+                "end": document.to_client(*lines.position(edit.end), self.utf16)
+            },
+            "newText": edit.text.replace("\n", "\r\n") if crlf else edit.text
+        } for edit in edits]
+
+    @staticmethod
+    def indent_for(options):
+        if not options.get("insertSpaces", True):
+            return "\t"
+        return " " * options.get("tabSize", 2)
+
+    def formatting(self, params):
+        # Only the places formatting changes are sent back, so the client keeps the cursor,
+        # folds and markers everywhere else.
+        document = self.documents[params["textDocument"]["uri"]]
+        source = document.source()
+        formatted, errors = format_xaml_text(source, self.validator, self.indent_for(params.get("options", {})), cache=self.cache,
+                                             resource_scope=document.resource_scope)
+        edits = diff_edits(source, formatted)
+        if not edits:
+            return []
+        return self.text_edits(document, edits, LineIndex(source))
+
+    def range_formatting(self, params):
+        document = self.documents[params["textDocument"]["uri"]]
+        try:
+            parsed = document.parsed()
+        except expat.ExpatError:
+            return []
+        source_map = parsed[1]
+        # Offsets in the raw text and the normalized source agree up to the line break, so
+        # the client's range is carried over by line and column.
+        start_offset = document.from_client(params["range"]["start"], self.utf16)
+        end_offset = document.from_client(params["range"]["end"], self.utf16)
+        start = source_map.offset(*document.lines.position(start_offset))
+        end = source_map.offset(*document.lines.position(end_offset))
+        edits = format_range_edits(document.source(), start, end, self.indent_for(params.get("options", {})), parsed)
+        return self.text_edits(document, edits, source_map.lines())
+
+
+def serve(catalog_paths=(), cache_dir=None, cache_size=64 * 1024 * 1024):
+    server = LanguageServer(sys.stdin.buffer, sys.stdout.buffer, catalog_paths, cache_dir, cache_size)
+    return server.serve()
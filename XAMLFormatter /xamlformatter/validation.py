@@ -0,0 +1,518 @@
+import hashlib
+import re
+import time
+from xml.dom import minidom
+
+from .catalog import PRESENTATION_NAMESPACE, XAML_NAMESPACE, XML_NAMESPACE, XMLNS_NAMESPACE, catalog_key, load_catalog
+from .diagnostics import Diagnostic
+from .markup import BINDING_EXTENSIONS, KNOWN_EXTENSIONS, RESOURCE_EXTENSIONS, MarkupExtension, MarkupSyntaxError, parse_markup
+
+ALL = "*"
+
+# Bump when a built-in rule changes what it reports, so cached results are not reused.
+RULESET_VERSION = 7
+
+
+def iter_extensions(attr_value):
+    # Every markup extension in an attribute value, nested ones included.
+    node = parse_markup(attr_value)
+    if isinstance(node, MarkupExtension):
+        return node.walk()
+    return ()
+
+
+def iter_elements(xml_node):
+    # Same document order as getElementsByTagName("*"), without building a NodeList per call.
+    stack = list(reversed(xml_node.childNodes))
+    while stack:
+        node = stack.pop()
+        if node.nodeType == minidom.Node.ELEMENT_NODE:
+            yield node
+            if node.childNodes:
+                stack.extend(reversed(node.childNodes))
+
+
+class VisitCursor:
+    __slots__ = ("node", "attribute")
+
+    def __init__(self):
+        self.node = None
+        self.attribute = None
+
+
+class DiagnosticList(list):
+    # A rule's error list. Plain-string errors are attributed to the element (and attribute)
+    # the validator is visiting when they are appended; errors appended from finish() get no node.
+    __slots__ = ("cursor",)
+
+    def __init__(self, cursor):
+        super().__init__()
+        self.cursor = cursor
+
+    def append(self, error):
+        if isinstance(error, str):
+            error = Diagnostic(error, node=self.cursor.node, attribute=self.cursor.attribute)
+        elif error.node is None and not error.located:
+            error.node = self.cursor.node
+            error.attribute = self.cursor.attribute
+        super().append(error)
+
+
+def resolve_location(error, source_map):
+    # Turns the node an error names into a text range and drops the node reference, so
+    # diagnostics can be cached and sent between processes.
+    if error.node is not None and source_map is not None and not error.located:
+        if error.attribute is None:
+            text_range = source_map.element_range(error.node)
+        else:
+            text_range = source_map.attribute_range(error.node, error.attribute)
+        if text_range is not None:
+            error.line, error.column, error.end_line, error.end_column = text_range
+    error.node = None
+    error.attribute = None
+
+
+class ValidationRule:
+    name = None
+    element_tags = ()  # Tag names routed to visit_element, or ALL.
+    attribute_names = ()  # Attribute names routed to visit_attribute, or ALL.
+
+    def __init__(self, validator=None, resource_scope=None):
+        self.validator = validator
+        self.resource_scope = resource_scope  # Project resources visible to the document, if known.
+
+    @classmethod
+    def matches_element(cls, tag_name):
+        return cls.element_tags == ALL or tag_name in cls.element_tags
+
+    @classmethod
+    def matches_attribute(cls, attr_name):
+        return cls.attribute_names == ALL or attr_name in cls.attribute_names
+
+    def start(self, xml_node):
+        pass
+
+    def visit_element(self, node, errors):
+        pass
+
+    def visit_attribute(self, node, attr_name, attr_value, errors):
+        pass
+
+    def finish(self, errors):
+        pass
+
+
+class MissingTagsRule(ValidationRule):
+    name = "missing_tags"
+    element_tags = ALL
+
+    def visit_element(self, node, errors):
+        if not node.hasChildNodes() and not node.hasAttributes():
+            errors.append(f"Element <{node.tagName}> is empty and might be missing child elements or attributes.")
+
+
+def element_type(node):
+    # (namespace, type name, property name) for an element. Property elements such as
+    # <Grid.RowDefinitions> name their owner type and the property they set.
+    namespace = node.namespaceURI or PRESENTATION_NAMESPACE
+    name, _, prop = (node.localName or node.tagName).partition(".")
+    return namespace, name, prop
+
+
+class UnknownElementsRule(ValidationRule):
+    name = "unknown_elements"
+    element_tags = ALL
+
+    def visit_element(self, node, errors):
+        catalog = self.validator.catalog
+        namespace, name, prop = element_type(node)
+        if catalog.is_ignored(namespace) or not catalog.describes(namespace):
+            return
+        if not catalog.is_owner(namespace, name):
+            errors.append(f"Unknown element: <{node.tagName}>")
+        elif prop and not catalog.has_member(namespace, name, prop):
+            errors.append(f"Unknown property '{prop}' in property element <{node.tagName}>")
+
+
+class InvalidAttributesRule(ValidationRule):
+    name = "invalid_attributes"
+    element_tags = ALL
+
+    def visit_element(self, node, errors):
+        if not node.hasAttributes():
+            return
+        catalog = self.validator.catalog
+        namespace, name, prop = element_type(node)
+        entry = catalog.lookup(namespace, name)
+        if entry is None or prop:
+            # Unknown types are reported by UnknownElementsRule, and property elements take no attributes of their own.
+            return
+        members = entry[1]
+        for attr in node.attributes.values():
+            attr_namespace = attr.namespaceURI
+            attr_name = attr.localName or attr.name
+            if attr_namespace in (XMLNS_NAMESPACE, XML_NAMESPACE) or attr.name == "xmlns" or catalog.is_ignored(attr_namespace):
+                continue
+            if attr_namespace == XAML_NAMESPACE:
+                if attr_name not in catalog.directives:
+                    errors.append(Diagnostic(f"Unknown attribute {attr.name} in element <{node.tagName}>", node=node, attribute=attr.name))
+                continue
+            owner, _, member = attr_name.rpartition(".")
+            if owner:
+                # Attached property; an unprefixed owner lives in the presentation namespace.
+                owner_namespace = attr_namespace or PRESENTATION_NAMESPACE
+                if catalog.describes(owner_namespace) and not catalog.has_member(owner_namespace, owner, member):
+                    errors.append(Diagnostic(f"Unknown attribute {attr.name} in element <{node.tagName}>", node=node, attribute=attr.name))
+            elif attr_namespace is None and attr_name not in members:
+                errors.append(Diagnostic(f"Unknown attribute {attr.name} in element <{node.tagName}>", node=node, attribute=attr.name))
+
+
+class BindingErrorsRule(ValidationRule):
+    name = "binding_errors"
+    attribute_names = ALL
+
+    def visit_attribute(self, node, attr_name, attr_value, errors):
+        for extension in iter_extensions(attr_value):
+            if extension.name in BINDING_EXTENSIONS:
+                path = extension.get("Path")
+                if path is not None and not path:  # Simplified check, more detailed checks can be implemented.
+                    errors.append(f"Binding path error in attribute {attr_name} of element <{node.tagName}>")
+
+
+class ResourceErrorsRule(ValidationRule):
+    name = "resource_errors"
+    attribute_names = ALL
+    checked_extensions = frozenset({"StaticResource", "DynamicResource"})
+
+    @classmethod
+    def matches_element(cls, tag_name):
+        return tag_name == "ResourceDictionary" or "Resource" in tag_name
+
+    def start(self, xml_node):
+        self.resources = set()
+        self.references = []
+
+    def visit_element(self, node, errors):
+        for child in node.childNodes:
+            if child.nodeType == minidom.Node.ELEMENT_NODE and 'x:Key' in child.attributes:
+                self.resources.add(child.attributes['x:Key'].value)
+
+    def visit_attribute(self, node, attr_name, attr_value, errors):
+        for extension in iter_extensions(attr_value):
+            if extension.name in self.checked_extensions:
+                resource_key = extension.argument("ResourceKey")
+                if isinstance(resource_key, str) and resource_key:
+                    self.references.append((resource_key, node, attr_name))
+
+    def finish(self, errors):
+        # Keys may be declared after their first use, so references are resolved once the walk
+        # is done: against the document's own keys, then the framework's, then the project's.
+        system_keys = self.validator.catalog.resource_keys if self.validator is not None else frozenset()
+        scope = self.resource_scope
+        for key, node, attr_name in self.references:
+            if key not in self.resources and key not in system_keys and (scope is None or key not in scope):
+                errors.append(Diagnostic(f"Resource '{key}' not found in element <{node.tagName}>", node=node, attribute=attr_name))
+
+
+class StyleTemplateErrorsRule(ValidationRule):
+    name = "style_template_errors"
+
+    @classmethod
+    def matches_element(cls, tag_name):
+        return "Style" in tag_name or "Template" in tag_name
+
+    def visit_element(self, node, errors):
+        if 'TargetType' not in node.attributes:
+            errors.append(f"Style or Template in element <{node.tagName}> missing 'TargetType' attribute")
+        if node.tagName == "Style" and 'BasedOn' in node.attributes:
+            based_on = node.attributes['BasedOn'].value
+            extension = parse_markup(based_on)
+            if not isinstance(extension, MarkupExtension) or extension.name not in RESOURCE_EXTENSIONS or not extension.argument("ResourceKey"):
+                errors.append(f"Invalid BasedOn reference '{based_on}' in <{node.tagName}>")
+
+
+class NamespaceErrorsRule(ValidationRule):
+    name = "namespace_errors"
+
+    @classmethod
+    def matches_attribute(cls, attr_name):
+        return ':' in attr_name
+
+    def visit_attribute(self, node, attr_name, attr_value, errors):
+        # A prefix is defined when the parser bound the attribute to a namespace; xmlns: declarations
+        # and the predeclared xml: prefix are never bound that way and need no check.
+        prefix = attr_name.split(':')[0]
+        if prefix in ("xmlns", "xml"):
+            return
+        attribute = node.getAttributeNode(attr_name)
+        if attribute is None or not attribute.namespaceURI:
+            errors.append(f"Namespace prefix '{prefix}' not defined for attribute {attr_name} in element <{node.tagName}>")
+
+
+class ControlErrorsRule(ValidationRule):
+    name = "control_errors"
+    element_tags = ALL
+
+    def visit_element(self, node, errors):
+        namespace, name, prop = element_type(node)
+        entry = self.validator.catalog.lookup(namespace, name)
+        if entry is not None and entry[0] and not prop:
+            errors.append(f"Abstract type <{node.tagName}> cannot be used as an element")
+
+
+class EventHandlerErrorsRule(ValidationRule):
+    name = "event_handler_errors"
+    event_pattern = re.compile(r'^[A-Za-z_]\w*$')
+
+    @classmethod
+    def matches_attribute(cls, attr_name):
+        return 'Click' in attr_name or 'Handler' in attr_name
+
+    def visit_attribute(self, node, attr_name, attr_value, errors):
+        if not self.event_pattern.match(attr_value):
+            errors.append(f"Invalid event handler name '{attr_value}' in attribute {attr_name} of element <{node.tagName}>")
+
+
+class TemplateBindingErrorsRule(ValidationRule):
+    name = "template_binding_errors"
+    attribute_names = ALL
+
+    def visit_attribute(self, node, attr_name, attr_value, errors):
+        for extension in iter_extensions(attr_value):
+            if extension.name == "TemplateBinding":
+                property_name = extension.argument("Property")
+                if isinstance(property_name, str) and property_name not in node.attributes:
+                    errors.append(f"Invalid TemplateBinding '{property_name}' in element <{node.tagName}>")
+
+
+class VisualTreeErrorsRule(ValidationRule):
+    name = "visual_tree_errors"
+    element_tags = frozenset({"VisualTree"})
+
+    def visit_element(self, node, errors):
+        if not node.hasChildNodes():
+            errors.append(f"VisualTree element <{node.tagName}> is empty")
+
+
+class DataTemplateErrorsRule(ValidationRule):
+    name = "datatemplate_errors"
+    element_tags = frozenset({"DataTemplate"})
+
+    def visit_element(self, node, errors):
+        if not node.hasChildNodes():
+            errors.append(f"DataTemplate element <{node.tagName}> is empty")
+
+
+class ConverterErrorsRule(ValidationRule):
+    # Converters are instances declared as resources, so a binding's Converter must be a
+    # resource reference rather than a type name or a converter used as an extension.
+    name = "converter_errors"
+    attribute_names = ALL
+
+    def visit_attribute(self, node, attr_name, attr_value, errors):
+        parsed = parse_markup(attr_value)
+        if not isinstance(parsed, MarkupExtension):
+            return
+        if parsed.name.endswith("Converter"):
+            errors.append(f"Converter '{parsed.name}' not found in element <{node.tagName}>")
+            return
+        for extension in parsed.walk():
+            if extension.name in BINDING_EXTENSIONS:
+                converter = extension.get("Converter")
+                if isinstance(converter, str):
+                    errors.append(f"Converter '{converter}' not found in element <{node.tagName}>")
+                elif converter is not None and converter.name not in RESOURCE_EXTENSIONS:
+                    errors.append(f"Converter '{converter.name}' not found in element <{node.tagName}>")
+
+
+class StyleConflictsRule(ValidationRule):
+    name = "style_conflicts"
+    element_tags = frozenset({"Style"})
+
+    def start(self, xml_node):
+        self.target_types = []
+        self.target_type_counts = {}
+
+    def visit_element(self, node, errors):
+        if 'TargetType' in node.attributes:
+            target_type = node.attributes['TargetType'].value
+            self.target_types.append((target_type, node))
+            self.target_type_counts[target_type] = self.target_type_counts.get(target_type, 0) + 1
+
+    def finish(self, errors):
+        for target_type, node in self.target_types:
+            if self.target_type_counts[target_type] > 1:
+                errors.append(Diagnostic(f"Conflicting styles for TargetType '{target_type}' in element <Style>", node=node, attribute="TargetType"))
+
+
+class AnimationStoryboardErrorsRule(ValidationRule):
+    name = "animation_storyboard_errors"
+    element_tags = frozenset({"Storyboard"})
+
+    def visit_element(self, node, errors):
+        for child in node.childNodes:
+            if child.nodeType == minidom.Node.ELEMENT_NODE and 'TargetProperty' not in child.attributes:
+                errors.append(Diagnostic(f"Animation <{child.tagName}> in Storyboard missing 'TargetProperty' attribute", node=child))
+
+
+class MarkupExtensionErrorsRule(ValidationRule):
+    name = "markup_extension_errors"
+    attribute_names = ALL
+
+    def visit_attribute(self, node, attr_name, attr_value, errors):
+        parsed = parse_markup(attr_value)
+        if isinstance(parsed, MarkupSyntaxError):
+            errors.append(f"Invalid markup extension in attribute {attr_name} of element <{node.tagName}>: {parsed.message}")
+            return
+        if parsed is None:
+            return
+        for extension in parsed.walk():
+            # Prefixed names other than x: are custom extensions from the project's own namespaces.
+            if extension.name not in KNOWN_EXTENSIONS and (":" not in extension.name or extension.name.startswith("x:")):
+                if not extension.name.endswith("Converter"):  # Reported by converter_errors.
+                    errors.append(f"MarkupExtension '{extension.name}' not found in element <{node.tagName}>")
+
+
+class ControlTemplatePartErrorsRule(ValidationRule):
+    name = "control_template_part_errors"
+
+    @classmethod
+    def matches_element(cls, tag_name):
+        return "ControlTemplate" in tag_name
+
+    def visit_element(self, node, errors):
+        for child in node.childNodes:
+            if child.nodeType == minidom.Node.ELEMENT_NODE and 'x:Name' not in child.attributes:
+                errors.append(Diagnostic(f"ControlTemplate part <{child.tagName}> missing 'x:Name' attribute in element <{node.tagName}>", node=child))
+
+
+DEFAULT_RULES = [
+    MissingTagsRule,
+    UnknownElementsRule,
+    InvalidAttributesRule,
+    BindingErrorsRule,
+    ResourceErrorsRule,
+    StyleTemplateErrorsRule,
+    NamespaceErrorsRule,
+    ControlErrorsRule,
+    EventHandlerErrorsRule,
+    TemplateBindingErrorsRule,
+    VisualTreeErrorsRule,
+    DataTemplateErrorsRule,
+    ConverterErrorsRule,
+    StyleConflictsRule,
+    AnimationStoryboardErrorsRule,
+    MarkupExtensionErrorsRule,
+    ControlTemplatePartErrorsRule
+]
+
+
+class XAMLValidator:
+    def __init__(self, rules=None, catalog_paths=()):
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+        self.catalog_paths = tuple(catalog_paths)
+        self._catalog = None
+        # Tag and attribute names repeat heavily, so rule routing is decided once per distinct name.
+        self._element_dispatch = {}
+        self._attribute_dispatch = {}
+        rule_names = ",".join(f"{rule.__module__}.{rule.__qualname__}" for rule in self.rules)
+        rule_names += f";{catalog_key(self.catalog_paths)}"
+        self.ruleset_version = f"{RULESET_VERSION}:{hashlib.sha1(rule_names.encode()).hexdigest()[:12]}"
+
+    @property
+    def catalog(self):
+        # Loaded on first use, so validators that never consult the catalog skip it entirely.
+        if self._catalog is None:
+            self._catalog = load_catalog(self.catalog_paths)
+        return self._catalog
+
+    def _rules_for_element(self, tag_name):
+        indices = self._element_dispatch.get(tag_name)
+        if indices is None:
+            indices = tuple(i for i, rule in enumerate(self.rules) if rule.matches_element(tag_name))
+            self._element_dispatch[tag_name] = indices
+        return indices
+
+    def _rules_for_attribute(self, attr_name):
+        indices = self._attribute_dispatch.get(attr_name)
+        if indices is None:
+            indices = tuple(i for i, rule in enumerate(self.rules) if rule.matches_attribute(attr_name))
+            self._attribute_dispatch[attr_name] = indices
+        return indices
+
+    def validate(self, xml_node, source_map=None, profile=None, progress=None, total_elements=None, resource_scope=None):
+        # Returns Diagnostics, with text ranges when the parse's source_map is given. With a
+        # profile, time and visit counts are recorded per rule; progress(stage, fraction) is
+        # called as elements are visited when total_elements is known. resource_scope (a
+        # ResourceScope) supplies the keys defined elsewhere in the project.
+        rules = [rule(self, resource_scope) for rule in self.rules]
+        cursor = VisitCursor()
+        rule_errors = [DiagnosticList(cursor) for _ in rules]
+        for rule in rules:
+            rule.start(xml_node)
+
+        if profile is None and progress is None:
+            for node in iter_elements(xml_node):
+                cursor.node = node
+                cursor.attribute = None
+                for i in self._rules_for_element(node.tagName):
+                    rules[i].visit_element(node, rule_errors[i])
+                if node.hasAttributes():
+                    for attr_name, attr_value in node.attributes.items():
+                        cursor.attribute = attr_name
+                        for i in self._rules_for_attribute(attr_name):
+                            rules[i].visit_attribute(node, attr_name, attr_value, rule_errors[i])
+        else:
+            self._visit_instrumented(xml_node, rules, rule_errors, cursor, profile, progress, total_elements)
+
+        cursor.node = cursor.attribute = None
+        errors = []
+        for rule, errors_for_rule in zip(rules, rule_errors):
+            start = time.perf_counter()
+            rule.finish(errors_for_rule)
+            if profile is not None:
+                profile.add(f"rule:{rule.name}", time.perf_counter() - start, calls=0)
+            for error in errors_for_rule:
+                if error.rule is None:
+                    error.rule = rule.name
+                resolve_location(error, source_map)
+            errors.extend(errors_for_rule)
+        return errors
+
+    def _visit_instrumented(self, xml_node, rules, rule_errors, cursor, profile, progress, total_elements):
+        # Same walk as validate(), timing every rule call. Kept separate so unprofiled runs
+        # pay nothing for it.
+        clock = time.perf_counter
+        seconds = [0.0] * len(rules)
+        calls = [0] * len(rules)
+        elements = [0] * len(rules)
+        attributes = [0] * len(rules)
+        visited = attribute_count = 0
+        for node in iter_elements(xml_node):
+            visited += 1
+            cursor.node = node
+            cursor.attribute = None
+            for i in self._rules_for_element(node.tagName):
+                start = clock()
+                rules[i].visit_element(node, rule_errors[i])
+                seconds[i] += clock() - start
+                calls[i] += 1
+                elements[i] += 1
+            if node.hasAttributes():
+                for attr_name, attr_value in node.attributes.items():
+                    attribute_count += 1
+                    cursor.attribute = attr_name
+                    for i in self._rules_for_attribute(attr_name):
+                        start = clock()
+                        rules[i].visit_attribute(node, attr_name, attr_value, rule_errors[i])
+                        seconds[i] += clock() - start
+                        calls[i] += 1
+                        attributes[i] += 1
+            if progress is not None and total_elements and visited % 512 == 0:
+                progress("validate", visited / total_elements)
+        if profile is not None:
+            for i, rule in enumerate(rules):
+                profile.add(f"rule:{rule.name}", seconds[i], calls[i], elements[i], attributes[i])
+            profile.add("validate", 0.0, calls=0, elements=visited, attributes=attribute_count)
+        if progress is not None:
+            progress("validate", 1.0)
@@ -0,0 +1,208 @@
+import os
+import queue
+import threading
+import time
+
+from .files import EXCLUDED_DIRECTORIES, find_xaml_files
+from .pipeline import process_file
+from .resources import find_project_root, project_index
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    # Optional: without watchdog the tree is polled instead.
+    FileSystemEventHandler = object
+    Observer = None
+
+
+def file_state(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class PollingWatcher:
+    # Stats every XAML file under the watched paths each interval and reports the ones
+    # that appeared, disappeared or changed size or mtime.
+    def __init__(self, paths, changes, interval=0.5):
+        self.paths = paths
+        self.changes = changes
+        self.interval = interval
+        self.snapshot = self.scan()
+        self._stopped = threading.Event()
+
+    def scan(self):
+        return {path: file_state(path) for path in find_xaml_files(self.paths)}
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            snapshot = self.scan()
+            for path in snapshot.keys() | self.snapshot.keys():
+                if snapshot.get(path) != self.snapshot.get(path):
+                    self.changes.put(path)
+            self.snapshot = snapshot
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        for path in (event.src_path, getattr(event, "dest_path", None)):
+            if path and self.watcher.wanted(path):
+                self.watcher.changes.put(path)
+
+
+class EventWatcher:
+    # Operating system change notifications (inotify, FSEvents, ReadDirectoryChangesW)
+    # through watchdog, filtered the way find_xaml_files filters a walk.
+    def __init__(self, paths, changes):
+        self.changes = changes
+        self.files = {os.path.abspath(path) for path in paths if os.path.isfile(path)}
+        self.directories = sorted({os.path.abspath(path) for path in paths if os.path.isdir(path)})
+        self.observer = Observer()
+        handler = _EventHandler(self)
+        for directory in self.directories:
+            self.observer.schedule(handler, directory, recursive=True)
+        for directory in {os.path.dirname(path) for path in self.files} - set(self.directories):
+            self.observer.schedule(handler, directory, recursive=False)
+
+    def wanted(self, path):
+        path = os.path.abspath(path)
+        if path in self.files:
+            return True
+        if not path.lower().endswith(".xaml"):
+            return False
+        for directory in self.directories:
+            if path.startswith(directory + os.sep):
+                parts = os.path.relpath(os.path.dirname(path), directory).split(os.sep)
+                if not any(part != os.curdir and (part.startswith(".") or part.lower() in EXCLUDED_DIRECTORIES) for part in parts):
+                    return True
+        return False
+
+    def start(self):
+        self.observer.start()
+
+    def stop(self):
+        self.observer.stop()
+        self.observer.join()
+
+
+def create_watcher(paths, changes, interval=0.5, polling=False):
+    if Observer is None or polling:
+        return PollingWatcher(paths, changes, interval)
+    return EventWatcher(paths, changes)
+
+
+class WatchSession:
+    # Re-runs process_file on XAML files as they change. A burst of saves is handled as one
+    # batch once the tree has been quiet for debounce seconds, and when a batch changes the
+    # resources a dictionary provides, every file that can see that dictionary is checked
+    # again too. Results are passed to emit(result) one file at a time, as they complete,
+    # and batch_done(results, seconds) follows each batch.
+    def __init__(self, paths, emit, batch_done=None, project=None, debounce=0.2, interval=0.5, polling=False, **options):
+        self.paths = paths
+        self.emit = emit
+        self.batch_done = batch_done
+        self.project = os.path.abspath(project) if project else None
+        self.debounce = debounce
+        self.interval = interval
+        self.polling = polling
+        self.options = options  # Passed through to process_file.
+        self.indexed = set()
+        self.own_writes = {}  # Path -> file_state() after this session reformatted it.
+        self._roots = {}
+
+    def project_root(self, path):
+        if self.project:
+            return self.project
+        directory = os.path.dirname(os.path.abspath(path))
+        if directory not in self._roots:
+            self._roots[directory] = find_project_root(directory)
+        return self._roots[directory]
+
+    def run(self, initial=True):
+        changes = queue.Queue()
+        watcher = create_watcher(self.paths, changes, self.interval, self.polling)
+        watcher.start()
+        try:
+            files = [os.path.abspath(path) for path in find_xaml_files(self.paths)]
+            for root in {self.project_root(path) for path in files} - {None}:
+                self.refresh_index(root, ())
+            if initial:
+                self.process(files)
+            while True:
+                batch = {changes.get()}
+                while True:
+                    try:
+                        batch.add(changes.get(timeout=self.debounce))
+                    except queue.Empty:
+                        break
+                self.process(sorted(batch))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            watcher.stop()
+
+    def process(self, paths):
+        start = time.perf_counter()
+        fresh = []
+        for path in map(os.path.abspath, paths):
+            # Writing a reformatted file is itself a change; skip the event it produces.
+            if path in self.own_writes and self.own_writes.pop(path) == file_state(path):
+                continue
+            fresh.append(path)
+        targets = {}
+        by_root = {}
+        for path in fresh:
+            by_root.setdefault(self.project_root(path), []).append(path)
+        for root, root_paths in by_root.items():
+            targets.update((path, root) for path in root_paths if os.path.exists(path))
+            if root is None:
+                continue
+            for path in self.refresh_index(root, root_paths):
+                targets.setdefault(path, root)
+
+        if not targets:
+            return []
+        results = []
+        for path, root in targets.items():
+            result = process_file(path, project_root=root, **self.options)
+            if result["changed"] and self.options.get("mode") == "format" and self.options.get("write", True):
+                self.own_writes[path] = file_state(path)
+            results.append(result)
+            self.emit(result)
+        if self.batch_done is not None:
+            self.batch_done(results, time.perf_counter() - start)
+        return results
+
+    def refresh_index(self, root, paths):
+        # Updates the project's resource index for paths and returns the other files that
+        # need checking again because resources they can see were added or removed. A
+        # project seen for the first time is indexed whole.
+        if root not in self.indexed:
+            self.indexed.add(root)
+            project_index(root)
+            return []
+        index = project_index(root, update=False)
+        relative = [index.relative(path) for path in paths]
+        # Files that could see these dictionaries before the change, and those that can now.
+        before = index.dependents(relative)
+        changed = index.update(paths)
+        if not changed:
+            return []
+        index.save()
+        dependents = set(before) | set(index.dependents(changed))
+        return [os.path.join(root, *rel.split("/")) for rel in sorted(dependents) if rel in index.files]